@@ -0,0 +1,17 @@
+from sqlmodel import text
+from app.db.database import get_session
+
+def add_column():
+    with get_session() as session:
+        try:
+            session.execute(text("ALTER TABLE parkinglot ADD COLUMN is_active BOOLEAN NOT NULL DEFAULT 1"))
+            session.commit()
+            print("✅ Added 'is_active' column to 'parkinglot' table.")
+        except Exception as e:
+            if "duplicate column name" in str(e).lower():
+                print("⚠️ Column 'is_active' already exists.")
+            else:
+                print(f"❌ Error adding column: {e}")
+
+if __name__ == "__main__":
+    add_column()
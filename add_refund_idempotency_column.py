@@ -0,0 +1,20 @@
+from sqlmodel import text
+from app.db.database import get_session
+
+def add_column():
+    with get_session() as session:
+        try:
+            session.execute(text("ALTER TABLE booking ADD COLUMN refund_idempotency_key VARCHAR"))
+            session.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_booking_refund_idempotency_key ON booking (refund_idempotency_key)"
+            ))
+            session.commit()
+            print("✅ Added 'refund_idempotency_key' column to 'booking' table.")
+        except Exception as e:
+            if "duplicate column name" in str(e).lower():
+                print("⚠️ Column 'refund_idempotency_key' already exists.")
+            else:
+                print(f"❌ Error adding column: {e}")
+
+if __name__ == "__main__":
+    add_column()
@@ -1,11 +1,8 @@
-from sqlmodel import create_engine, text
-from sqlalchemy.orm import Session
+from sqlmodel import text
+from app.db.database import get_session
 
 def add_column():
-    DATABASE_URL = "sqlite:///reflex.db"
-    engine = create_engine(DATABASE_URL)
-    
-    with Session(engine) as session:
+    with get_session() as session:
         try:
             session.execute(text("ALTER TABLE booking ADD COLUMN reminder_sent BOOLEAN DEFAULT 0"))
             session.commit()
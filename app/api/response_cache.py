@@ -0,0 +1,68 @@
+"""Short-TTL response cache for read-heavy API endpoints."""
+import hashlib
+import threading
+import time
+from typing import Dict, Hashable, NamedTuple, Optional
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Caches serialized response bodies per query key for a few seconds.
+    Entries are tagged with a data version; a version bump (e.g. a lot catalog
+    change) drops every entry so stale bodies are never served.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, CachedResponse] = {}
+        self._version: Optional[int] = None
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+                return None
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > time.monotonic():
+                return entry
+            self._entries.pop(key, None)
+            return None
+
+    def put(self, key: Hashable, version: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            etag=make_etag(body),
+            headers=headers or {},
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = entry
+        return entry
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body."""
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
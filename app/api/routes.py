@@ -1,57 +1,172 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
 from sqlmodel import select
 from typing import Optional
 from datetime import datetime
+import hmac
+import json
 import logging
-import reflex as rx
+import os
+from app.db.database import get_job_metrics, get_session
 from app.db.models import ParkingLot, Booking, User, AuditLog
+from app.services import cancellation_service, lot_catalog, lot_closure, rate_limiter
+from app.services.rate_limiter import booking_api_limiter
+from app.services.geo_index import find_nearby_lots
+from app.services.ai.pattern_detector import default_detector
+from app.api.response_cache import ResponseCache, etag_matches
 
 router = APIRouter(tags=["Parking API"])
 
 
+# Shared secret for admin-only endpoints, sent as X-Admin-Key; unset disables them
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+
+LOT_FIELDS = set(lot_catalog.LotRecord._fields)
+lots_cache = ResponseCache(ttl_seconds=5.0)
+
+
 @router.get("/api/parking-lots", summary="Get all parking lots")
 async def get_parking_lots(
-    location: Optional[str] = None, search: Optional[str] = None
+    location: Optional[str] = None,
+    search: Optional[str] = None,
+    cursor: Optional[int] = Query(None, description="Return lots with id greater than this (from X-Next-Cursor)"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all lots"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to include"),
+    if_none_match: Optional[str] = Header(None),
 ):
-    """Retrieve all parking lots with optional filtering by location and search term."""
-    with rx.session() as session:
-        query = select(ParkingLot)
+    """
+    Retrieve parking lots with optional filtering by location and search term.
+    Supports cursor pagination, field projection and ETag revalidation (304 Not Modified).
+    """
+    selected_fields = None
+    if fields:
+        selected_fields = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = set(selected_fields) - LOT_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    version = lot_catalog.get_version()
+    key = (location, search, cursor, limit, selected_fields)
+    cached = lots_cache.get(key, version)
+    if not cached:
+        lots = lot_catalog.get_lots()
         if location and location != "All":
-            query = query.where(ParkingLot.location.contains(location))
+            location_lower = location.lower()
+            lots = [lot for lot in lots if location_lower in lot.location.lower()]
         if search:
-            query = query.where(ParkingLot.name.contains(search))
-        lots = session.exec(query).all()
-        return [lot.to_dict() for lot in lots]
+            search_lower = search.lower()
+            lots = [lot for lot in lots if search_lower in lot.name.lower()]
+        if cursor is not None:
+            lots = [lot for lot in lots if lot.id > cursor]
+
+        headers = {}
+        if limit is not None and len(lots) > limit:
+            lots = lots[:limit]
+            headers["X-Next-Cursor"] = str(lots[-1].id)
+
+        if selected_fields:
+            items = [{f: getattr(lot, f) for f in selected_fields} for lot in lots]
+        else:
+            items = [lot.to_dict() for lot in lots]
+        body = json.dumps(items, separators=(",", ":")).encode("utf-8")
+        cached = lots_cache.put(key, version, body, headers)
+
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": "no-cache",
+        **cached.headers,
+    }
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+@router.get("/api/parking-lots/nearby", summary="Find nearest parking lots")
+async def get_nearby_parking_lots(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=100),
+    limit: int = Query(10, ge=1, le=100),
+    available_only: bool = True,
+):
+    """Retrieve the nearest parking lots within a radius, nearest first."""
+    return [
+        {**lot.to_dict(), "distance_km": round(distance, 3)}
+        for lot, distance in find_nearby_lots(lat, lng, radius_km, limit, available_only)
+    ]
 
 
 @router.get("/api/parking-lots/{lot_id}", summary="Get parking lot by ID")
 async def get_parking_lot(lot_id: int):
     """Retrieve a specific parking lot by its ID."""
-    with rx.session() as session:
-        lot = session.get(ParkingLot, lot_id)
-        if not lot:
-            raise HTTPException(status_code=404, detail="Parking lot not found")
-        return lot.to_dict()
+    lot = lot_catalog.get_lot(lot_id)
+    if not lot:
+        raise HTTPException(status_code=404, detail="Parking lot not found")
+    return lot.to_dict()
 
 
 @router.put("/api/parking-lots/{lot_id}/availability", summary="Update availability")
 async def update_availability(lot_id: int, available_spots: int):
     """Update the available spots for a parking lot."""
-    with rx.session() as session:
+    with get_session() as session:
         lot = session.get(ParkingLot, lot_id)
         if not lot:
             raise HTTPException(status_code=404, detail="Parking lot not found")
+        if not lot.is_active:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Parking lot is closed")
         lot.available_spots = available_spots
         session.add(lot)
         session.commit()
         session.refresh(lot)
+        lot_catalog.set_available_spots(lot.id, lot.available_spots)
         return lot.to_dict()
 
 
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Reject requests without the admin API key."""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin API is disabled")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, ADMIN_API_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin key")
+
+
+@router.post(
+    "/api/parking-lots/{lot_id}/close",
+    summary="Close a parking lot (admin)",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_admin)],
+)
+async def close_parking_lot(lot_id: int, data: Optional[dict] = None):
+    """Cancel every upcoming booking at a lot in the background, refunding and notifying users."""
+    data = data or {}
+    if not lot_catalog.get_lot(lot_id):
+        raise HTTPException(status_code=404, detail="Parking lot not found")
+    try:
+        job = lot_closure.start_lot_closure(
+            lot_id,
+            reason=data.get("reason") or "Parking lot closed",
+            full_refund=bool(data.get("full_refund", True)),
+        )
+    except lot_closure.ClosureInProgress as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "job_id": e.job.job_id},
+        )
+    return job.to_dict()
+
+
+@router.get("/api/lot-closures/{job_id}", summary="Lot closure job progress", dependencies=[Depends(require_admin)])
+async def get_lot_closure(job_id: str):
+    """Progress counters of a lot closure job started in this process."""
+    job = lot_closure.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Lot closure job not found")
+    return job.to_dict()
+
+
 @router.get("/api/bookings", summary="Get user bookings")
 async def get_bookings(user_email: str, status_filter: Optional[str] = None):
     """Retrieve bookings for a specific user with optional status filter."""
-    with rx.session() as session:
+    with get_session() as session:
         user = session.exec(select(User).where(User.email == user_email)).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -63,9 +178,19 @@ async def get_bookings(user_email: str, status_filter: Optional[str] = None):
 
 
 @router.post("/api/bookings", summary="Create a new booking")
-async def create_booking(data: dict):
+async def create_booking(data: dict, request: Request):
     """Create a new parking booking."""
-    with rx.session() as session:
+    limit = booking_api_limiter.hit(
+        email=data.get("user_email"),
+        ip=request.client.host if request.client else None,
+    )
+    if not limit.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many booking requests",
+            headers={"Retry-After": str(int(limit.retry_after))},
+        )
+    with get_session() as session:
         required_fields = [
             "user_email",
             "lot_id",
@@ -84,6 +209,8 @@ async def create_booking(data: dict):
         lot = session.get(ParkingLot, data["lot_id"])
         if not lot:
             raise HTTPException(status_code=404, detail="Parking lot not found")
+        if not lot.is_active:
+            raise HTTPException(status_code=400, detail="Parking lot is closed")
         if lot.available_spots <= 0:
             raise HTTPException(status_code=400, detail="Parking lot is full")
         booking = Booking(
@@ -99,6 +226,7 @@ async def create_booking(data: dict):
         )
         session.add(booking)
         lot.available_spots -= 1
+        available_spots = lot.available_spots
         session.add(lot)
         audit = AuditLog(
             action="Booking Created",
@@ -109,6 +237,8 @@ async def create_booking(data: dict):
         try:
             session.commit()
             session.refresh(booking)
+            lot_catalog.set_available_spots(lot.id, available_spots)
+            default_detector.observe_booking(booking)
             return booking.to_dict()
         except Exception as e:
             logging.exception(f"Error creating booking: {e}")
@@ -119,26 +249,38 @@ async def create_booking(data: dict):
 @router.post("/api/bookings/{booking_id}/cancel", summary="Cancel a booking")
 async def cancel_booking(booking_id: int):
     """Cancel an existing booking and process refund."""
-    with rx.session() as session:
+    with get_session() as session:
         booking = session.get(Booking, booking_id)
         if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
         if booking.status == "Cancelled":
             raise HTTPException(status_code=400, detail="Booking already cancelled")
-        refund_amount = booking.total_price * 0.5
+        # Same (cached) policy as the bookings page; refunds wait for admin approval
+        eligibility = cancellation_service.validate_cancellation_eligibility(booking)
+        if not eligibility["can_cancel"]:
+            raise HTTPException(status_code=400, detail=eligibility["message"])
+        refund_amount = eligibility["refund_amount"]
         booking.status = "Cancelled"
-        booking.payment_status = "Refunded"
+        if refund_amount > 0:
+            booking.refund_status = "Pending"
+            booking.payment_status = "Pending Refund"
+        else:
+            booking.payment_status = "Cancelled (No Refund)"
         booking.refund_amount = refund_amount
         booking.cancellation_at = datetime.utcnow()
         booking.cancellation_reason = "User requested via API"
         session.add(booking)
         lot = session.get(ParkingLot, booking.lot_id)
-        if lot:
+        # A closed lot keeps zero spots
+        if lot and lot.is_active:
             lot.available_spots += 1
+            available_spots = lot.available_spots
             session.add(lot)
         try:
             session.commit()
             session.refresh(booking)
+            if lot and lot.is_active:
+                lot_catalog.set_available_spots(lot.id, available_spots)
             
             # Send cancellation confirmation email
             try:
@@ -153,7 +295,10 @@ async def cancel_booking(booking_id: int):
                     "slot_id": booking.slot_id or "N/A",
                     "vehicle_number": booking.vehicle_number or "N/A",
                     "total_price": booking.total_price,
-                    "refund_message": f"A refund of ${refund_amount:.2f} will be processed within 5-7 business days."
+                    "refund_message": (
+                        f"A refund of RM {refund_amount:.2f} will be processed within 5-7 business days."
+                        if refund_amount > 0 else eligibility["message"]
+                    )
                 }
                 
                 if user and user.email:
@@ -162,8 +307,42 @@ async def cancel_booking(booking_id: int):
             except Exception as email_error:
                 logging.error(f"Failed to send cancellation email: {email_error}")
             
-            return {"message": "Booking cancelled", "refund_amount": refund_amount}
+            return {
+                "message": "Booking cancelled",
+                "refund_amount": refund_amount,
+                "refund_percentage": eligibility["refund_percentage"],
+                "refund_reason": eligibility["reason"],
+            }
         except Exception as e:
             logging.exception(f"Error cancelling booking: {e}")
             session.rollback()
-            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/cancellation-policy", summary="Active cancellation policy")
+async def get_cancellation_policy():
+    """The cached active policy and its cache version in this process."""
+    return {
+        "policy": cancellation_service.get_active_cancellation_policy()._asdict(),
+        "version": cancellation_service.get_policy_version(),
+    }
+
+
+@router.put("/api/cancellation-policy", summary="Update the cancellation policy (admin)", dependencies=[Depends(require_admin)])
+async def update_cancellation_policy(data: dict):
+    """Change policy fields; every process drops its cached copy."""
+    try:
+        policy = cancellation_service.update_cancellation_policy(**data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"policy": policy._asdict(), "version": cancellation_service.get_policy_version()}
+
+
+@router.get("/api/rate-limits/metrics", summary="Rate limiter metrics (admin)", dependencies=[Depends(require_admin)])
+async def get_rate_limit_metrics():
+    """Allowed and rejected request counts per rate limiter in this process."""
+    return rate_limiter.get_metrics()
+
+@router.get("/api/db/metrics", summary="Database pool and job metrics (admin)", dependencies=[Depends(require_admin)])
+async def get_db_metrics():
+    """Shared pool usage and per-job connection counts in this process."""
+    return get_job_metrics()
@@ -18,6 +18,7 @@ from app.pages.admin_analytics import admin_analytics_page
 from app.pages.chatbot_page import chatbot_page
 from app.pages.smart_dashboard import smart_dashboard_page
 from app.pages.not_found import not_found_page
+from app.db.database import get_engine
 from app.db.init_db import init_db
 from app.states.booking_state import BookingState
 from app.states.user_state import UserState
@@ -38,6 +39,9 @@ class AppState(rx.State):
             logging.exception(f"Error initializing DB: {e}")
 
 
+# Tune the shared engine before any rx.session() opens a connection
+get_engine()
+
 app = rx.App(
     theme=rx.theme(appearance="light"),
     head_components=[
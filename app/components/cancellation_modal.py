@@ -87,7 +87,8 @@ def cancellation_modal() -> rx.Component:
                         rx.el.button(
                             "Confirm Cancellation",
                             on_click=BookingState.confirm_cancellation,
-                            class_name="flex-1 px-4 py-2.5 rounded-lg bg-red-600 text-white hover:bg-red-700 font-medium transition-colors"
+                            disabled=~BookingState.can_cancel,
+                            class_name="flex-1 px-4 py-2.5 rounded-lg bg-red-600 text-white hover:bg-red-700 font-medium transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
                         ),
                         class_name="flex gap-3"
                     ),
@@ -1,5 +1,5 @@
 import reflex as rx
-from app.states.parking_state import ParkingLot
+from app.states.parking_state import ParkingLot, ParkingState
 from app.states.booking_state import BookingState
 from app.states.auth_state import AuthState
 
@@ -37,6 +37,7 @@ def status_badge(spots: int) -> rx.Component:
 
 
 def parking_card(lot: ParkingLot) -> rx.Component:
+    available_spots = ParkingState.live_spots[lot.id]
     return rx.el.div(
         rx.el.div(
             rx.image(
@@ -45,7 +46,7 @@ def parking_card(lot: ParkingLot) -> rx.Component:
                 class_name="h-56 w-full object-cover transition-transform duration-700 group-hover:scale-105",
             ),
             rx.el.div(
-                status_badge(lot.available_spots), class_name="absolute top-4 right-4"
+                status_badge(available_spots), class_name="absolute top-4 right-4"
             ),
             # Recommendation Badge
             rx.cond(
@@ -147,14 +148,14 @@ def parking_card(lot: ParkingLot) -> rx.Component:
                         ),
                         rx.el.button(
                             "Book Now",
-                            disabled=lot.available_spots == 0,
+                            disabled=available_spots == 0,
                             on_click=rx.cond(
                                 AuthState.is_authenticated,
                                 BookingState.open_modal(lot),
                                 rx.redirect("/login"),
                             ),
                             class_name=rx.cond(
-                                lot.available_spots > 0,
+                                available_spots > 0,
                                 "bg-gradient-to-r from-sky-500 to-blue-600 text-white hover:shadow-lg hover:shadow-sky-500/30 hover:scale-105",
                                 "bg-gray-100 text-gray-400 cursor-not-allowed",
                             )
@@ -121,6 +121,30 @@ class ChatbotConversation(SQLModel, table=True):
         }
 
 
+class ChatbotMessage(SQLModel, table=True):
+    """Append-only chatbot message log, one row per message."""
+    __tablename__ = "chatbotmessage"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    conversation_id: str = Field(index=True)
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    role: str
+    content: str
+    intent: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "conversation_id": self.conversation_id,
+            "user_id": self.user_id,
+            "role": self.role,
+            "content": self.content,
+            "intent": self.intent,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
 class RecommendationScore(SQLModel, table=True):
     """Cache recommendation scores for users."""
     __tablename__ = "recommendationscore"
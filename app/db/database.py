@@ -1,11 +1,182 @@
-import reflex as rx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import Session
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from typing import Dict, Iterator, Optional
 import logging
+import os
+import threading
+import time
+
+load_dotenv()
+
+# SQLite connection tuning, applied to every new pooled connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+# Pool of the shared engine. Reflex builds the engine behind rx.session() from these
+# SQLALCHEMY_* variables, so the defaults are put in place before it is first created.
+POOL_SETTINGS = {
+    "SQLALCHEMY_POOL_PRE_PING": "true",
+    "SQLALCHEMY_POOL_SIZE": "5",
+    "SQLALCHEMY_MAX_OVERFLOW": "10",
+    "SQLALCHEMY_POOL_TIMEOUT": "30",
+    "SQLALCHEMY_POOL_RECYCLE": "1800",
+}
+for _name, _default in POOL_SETTINGS.items():
+    os.environ.setdefault(_name, _default)
+
+_engine_lock = threading.Lock()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; busy_timeout makes writers wait instead of failing."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    finally:
+        cursor.close()
+
+
+def _configure(engine: Engine):
+    """Attach the pragma and job-metrics listeners once."""
+    with _engine_lock:
+        if event.contains(engine, "checkout", _on_checkout):
+            return
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _apply_sqlite_pragmas)
+            # Connections opened before the listener existed are replaced with tuned ones
+            engine.dispose()
+        event.listen(engine, "checkout", _on_checkout)
+        event.listen(engine, "checkin", _on_checkin)
+        logging.info(f"Database: Shared engine for {engine.url.render_as_string()} ({engine.pool.status()})")
+
+
+def get_engine() -> Engine:
+    """
+    The process-wide engine behind rx.session() (from the Reflex config's db_url), tuned on first use.
+    State handlers, scheduler jobs, scripts and the API all share its pool; use it (via rx.session,
+    get_session or job_session) instead of create_engine().
+    """
+    from reflex.model import get_engine as get_reflex_engine
+
+    engine = get_reflex_engine()
+    if not event.contains(engine, "checkout", _on_checkout):
+        _configure(engine)
+    return engine
+
+
+def get_session() -> Session:
+    """A session on the shared engine, for code that runs outside Reflex state handlers."""
+    return Session(get_engine())
+
+
+class JobMetrics:
+    """Connection usage of one named job, accumulated over its runs."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.runs = 0
+        self.failures = 0
+        self.checkouts = 0
+        self.connection_seconds = 0.0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "checkouts": self.checkouts,
+            "connection_seconds": round(self.connection_seconds, 3),
+            "total_seconds": round(self.total_seconds, 3),
+            "last_seconds": round(self.last_seconds, 3),
+        }
+
+
+class _JobRun:
+    __slots__ = ("checkouts", "connection_seconds")
+
+    def __init__(self):
+        self.checkouts = 0
+        self.connection_seconds = 0.0
+
+
+_current_run: ContextVar[Optional[_JobRun]] = ContextVar("db_job_run", default=None)
+_metrics: Dict[str, JobMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    run = _current_run.get()
+    if run is not None:
+        run.checkouts += 1
+        connection_record.info["job_run"] = (run, time.perf_counter())
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    checked_out = connection_record.info.pop("job_run", None)
+    if checked_out is not None:
+        run, started = checked_out
+        run.connection_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def job_session(name: str) -> Iterator[Session]:
+    """
+    A session on the shared engine for a background job; records how many connections the run
+    checked out and how long it held them under `name` (see get_job_metrics()).
+    """
+    run = _JobRun()
+    token = _current_run.set(run)
+    started = time.perf_counter()
+    failed = False
+    try:
+        with get_session() as session:
+            yield session
+    except Exception:
+        failed = True
+        raise
+    finally:
+        _current_run.reset(token)
+        elapsed = time.perf_counter() - started
+        with _metrics_lock:
+            metrics = _metrics.get(name)
+            if metrics is None:
+                metrics = _metrics[name] = JobMetrics(name)
+            metrics.runs += 1
+            if failed:
+                metrics.failures += 1
+            metrics.checkouts += run.checkouts
+            metrics.connection_seconds += run.connection_seconds
+            metrics.total_seconds += elapsed
+            metrics.last_seconds = elapsed
+        logging.info(
+            f"Database: Job {name} took {elapsed:.3f}s, {run.checkouts} checkouts, "
+            f"held connections {run.connection_seconds:.3f}s"
+        )
+
+
+def get_job_metrics() -> Dict[str, dict]:
+    """Per-job connection metrics plus the shared pool's current state."""
+    with _metrics_lock:
+        jobs = {name: metrics.to_dict() for name, metrics in _metrics.items()}
+    # status() works for every pool class Reflex may pick
+    return {"pool": get_engine().pool.status(), "jobs": jobs}
 
 
 def get_db():
     """Provide a transactional scope around a series of operations."""
-    with rx.session() as session:
+    with get_session() as session:
         try:
             yield session
         except Exception as e:
@@ -13,4 +184,4 @@ def get_db():
             session.rollback()
             raise
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
@@ -1,6 +1,7 @@
 import reflex as rx
 from sqlmodel import select, SQLModel
 from app.db.models import ParkingLot, User, Booking, Payment, AuditLog, CancellationPolicy, BookingRule
+from app.services.password_service import hash_password_sync
 import logging
 
 
@@ -42,6 +43,8 @@ def init_db():
                         image_url="/placeholder.svg",
                         features="Covered,CCTV,24/7",
                         rating=4.8,
+                        latitude=3.1579,
+                        longitude=101.7123,
                     ),
                     ParkingLot(
                         name="Bukit Bintang Central",
@@ -52,6 +55,8 @@ def init_db():
                         image_url="/placeholder.svg",
                         features="Valet,EV Charging",
                         rating=4.5,
+                        latitude=3.1466,
+                        longitude=101.7108,
                     ),
                     ParkingLot(
                         name="Mid Valley South Key",
@@ -62,6 +67,8 @@ def init_db():
                         image_url="/placeholder.svg",
                         features="Covered,Multiple Entries",
                         rating=4.2,
+                        latitude=3.1177,
+                        longitude=101.6775,
                     ),
                     ParkingLot(
                         name="Bangsar Village Open Lot",
@@ -72,6 +79,8 @@ def init_db():
                         image_url="/placeholder.svg",
                         features="Open Air,Cheap Rates",
                         rating=3.9,
+                        latitude=3.1302,
+                        longitude=101.671,
                     ),
                     ParkingLot(
                         name="Sunway Pyramid Zone B",
@@ -82,6 +91,8 @@ def init_db():
                         image_url="/placeholder.svg",
                         features="Smart Parking,Wide Bays",
                         rating=4.6,
+                        latitude=3.0731,
+                        longitude=101.607,
                     ),
                     ParkingLot(
                         name="Pavilion Elite",
@@ -92,6 +103,8 @@ def init_db():
                         image_url="/placeholder.svg",
                         features="Premium,Valet,Car Wash",
                         rating=4.9,
+                        latitude=3.149,
+                        longitude=101.7133,
                     ),
                 ]
                 session.add_all(lots)
@@ -102,7 +115,7 @@ def init_db():
                     demo_user = User(
                         name="Alex Tan",
                         email="alex.tan@example.com",
-                        password_hash="password123",
+                        password_hash=hash_password_sync("password123"),
                         phone="+60 12-345 6789",
                         avatar_url="https://api.dicebear.com/9.x/notionists/svg?seed=Alex",
                     )
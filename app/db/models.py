@@ -2,7 +2,7 @@ import reflex as rx
 from datetime import datetime, timedelta
 from typing import Optional
 import sqlmodel
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Index, Relationship, SQLModel
 
 
 class User(SQLModel, table=True):
@@ -42,6 +42,9 @@ class ParkingLot(SQLModel, table=True):
     image_url: str
     features: str
     rating: float
+    latitude: Optional[float] = Field(default=None)
+    longitude: Optional[float] = Field(default=None)
+    is_active: bool = Field(default=True)  # False once the lot is closed; it takes no new bookings
     bookings: list["Booking"] = Relationship(back_populates="parking_lot")
 
     def to_dict(self):
@@ -55,6 +58,9 @@ class ParkingLot(SQLModel, table=True):
             "image_url": self.image_url,
             "features": self.features.split(",") if self.features else [],
             "rating": self.rating,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "is_active": self.is_active,
         }
 
 
@@ -86,6 +92,7 @@ class Booking(SQLModel, table=True):
     transaction_id: Optional[str] = None
     refund_amount: float = Field(default=0.0)
     refund_status: Optional[str] = Field(default=None)  # None, "Pending", "Approved", "Rejected"
+    refund_idempotency_key: Optional[str] = Field(default=None, index=True)  # Sent with every gateway attempt for this refund
     refund_approved_at: Optional[datetime] = None
     cancellation_reason: Optional[str] = None
     cancellation_at: Optional[datetime] = None
@@ -143,12 +150,17 @@ class Payment(SQLModel, table=True):
 class OTPVerification(SQLModel, table=True):
     """OTP verification model for secure password reset and email verification."""
 
+    # Covers the verify lookup (email, purpose, unused, not expired)
+    __table_args__ = (
+        Index("ix_otpverification_lookup", "email", "purpose", "is_used", "expires_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(index=True)
     otp_code: str
     purpose: str = Field(default="password_reset")  # password_reset, email_verification
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    expires_at: datetime
+    expires_at: datetime = Field(index=True)
     is_used: bool = Field(default=False)
     attempts: int = Field(default=0)
 
@@ -186,10 +198,17 @@ class AuditLog(SQLModel, table=True):
 
 class BookingRule(SQLModel, table=True):
     """Auto-booking rule for Smart Dashboard."""
+
+    # Covers the nightly lookup of active rules due on a weekday
+    __table_args__ = (
+        Index("ix_bookingrule_due", "status", "days_mask"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     location: str
     days: str  # Comma-separated days: "Mon,Tue"
+    days_mask: int = Field(default=0)  # Same days as bits, Mon = 1 ... Sun = 64
+    lot_id: Optional[int] = Field(default=None, foreign_key="parkinglot.id", index=True)
     time: str
     duration: str
     status: str = Field(default="Active")
@@ -213,5 +232,6 @@ class BookingRule(SQLModel, table=True):
             "vehicle_number": self.vehicle_number,
             "phone_number": self.phone_number,
             "slot_id": self.slot_id,
+            "lot_id": self.lot_id,
             "user_id": self.user_id
         }
\ No newline at end of file
@@ -2,6 +2,7 @@
 import reflex as rx
 from sqlmodel import select
 from app.db.models import ParkingLot as DBParkingLot
+from app.services import lot_catalog
 from app.pages.admin_users import admin_navbar
 
 
@@ -21,28 +22,29 @@ class AdminParkingLotsState(rx.State):
     form_price: str = ""
     form_total_spots: str = ""
     form_rating: str = "5.0"
+    form_latitude: str = ""
+    form_longitude: str = ""
     
     @rx.event
     async def load_parking_lots(self):
         """Load all parking lots from database"""
         self.is_loading = True
         try:
-            with rx.session() as session:
-                db_lots = session.exec(select(DBParkingLot)).all()
-                
-                self.parking_lots = [
-                    {
-                        "id": lot.id,
-                        "name": lot.name,
-                        "location": lot.location,
-                        "price_per_hour": f"RM {lot.price_per_hour:.2f}",
-                        "total_spots": lot.total_spots,
-                        "available_spots": lot.available_spots,
-                        "occupancy_percent": int((lot.total_spots - lot.available_spots) / lot.total_spots * 100) if lot.total_spots > 0 else 0,
-                        "rating": f"{lot.rating:.1f}⭐",
-                    }
-                    for lot in db_lots
-                ]
+            self.parking_lots = [
+                {
+                    "id": lot.id,
+                    "name": lot.name,
+                    "location": lot.location,
+                    "price_per_hour": f"RM {lot.price_per_hour:.2f}",
+                    "total_spots": lot.total_spots,
+                    "available_spots": lot.available_spots,
+                    "occupancy_percent": int((lot.total_spots - lot.available_spots) / lot.total_spots * 100) if lot.total_spots > 0 else 0,
+                    "rating": f"{lot.rating:.1f}⭐",
+                    "latitude": "" if lot.latitude is None else str(lot.latitude),
+                    "longitude": "" if lot.longitude is None else str(lot.longitude),
+                }
+                for lot in lot_catalog.get_lots(include_inactive=True)
+            ]
         except Exception as e:
             print(f"Error loading parking lots: {e}")
         self.is_loading = False
@@ -56,6 +58,8 @@ class AdminParkingLotsState(rx.State):
         self.form_price = ""
         self.form_total_spots = ""
         self.form_rating = "5.0"
+        self.form_latitude = ""
+        self.form_longitude = ""
         self.show_modal = True
 
     @rx.event
@@ -70,6 +74,8 @@ class AdminParkingLotsState(rx.State):
         self.form_total_spots = str(lot["total_spots"])
         # Extract numeric rating from "X.X⭐" format
         self.form_rating = lot["rating"].replace("⭐", "")
+        self.form_latitude = lot["latitude"]
+        self.form_longitude = lot["longitude"]
         self.show_modal = True
 
     @rx.event
@@ -92,6 +98,14 @@ class AdminParkingLotsState(rx.State):
     def set_form_total_spots(self, value):
         self.form_total_spots = str(value)
 
+    @rx.event
+    def set_form_latitude(self, value):
+        self.form_latitude = str(value)
+
+    @rx.event
+    def set_form_longitude(self, value):
+        self.form_longitude = str(value)
+
     @rx.event
     async def save_parking_lot(self):
         """Save (create or update) parking lot"""
@@ -99,6 +113,8 @@ class AdminParkingLotsState(rx.State):
             price = float(self.form_price) if self.form_price else 0.0
             spots = int(self.form_total_spots) if self.form_total_spots else 0
             rating = float(self.form_rating) if self.form_rating else 5.0
+            latitude = float(self.form_latitude) if self.form_latitude else None
+            longitude = float(self.form_longitude) if self.form_longitude else None
             
             with rx.session() as session:
                 if self.modal_mode == "add":
@@ -109,11 +125,14 @@ class AdminParkingLotsState(rx.State):
                         total_spots=spots,
                         available_spots=spots,  # Default to full availability
                         rating=rating,
+                        latitude=latitude,
+                        longitude=longitude,
                         image_url="https://images.unsplash.com/photo-1506521781263-d8422e82f27a?auto=format&fit=crop&w=800&q=80",
                         features="24/7 Security,Covered Parking,EV Charging"  # Default features
                     )
                     session.add(new_lot)
                     session.commit()
+                    lot_catalog.invalidate()
                     yield rx.toast.success("Parking lot created successfully!")
                 
                 else:
@@ -126,11 +145,15 @@ class AdminParkingLotsState(rx.State):
                         # Adjust available spots if total spots changed
                         diff = spots - lot.total_spots
                         lot.total_spots = spots
-                        lot.available_spots = max(0, lot.available_spots + diff)
+                        if lot.is_active:
+                            lot.available_spots = max(0, lot.available_spots + diff)
                         lot.rating = rating
+                        lot.latitude = latitude
+                        lot.longitude = longitude
                         
                         session.add(lot)
                         session.commit()
+                        lot_catalog.invalidate()
                         yield rx.toast.success("Parking lot updated successfully!")
             
             self.show_modal = False
@@ -162,6 +185,7 @@ class AdminParkingLotsState(rx.State):
                     
                     session.delete(lot)
                     session.commit()
+                    lot_catalog.invalidate()
                     yield rx.toast.success(f"{lot.name} deleted successfully.")
                     yield AdminParkingLotsState.load_parking_lots
                 else:
@@ -273,6 +297,31 @@ def parking_lot_modal() -> rx.Component:
                             class_name="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 outline-none"
                         ),
                     ),
+                    class_name="grid grid-cols-2 gap-4 mb-4"
+                ),
+                rx.el.div(
+                    rx.el.div(
+                        rx.el.label("Latitude", class_name="block text-sm font-medium text-gray-700 mb-1"),
+                        rx.el.input(
+                            value=AdminParkingLotsState.form_latitude,
+                            on_change=AdminParkingLotsState.set_form_latitude,
+                            type="number",
+                            step="0.0001",
+                            placeholder="e.g. 3.0731",
+                            class_name="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 outline-none"
+                        ),
+                    ),
+                    rx.el.div(
+                        rx.el.label("Longitude", class_name="block text-sm font-medium text-gray-700 mb-1"),
+                        rx.el.input(
+                            value=AdminParkingLotsState.form_longitude,
+                            on_change=AdminParkingLotsState.set_form_longitude,
+                            type="number",
+                            step="0.0001",
+                            placeholder="e.g. 101.6070",
+                            class_name="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 outline-none"
+                        ),
+                    ),
                     class_name="grid grid-cols-2 gap-4 mb-6"
                 ),
                 
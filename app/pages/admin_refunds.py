@@ -3,8 +3,8 @@ import reflex as rx
 from sqlmodel import select
 from app.db.models import Booking as DBBooking, User as DBUser, Payment as DBPayment, AuditLog as DBAuditLog
 from app.pages.admin_users import admin_navbar
+from app.services import refund_gateway
 from datetime import datetime
-import uuid
 import logging
 
 
@@ -74,6 +74,34 @@ class AdminRefundsState(rx.State):
                     yield rx.toast.error("Refund already processed")
                     return
                 
+                # Use the stored amount, not the one sent from the page
+                refund_amount = booking.refund_amount
+                
+                # Store the idempotency key before calling the gateway, so a retried
+                # approval reuses it and the customer is never refunded twice
+                if not booking.refund_idempotency_key:
+                    booking.refund_idempotency_key = refund_gateway.new_idempotency_key(booking.id)
+                    session.add(booking)
+                    session.commit()
+                transaction_id = booking.transaction_id or f"BK-{booking.id}"
+                reason = booking.cancellation_reason or "Refund approved by admin"
+                idempotency_key = booking.refund_idempotency_key
+            
+            # No session is held while the gateway call (and its retries) is in flight
+            result = await refund_gateway.get_client().refund(transaction_id, refund_amount, reason, idempotency_key)
+            if not result.success:
+                logging.error(f"Refund gateway failed for booking {booking_id}: {result.message}")
+                yield rx.toast.error(f"Refund failed: {result.message}")
+                return
+            
+            with rx.session() as session:
+                booking = session.get(DBBooking, booking_id)
+                # A lot closure may have recorded this refund meanwhile (same key, same gateway refund)
+                if not booking or booking.refund_status != "Pending":
+                    yield AdminRefundsState.load_pending_refunds
+                    yield rx.toast.info("Refund already processed")
+                    return
+                
                 # Update booking status
                 booking.refund_status = "Approved"
                 booking.refund_approved_at = datetime.now()
@@ -82,7 +110,7 @@ class AdminRefundsState(rx.State):
                 
                 # Create refund payment record
                 refund = DBPayment(
-                    transaction_id=f"RFD_{str(uuid.uuid4())[:8].upper()}",
+                    transaction_id=result.refund_id,
                     booking_id=booking.id,
                     amount=refund_amount,
                     status="Refunded",
@@ -95,7 +123,7 @@ class AdminRefundsState(rx.State):
                 audit = DBAuditLog(
                     action="Refund Approved",
                     timestamp=datetime.now(),
-                    details=f"Admin approved refund of RM {refund_amount:.2f} for booking {booking.id}",
+                    details=f"Admin approved refund of RM {refund_amount:.2f} for booking {booking.id} ({result.refund_id})",
                     user_id=booking.user_id,
                 )
                 session.add(audit)
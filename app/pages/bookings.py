@@ -455,6 +455,21 @@ def empty_state(title: str, message: str, show_cta: bool = True) -> rx.Component
 
 
 
+def load_more_button() -> rx.Component:
+    """Fetch the next page of past and cancelled bookings."""
+    return rx.cond(
+        BookingState.has_more_history,
+        rx.el.div(
+            rx.el.button(
+                "Load more bookings",
+                on_click=BookingState.load_more_bookings,
+                class_name="px-6 py-2.5 rounded-xl bg-white ring-1 ring-gray-200 text-sm font-semibold text-gray-700 hover:ring-gray-400 transition-all",
+            ),
+            class_name="flex justify-center mt-8",
+        ),
+    )
+
+
 def bookings_page() -> rx.Component:
     return rx.el.div(
         navbar(),
@@ -517,8 +532,11 @@ def bookings_page() -> rx.Component:
                         rx.cond(
                             BookingState.past_bookings.length() > 0,
                             rx.el.div(
-                                rx.foreach(BookingState.past_bookings, booking_card),
-                                class_name="grid grid-cols-1 md:grid-cols-2 gap-6"
+                                rx.el.div(
+                                    rx.foreach(BookingState.past_bookings, booking_card),
+                                    class_name="grid grid-cols-1 md:grid-cols-2 gap-6"
+                                ),
+                                load_more_button(),
                             ),
                             empty_state(
                                 "No Past Bookings",
@@ -532,8 +550,11 @@ def bookings_page() -> rx.Component:
                         rx.cond(
                             BookingState.cancelled_bookings.length() > 0,
                             rx.el.div(
-                                rx.foreach(BookingState.cancelled_bookings, booking_card),
-                                class_name="grid grid-cols-1 md:grid-cols-2 gap-6"
+                                rx.el.div(
+                                    rx.foreach(BookingState.cancelled_bookings, booking_card),
+                                    class_name="grid grid-cols-1 md:grid-cols-2 gap-6"
+                                ),
+                                load_more_button(),
                             ),
                             empty_state(
                                 "No Cancelled Bookings",
@@ -2,56 +2,125 @@ import reflex as rx
 from app.components.navbar import navbar
 from app.components.footer import footer
 import asyncio
+import uuid
+from typing import Optional
+
+# Messages kept in state; older ones stay in the persisted history only
+CONTEXT_WINDOW = 50
+# New messages are kept in a short tail list, so each turn re-sends only the tail;
+# once it reaches this size it is folded into messages
+RECENT_MESSAGES_MAX = 10
+
+GREETING_MESSAGE = {"role": "assistant", "content": "Hello! I'm your personal parking assistant. 🚗\n\nI can help you find spots, check prices, or predict availability. What can I do for you today?"}
 
 
 class SimpleChatState(rx.State):
     """Simple chat state for the AI chatbot"""
-    messages: list[dict[str, str]] = [
-        {"role": "assistant", "content": "Hello! I'm your personal parking assistant. 🚗\n\nI can help you find spots, check prices, or predict availability. What can I do for you today?"}
-    ]
+    messages: list[dict[str, str]] = [GREETING_MESSAGE]
+    # This session's newest messages, rendered after messages
+    recent_messages: list[dict[str, str]] = []
     current_message: str = ""
     is_loading: bool = False
+    # Assistant reply being streamed; appended to recent_messages once complete
+    streaming_content: str = ""
+    conversation_id: str = rx.LocalStorage("", name="chat_conversation_id")
+    # User id ("" when signed out) the stored conversation belongs to
+    conversation_owner: str = rx.LocalStorage("", name="chat_conversation_owner")
+    session_token: str = rx.Cookie("", name="session_token")
 
     @rx.event
     async def on_load(self):
-        """Check for query parameter and send message if present"""
+        """Restore recent history, then check for query parameter and send message if present"""
+        user_id = self._current_user_id()
+        self._ensure_owner(user_id)
+        if self.conversation_id and len(self.messages) <= 1 and not self.recent_messages:
+            from app.services import chat_history
+            # Flushing the writer and reading history hit the DB; keep them off the event loop
+            history = await asyncio.get_running_loop().run_in_executor(
+                None, chat_history.load_recent_messages, self.conversation_id, CONTEXT_WINDOW, user_id
+            )
+            if history:
+                self.messages = history
+
         query_params = self.router.page.params
         if "query" in query_params:
             query = query_params["query"]
             # Only send if it's a new query to avoid loops (simple check)
-            if query and (not self.messages or self.messages[-1]["content"] != query):
+            last = (self.recent_messages or self.messages or [{"content": ""}])[-1]
+            if query and last["content"] != query:
                 self.current_message = query
                 return SimpleChatState.send_message
 
+    def _current_user_id(self) -> Optional[int]:
+        """User id from the signed session token; the plain email cookie could be forged."""
+        from app.services import session_service
+        profile = session_service.verify_token(self.session_token)
+        return profile["id"] if profile else None
+
+    def _ensure_owner(self, user_id: Optional[int]):
+        """Start a fresh conversation when the stored one belongs to someone else."""
+        owner = str(user_id) if user_id else ""
+        if self.conversation_owner != owner:
+            self.reset_conversation()
+            self.conversation_owner = owner
+
+    def reset_conversation(self):
+        """Forget the stored conversation and clear the visible messages (e.g. on logout)."""
+        self.conversation_id = ""
+        self.conversation_owner = ""
+        self.messages = [GREETING_MESSAGE]
+        self.recent_messages = []
+
+    def _append(self, role: str, content: str):
+        """Add a message to the tail; a full tail is folded into the window, dropping the oldest beyond CONTEXT_WINDOW."""
+        self.recent_messages.append({"role": role, "content": content})
+        if len(self.recent_messages) >= RECENT_MESSAGES_MAX:
+            self.messages = (self.messages + self.recent_messages)[-CONTEXT_WINDOW:]
+            self.recent_messages = []
+
     @rx.event
     async def send_message(self):
         """Send a message to the AI"""
         if not self.current_message.strip():
             return
         
+        # Import here to avoid circular imports
+        from app.services import chat_history
+        from app.services.ai.chatbot_ai import ParkingChatbot
+
+        user_id = self._current_user_id()
+        self._ensure_owner(user_id)
+        if not self.conversation_id:
+            self.conversation_id = uuid.uuid4().hex
+
         # Add user message
         user_msg = self.current_message
-        self.messages.append({"role": "user", "content": user_msg})
+        self._append("user", user_msg)
+        chat_history.record_message(self.conversation_id, "user", user_msg, user_id=user_id)
         self.current_message = ""
         self.is_loading = True
+        yield
         
-        # Import here to avoid circular imports
-        from app.services.ai.chatbot_ai import ParkingChatbot
-        
-        # Get AI response
+        # Each piece is pushed as soon as the chatbot composes it; only streaming_content changes
+        # until the reply is complete, then it moves to recent_messages
+        response_data = {}
         try:
-            # Simulate a small delay for "thinking" effect if response is too fast
-            await asyncio.sleep(0.5) 
-            response_data = await ParkingChatbot.generate_response(user_msg, user_id=None)
-            response = response_data.get("response", "I'm sorry, I didn't get that.")
-            self.messages.append({"role": "assistant", "content": response})
+            async for piece in ParkingChatbot.stream_response(
+                user_msg, user_id=user_id, conversation_id=self.conversation_id, response_data=response_data
+            ):
+                self.streaming_content += piece
+                yield
+            response = response_data.get("response") or "I'm sorry, I didn't get that."
+            chat_history.record_message(
+                self.conversation_id, "assistant", response,
+                user_id=user_id, intent=response_data.get("intent"),
+            )
         except Exception as e:
-            self.messages.append({
-                "role": "assistant", 
-                "content": f"I'm having a bit of trouble connecting to my brain right now. 🤯\n\nError: {str(e)}"
-            })
+            response = f"I'm having a bit of trouble connecting to my brain right now. 🤯\n\nError: {str(e)}"
         finally:
+            self.streaming_content = ""
             self.is_loading = False
+        self._append("assistant", response)
 
 
 def message_bubble(message: dict) -> rx.Component:
@@ -107,6 +176,27 @@ def message_bubble(message: dict) -> rx.Component:
     )
 
 
+def streaming_bubble() -> rx.Component:
+    """Assistant bubble for the reply that is still streaming in"""
+    return rx.el.div(
+        rx.el.div(
+            rx.el.div(
+                rx.icon("bot", class_name="w-5 h-5 text-white"),
+                class_name="w-8 h-8 rounded-full bg-gradient-to-br from-indigo-500 to-purple-600 flex items-center justify-center shadow-lg shadow-indigo-500/30 mr-3 flex-shrink-0"
+            ),
+            rx.el.div(
+                rx.el.p(
+                    SimpleChatState.streaming_content,
+                    class_name="text-gray-800 leading-relaxed"
+                ),
+                class_name="bg-white border border-gray-100 rounded-2xl rounded-tl-sm px-5 py-3.5 shadow-sm max-w-lg"
+            ),
+            class_name="flex justify-start items-end mb-6 pr-12",
+        ),
+        class_name="w-full"
+    )
+
+
 def chatbot_page() -> rx.Component:
     return rx.el.div(
         navbar(),
@@ -144,9 +234,20 @@ def chatbot_page() -> rx.Component:
                             message_bubble
                         ),
                         
+                        rx.foreach(
+                            SimpleChatState.recent_messages,
+                            message_bubble
+                        ),
+                        
+                        # Reply being streamed
+                        rx.cond(
+                            SimpleChatState.streaming_content != "",
+                            streaming_bubble(),
+                        ),
+
                         # Typing Indicator
                         rx.cond(
-                            SimpleChatState.is_loading,
+                            SimpleChatState.is_loading & (SimpleChatState.streaming_content == ""),
                             rx.el.div(
                                 rx.el.div(
                                     rx.icon("bot", class_name="w-5 h-5 text-white"),
@@ -38,11 +38,14 @@ def search_bar() -> rx.Component:
                     "search",
                     class_name="absolute left-4 top-1/2 transform -translate-y-1/2 h-5 w-5 text-sky-500"
                 ),
-                rx.el.input(
-                    placeholder="Search parking...",
-                    value=ParkingState.search_query,
-                    class_name="w-full pl-12 pr-4 py-3.5 rounded-xl ring-2 ring-gray-200 focus:ring-sky-500 outline-none bg-white",
-                    on_change=ParkingState.set_search_query,
+                rx.debounce_input(
+                    rx.el.input(
+                        placeholder="Search parking...",
+                        value=ParkingState.search_query,
+                        class_name="w-full pl-12 pr-4 py-3.5 rounded-xl ring-2 ring-gray-200 focus:ring-sky-500 outline-none bg-white",
+                        on_change=ParkingState.set_search_query,
+                    ),
+                    debounce_timeout=300,
                 ),
                 class_name="relative flex-1"
             ),
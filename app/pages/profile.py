@@ -111,7 +111,7 @@ def profile_page() -> rx.Component:
                                 ),
                                 stat_card(
                                     "Total Bookings",
-                                    BookingState.bookings.length().to_string(),
+                                    BookingState.booking_count.to_string(),
                                     "ticket",
                                 ),
                                 stat_card(
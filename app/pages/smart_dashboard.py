@@ -1,4 +1,6 @@
 """Smart Dashboard for Auto-Booking and AI Features"""
+import asyncio
+import functools
 import reflex as rx
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -8,6 +10,7 @@ from app.components.navbar import navbar
 from app.states.auth_state import AuthState
 from app.db.models import BookingRule, User, ParkingLot, Booking
 from app.db.models import BookingRule as DBBookingRule, Booking as DBBooking  # Alias for clarity
+from app.services import lot_catalog, rule_engine, session_service
 
 # Pydantic model for UI
 class Rule(rx.Base):
@@ -158,157 +161,26 @@ class SmartDashboardState(rx.State):
 
     @rx.event
     async def process_rules(self):
-        """Process active rules and create bookings if needed"""
+        """Process the user's active rules now (the nightly rule engine covers everyone else)"""
         auth_state = await self.get_state(AuthState)
-        user_email = auth_state.email
-        if not user_email:
+        user_id = session_service.get_user_id(auth_state.email)
+        if not user_id:
             return
 
-        with rx.session() as session:
-            user = session.exec(select(User).where(User.email == user_email)).first()
-            if not user:
-                return
-
-            # Get active rules
-            rules = session.exec(
-                select(DBBookingRule)
-                .where(DBBookingRule.user_id == user.id)
-                .where(DBBookingRule.status == "Active")
-            ).all()
-
-            tomorrow = datetime.now() + timedelta(days=1)
-            tomorrow_day_name = tomorrow.strftime("%a")  # Mon, Tue, etc.
-            tomorrow_date_str = tomorrow.strftime("%Y-%m-%d")
-
-            bookings_created = 0
-
-            for rule in rules:
-                # Check if rule applies to tomorrow
-                rule_days = rule.days.split(",")
-                if tomorrow_day_name in rule_days:
-                    # Parse location string "Name - Location"
-                    try:
-                        lot_name, lot_loc = rule.location.split(" - ", 1)
-                        lot = session.exec(
-                            select(ParkingLot)
-                            .where(ParkingLot.name == lot_name)
-                            .where(ParkingLot.location == lot_loc)
-                        ).first()
-                    except ValueError:
-                        continue # Skip if format is wrong
-
-                    if not lot:
-                        continue
-
-                    # Check if booking already exists
-                    existing_booking = session.exec(
-                        select(DBBooking)
-                        .where(DBBooking.user_id == user.id)
-                        .where(DBBooking.lot_id == lot.id)
-                        .where(DBBooking.start_date == tomorrow_date_str)
-                        .where(DBBooking.start_time == rule.time)
-                        .where(DBBooking.status != "Cancelled")
-                    ).first()
-
-                    if not existing_booking:
-                        final_slot_id = rule.slot_id or "A1"
-                        
-                        # Check for slot conflict
-                        conflict_query = select(DBBooking).where(
-                            DBBooking.lot_id == lot.id,
-                            DBBooking.start_date == tomorrow_date_str,
-                            DBBooking.start_time == rule.time,
-                            DBBooking.slot_id == final_slot_id,
-                            DBBooking.status != "Cancelled"
-                        )
-                        slot_conflict = session.exec(conflict_query).first()
-                        
-                        if slot_conflict:
-                            # Smart Slot Substitution
-                            # yield rx.toast.info(f"Slot {final_slot_id} occupied. Finding alternative...")
-                            
-                            # Get all occupied slots for this time block
-                            occupied_query = select(DBBooking.slot_id).where(
-                                DBBooking.lot_id == lot.id,
-                                DBBooking.start_date == tomorrow_date_str,
-                                DBBooking.start_time == rule.time,
-                                DBBooking.status != "Cancelled"
-                            )
-                            occupied_slots = session.exec(occupied_query).all()
-                            
-                            # Standard slots (matching UI)
-                            standard_slots = ["A1", "A2", "A3", "A4", "A5", "B1", "B2", "B3", "B4", "B5"]
-                            
-                            alternative_found = False
-                            for s in standard_slots:
-                                if s not in occupied_slots:
-                                    final_slot_id = s
-                                    alternative_found = True
-                                    break
-                            
-                            if not alternative_found:
-                                yield rx.toast.warning(f"Skipped {rule.location}: All slots full.")
-                                continue
-                            else:
-                                # Prepare notification about change (in real app, send email)
-                                pass
-
-                        # Create Booking
-                        duration = int(rule.duration.split(" ")[0])
-                        total_price = lot.price_per_hour * duration
-                        
-                        new_booking = DBBooking(
-                            lot_id=lot.id,
-                            user_id=user.id,
-                            start_date=tomorrow_date_str,
-                            start_time=rule.time,
-                            duration_hours=duration,
-                            total_price=total_price,
-                            status="Confirmed",
-                            payment_status="Paid (Auto)",
-                            created_at=datetime.now(),
-                            slot_id=final_slot_id,
-                            vehicle_number=rule.vehicle_number or "AUTO-CAR",
-                            phone_number=rule.phone_number or user.phone or "N/A"
-                        )
-                        session.add(new_booking)
-                        
-                        # Update rule next run
-                        rule.next_run = (tomorrow + timedelta(days=1)).strftime("%Y-%m-%d")
-                        session.add(rule)
-                        
-                        bookings_created += 1
-                        
-                        # Prepare email notification
-                        try:
-                            from app.services.email_service import send_booking_confirmation_email
-                            booking_details = {
-                                "user_name": user.full_name or "User",
-                                "lot_name": lot.name,
-                                "start_date": tomorrow_date_str,
-                                "start_time": rule.time,
-                                "duration": duration,
-                                "slot_id": final_slot_id,
-                                "vehicle_number": rule.vehicle_number or "AUTO-CAR",
-                                "total_price": total_price,
-                                "payment_status": "Paid (Auto)"
-                            }
-                            # Send immediately (safe enough for now, ideally background task)
-                            send_booking_confirmation_email(user.email, booking_details)
-                        except Exception as e:
-                            print(f"Failed to queue email: {e}")
-            
-            if bookings_created > 0:
-                session.commit()
-                yield rx.toast.success(f"Auto-booked {bookings_created} spots for tomorrow!")
+        # run_rules is synchronous and DB-bound; keep it off the event loop shared by every client
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(rule_engine.run_rules, user_id=user_id)
+        )
+        for location in result.full:
+            yield rx.toast.warning(f"Skipped {location}: All slots full.")
+        if result.created > 0:
+            yield rx.toast.success(f"Auto-booked {result.created} spots for tomorrow!")
 
     
     @rx.event
     async def load_locations(self):
-        """Fetch available parking locations from DB"""
-        with rx.session() as session:
-            lots = session.exec(select(ParkingLot)).all()
-            self.available_locations = [f"{lot.name} - {lot.location}" for lot in lots]
+        """Fetch available parking locations from the lot catalog"""
+        self.available_locations = [f"{lot.name} - {lot.location}" for lot in lot_catalog.get_lots()]
         
     @rx.event
     async def load_rules(self):
@@ -514,6 +386,9 @@ class SmartDashboardState(rx.State):
                 return
 
             days_str = ",".join(self.form_days)
+            days_mask = rule_engine.days_to_mask(self.form_days)
+            lot = rule_engine.resolve_rule_lot(self.form_location)
+            lot_id = lot.id if lot else None
             duration_str = f"{self.form_duration} hour{'s' if int(self.form_duration) > 1 else ''}"
             
             if self.is_editing:
@@ -521,6 +396,8 @@ class SmartDashboardState(rx.State):
                 if rule:
                     rule.location = self.form_location
                     rule.days = days_str
+                    rule.days_mask = days_mask
+                    rule.lot_id = lot_id
                     rule.time = self.form_time
                     rule.duration = duration_str
                     rule.vehicle_number = self.form_vehicle
@@ -531,6 +408,8 @@ class SmartDashboardState(rx.State):
                 new_rule = DBBookingRule(
                     location=self.form_location,
                     days=days_str,
+                    days_mask=days_mask,
+                    lot_id=lot_id,
                     time=self.form_time,
                     duration=duration_str,
                     vehicle_number=self.form_vehicle,
@@ -5,12 +5,14 @@ Detects user booking patterns and suggests/auto-books parking spots
 
 import reflex as rx
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 import json
 from collections import defaultdict
 from sqlmodel import select
 from app.db.models import Booking, User, ParkingLot
 from app.db.ai_models import AutoBookingSetting
+from app.services import lot_catalog, slot_allocator
+from app.services.ai.pattern_detector import default_detector
 
 
 class AutoBookingAgent:
@@ -20,7 +22,7 @@ class AutoBookingAgent:
     def detect_booking_patterns(user_id: int) -> Dict:
         """
         Analyze user's booking history to detect patterns
-        Returns patterns by day of week and time
+        Returns patterns by day of week and time, read from the streaming pattern detector
         """
         patterns = {
             "weekly_patterns": {},  # day_of_week -> {time, duration, lot_id}
@@ -30,98 +32,18 @@ class AutoBookingAgent:
         }
 
         try:
-            with rx.session() as session:
-                # Get last 3 months of bookings
-                cutoff_date = datetime.utcnow() - timedelta(days=90)
-                bookings = session.exec(
-                    select(Booking)
-                    .where(
-                        Booking.user_id == user_id,
-                        Booking.created_at >= cutoff_date
-                    )
-                    .order_by(Booking.created_at.desc())
-                ).all()
-
-                if len(bookings) < 3:
-                    return patterns
-
-                # Group bookings by day of week
-                day_bookings = defaultdict(list)
-                all_durations = []
-                location_counts = defaultdict(int)
-
-                for booking in bookings:
-                    try:
-                        # Parse booking date
-                        booking_date = datetime.strptime(booking.start_date, "%Y-%m-%d")
-                        day_of_week = booking_date.strftime("%A").lower()
-                        
-                        day_bookings[day_of_week].append({
-                            "time": booking.start_time,
-                            "duration": booking.duration_hours,
-                            "lot_id": booking.lot_id
-                        })
-                        
-                        all_durations.append(booking.duration_hours)
-                        
-                        lot = session.get(ParkingLot, booking.lot_id)
-                        if lot:
-                            location_counts[booking.lot_id] += 1
-
-                    except Exception as e:
-                        print(f"Error parsing booking: {e}")
-                        continue
-
-                # Detect patterns for each day
-                for day, day_bookings_list in day_bookings.items():
-                    if len(day_bookings_list) >= 2:  # Need at least 2 bookings to detect pattern
-                        # Find most common time and duration
-                        time_counts = defaultdict(int)
-                        duration_counts = defaultdict(int)
-                        lot_counts = defaultdict(int)
-
-                        for booking in day_bookings_list:
-                            # Group similar times (within 30 min)
-                            time_hour = booking["time"].split(":")[0] if ":" in booking["time"] else booking["time"]
-                            time_counts[time_hour] += 1
-                            duration_counts[booking["duration"]] += 1
-                            lot_counts[booking["lot_id"]] += 1
-
-                        # Get most common values
-                        most_common_time = max(time_counts.items(), key=lambda x: x[1])
-                        most_common_duration = max(duration_counts.items(), key=lambda x: x[1])
-                        most_common_lot = max(lot_counts.items(), key=lambda x: x[1])
-
-                        # Only add if pattern appears at least twice
-                        if most_common_time[1] >= 2:
-                            patterns["weekly_patterns"][day] = {
-                                "time": f"{most_common_time[0]}:00",
-                                "duration": most_common_duration[0],
-                                "lot_id": most_common_lot[0],
-                                "frequency": most_common_time[1]
-                            }
-
-                # Calculate typical duration
-                if all_durations:
-                    patterns["typical_duration"] = int(sum(all_durations) / len(all_durations))
-
-                # Get recurring locations (appears in 30%+ of bookings)
-                total_bookings = len(bookings)
-                patterns["recurring_locations"] = [
-                    lot_id for lot_id, count in location_counts.items()
-                    if count / total_bookings >= 0.3
-                ]
-
-                # Calculate confidence (0.0 to 1.0)
-                pattern_count = len(patterns["weekly_patterns"])
-                if pattern_count >= 3:
-                    patterns["confidence"] = 0.9
-                elif pattern_count >= 2:
-                    patterns["confidence"] = 0.7
-                elif pattern_count >= 1:
-                    patterns["confidence"] = 0.5
-                else:
-                    patterns["confidence"] = 0.0
+            patterns.update(default_detector.summary(user_id))
+
+            # Calculate confidence (0.0 to 1.0)
+            pattern_count = len(patterns["weekly_patterns"])
+            if pattern_count >= 3:
+                patterns["confidence"] = 0.9
+            elif pattern_count >= 2:
+                patterns["confidence"] = 0.7
+            elif pattern_count >= 1:
+                patterns["confidence"] = 0.5
+            else:
+                patterns["confidence"] = 0.0
 
         except Exception as e:
             print(f"Error detecting booking patterns: {e}")
@@ -178,118 +100,157 @@ class AutoBookingAgent:
             return False
 
     @staticmethod
-    async def get_auto_booking_suggestions(user_id: int) -> List[Dict]:
+    def get_bulk_auto_booking_suggestions(
+        user_ids: Optional[Iterable[int]] = None,
+        days: int = 7,
+        auto_confirm_only: bool = False
+    ) -> Dict[int, List[Dict]]:
         """
-        Get auto-booking suggestions for the user based on patterns
-        Returns list of suggested bookings
+        Auto-booking suggestions for many users over the next `days` days
+        Patterns come from the pattern detector; existing bookings for every user and day
+        are checked with a single query. Returns user_id -> list of suggested bookings
         """
-        suggestions = []
+        suggestions = defaultdict(list)
 
         try:
             with rx.session() as session:
-                # Get user's auto-booking settings
-                settings = session.exec(
-                    select(AutoBookingSetting).where(AutoBookingSetting.user_id == user_id)
-                ).first()
-
-                if not settings or not settings.enabled:
-                    return suggestions
-
-                # Parse patterns
-                if not settings.schedule_patterns:
+                query = select(AutoBookingSetting.user_id, AutoBookingSetting.max_price_threshold).where(
+                    AutoBookingSetting.enabled == True
+                )
+                if user_ids is not None:
+                    query = query.where(AutoBookingSetting.user_id.in_(list(user_ids)))
+                if auto_confirm_only:
+                    query = query.where(AutoBookingSetting.auto_confirm == True)
+                thresholds = dict(session.exec(query).all())
+                if not thresholds:
                     return suggestions
 
-                patterns = json.loads(settings.schedule_patterns)
+                # (user, day, pattern) for every enabled user with a pattern on each upcoming day
                 current_date = datetime.now()
-
-                # Check next 7 days for pattern matches
-                for i in range(7):
+                candidates = []
+                for i in range(days):
                     check_date = current_date + timedelta(days=i)
-                    day_name = check_date.strftime("%A").lower()
-
-                    if day_name in patterns:
-                        pattern = patterns[day_name]
-                        
-                        # Check if there's already a booking for this day
-                        existing_booking = session.exec(
-                            select(Booking).where(
-                                Booking.user_id == user_id,
-                                Booking.start_date == check_date.strftime("%Y-%m-%d"),
-                                Booking.status != "Cancelled"
-                            )
-                        ).first()
-
-                        if existing_booking:
-                            continue  # Skip if already booked
-
-                        # Get the parking lot
-                        lot = session.get(ParkingLot, pattern["lot_id"])
-                        if not lot or lot.available_spots <= 0:
-                            continue
-
-                        # Check price threshold
-                        if settings.max_price_threshold:
-                            total_price = lot.price_per_hour * pattern["duration"]
-                            if total_price > settings.max_price_threshold:
-                                continue
-
-                        # Add suggestion
-                        suggestions.append({
-                            "date": check_date.strftime("%Y-%m-%d"),
-                            "day": day_name.capitalize(),
-                            "time": pattern["time"],
-                            "duration": pattern["duration"],
-                            "lot_id": lot.id,
-                            "lot_name": lot.name,
-                            "lot_location": lot.location,
-                            "price_per_hour": lot.price_per_hour,
-                            "total_price": lot.price_per_hour * pattern["duration"],
-                            "confidence": "High" if pattern["frequency"] >= 3 else "Medium",
-                            "reason": f"You usually park here on {day_name.capitalize()}s at {pattern['time']}"
-                        })
+                    for user_id, pattern in default_detector.patterns_for(thresholds, check_date.weekday()).items():
+                        candidates.append((user_id, check_date, pattern))
+                if not candidates:
+                    return suggestions
+
+                # One set-based lookup of the (user, date) pairs that already have a booking
+                booked = set(session.exec(
+                    select(Booking.user_id, Booking.start_date).where(
+                        Booking.user_id.in_(list({user_id for user_id, _, _ in candidates})),
+                        Booking.start_date.in_(list({d.strftime("%Y-%m-%d") for _, d, _ in candidates})),
+                        Booking.status != "Cancelled"
+                    ).distinct()
+                ).all())
+
+            for user_id, check_date, pattern in candidates:
+                date_str = check_date.strftime("%Y-%m-%d")
+                if (user_id, date_str) in booked:
+                    continue  # Skip if already booked
+
+                lot = lot_catalog.get_lot(pattern.lot_id)
+                if not lot or not lot.is_active or lot.available_spots <= 0:
+                    continue
+
+                # Check price threshold
+                total_price = lot.price_per_hour * pattern.duration
+                if thresholds[user_id] and total_price > thresholds[user_id]:
+                    continue
+
+                day_name = check_date.strftime("%A")
+                suggestions[user_id].append({
+                    "date": date_str,
+                    "day": day_name,
+                    "time": pattern.time,
+                    "duration": pattern.duration,
+                    "lot_id": lot.id,
+                    "lot_name": lot.name,
+                    "lot_location": lot.location,
+                    "price_per_hour": lot.price_per_hour,
+                    "total_price": total_price,
+                    "confidence": "High" if pattern.frequency >= 3 else "Medium",
+                    "reason": f"You usually park here on {day_name}s at {pattern.time}"
+                })
 
         except Exception as e:
-            print(f"Error getting auto-booking suggestions: {e}")
+            print(f"Error getting bulk auto-booking suggestions: {e}")
 
         return suggestions
 
     @staticmethod
-    async def execute_auto_booking(suggestion: Dict, user_id: int) -> Optional[int]:
+    async def get_auto_booking_suggestions(user_id: int) -> List[Dict]:
         """
-        Execute an auto-booking based on a suggestion
-        Returns booking_id if successful, None otherwise
+        Get auto-booking suggestions for the user based on patterns
+        Returns list of suggested bookings
         """
-        try:
-            with rx.session() as session:
-                # Verify lot availability
-                lot = session.get(ParkingLot, suggestion["lot_id"])
-                if not lot or lot.available_spots <= 0:
-                    return None
-
-                # Create booking
-                new_booking = Booking(
-                    user_id=user_id,
-                    lot_id=suggestion["lot_id"],
-                    start_date=suggestion["date"],
-                    start_time=suggestion["time"],
-                    duration_hours=suggestion["duration"],
-                    total_price=suggestion["total_price"],
-                    status="Confirmed",
-                    payment_status="Pending"
-                )
+        return AutoBookingAgent.get_bulk_auto_booking_suggestions([user_id]).get(user_id, [])
 
-                # Update lot availability
-                lot.available_spots -= 1
+    @staticmethod
+    def execute_auto_bookings(items: List[Tuple[int, Dict, Optional[str]]]) -> List[Optional[int]]:
+        """
+        Create bookings for (user_id, suggestion, slot_id) items in one transaction
+        Lots without enough free spots fill what they can; returns booking ids (None where skipped)
+        """
+        results: List[Optional[int]] = [None] * len(items)
+        if not items:
+            return results
 
-                session.add(new_booking)
+        try:
+            with rx.session() as session:
+                lots = {
+                    lot.id: lot for lot in session.exec(
+                        select(ParkingLot).where(ParkingLot.id.in_(list({s["lot_id"] for _, s, _ in items})))
+                    ).all()
+                }
+
+                created = []
+                for index, (user_id, suggestion, slot_id) in enumerate(items):
+                    lot = lots.get(suggestion["lot_id"])
+                    if not lot or not lot.is_active or lot.available_spots <= 0:
+                        continue
+                    lot.available_spots -= 1
+                    created.append((index, Booking(
+                        user_id=user_id,
+                        lot_id=lot.id,
+                        start_date=suggestion["date"],
+                        start_time=suggestion["time"],
+                        duration_hours=suggestion["duration"],
+                        total_price=suggestion["total_price"],
+                        status="Confirmed",
+                        payment_status="Pending",
+                        slot_id=slot_id
+                    )))
+
+                if not created:
+                    return results
+
+                session.add_all([booking for _, booking in created])
+                session.add_all(lots.values())
+                # Read ids and counts before commit expires the objects
+                session.flush()
+                booking_ids = [(index, booking.id) for index, booking in created]
+                available = {lot.id: lot.available_spots for lot in lots.values()}
                 session.commit()
-                session.refresh(new_booking)
 
-                return new_booking.id
+                for index, booking_id in booking_ids:
+                    results[index] = booking_id
+                for lot_id, available_spots in available.items():
+                    lot_catalog.set_available_spots(lot_id, available_spots)
 
         except Exception as e:
-            print(f"Error executing auto-booking: {e}")
-            return None
+            print(f"Error executing auto-bookings: {e}")
+            return [None] * len(items)
+
+        return results
+
+    @staticmethod
+    async def execute_auto_booking(suggestion: Dict, user_id: int, slot_id: Optional[str] = None) -> Optional[int]:
+        """
+        Execute an auto-booking based on a suggestion, in the given slot if one was allocated
+        Returns booking_id if successful, None otherwise
+        """
+        return AutoBookingAgent.execute_auto_bookings([(user_id, suggestion, slot_id)])[0]
 
     @staticmethod
     async def check_and_execute_auto_bookings():
@@ -300,33 +261,53 @@ class AutoBookingAgent:
         executed_bookings = []
 
         try:
+            # Tomorrow's suggestions for every auto-confirm user in one pass
+            tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            pending = [
+                (user_id, suggestion)
+                for user_id, user_suggestions in AutoBookingAgent.get_bulk_auto_booking_suggestions(
+                    days=2, auto_confirm_only=True
+                ).items()
+                for suggestion in user_suggestions
+                if suggestion["date"] == tomorrow
+            ]
+            if not pending:
+                return executed_bookings
+
             with rx.session() as session:
-                # Get all users with auto-booking enabled and auto-confirm on
-                settings_list = session.exec(
-                    select(AutoBookingSetting).where(
-                        AutoBookingSetting.enabled == True,
-                        AutoBookingSetting.auto_confirm == True
+                # Assign slots per lot in one pass against tomorrow's existing bookings
+                demands = defaultdict(list)
+                for key, (user_id, suggestion) in enumerate(pending):
+                    start = slot_allocator.to_minutes(suggestion["time"])
+                    demands[suggestion["lot_id"]].append(
+                        slot_allocator.SlotDemand(key, start, start + suggestion["duration"] * 60)
                     )
-                ).all()
-
-                for settings in settings_list:
-                    suggestions = await AutoBookingAgent.get_auto_booking_suggestions(settings.user_id)
-                    
-                    # Auto-book suggestions for tomorrow
-                    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-                    for suggestion in suggestions:
-                        if suggestion["date"] == tomorrow:
-                            booking_id = await AutoBookingAgent.execute_auto_booking(
-                                suggestion,
-                                settings.user_id
-                            )
-                            
-                            if booking_id:
-                                executed_bookings.append({
-                                    "user_id": settings.user_id,
-                                    "booking_id": booking_id,
-                                    "suggestion": suggestion
-                                })
+                occupancy = slot_allocator.load_occupancy(session, tomorrow, demands)
+
+            assigned = {}
+            for lot_id, lot_demands in demands.items():
+                lot = lot_catalog.get_lot(lot_id)
+                if not lot or not lot.is_active:
+                    continue
+                allocation = slot_allocator.allocate(lot_demands, lot.total_spots, occupancy[lot_id])
+                assigned.update(allocation.assigned)
+                if allocation.unmet:
+                    print(f"Auto-booking: {len(allocation.unmet)} suggestions unmet at lot {lot_id} (no free slot)")
+
+            # Insert every allocated booking in one transaction
+            items = [
+                (key, (user_id, suggestion, assigned[key]))
+                for key, (user_id, suggestion) in enumerate(pending)
+                if key in assigned
+            ]
+            booking_ids = AutoBookingAgent.execute_auto_bookings([item for _, item in items])
+            for (_, (user_id, suggestion, _)), booking_id in zip(items, booking_ids):
+                if booking_id:
+                    executed_bookings.append({
+                        "user_id": user_id,
+                        "booking_id": booking_id,
+                        "suggestion": suggestion
+                    })
 
         except Exception as e:
             print(f"Error in auto-booking background job: {e}")
@@ -3,42 +3,82 @@ AI Chatbot Assistant for Parking Bookings
 Uses natural language understanding for parking assistance
 """
 
+import asyncio
+import copy
+import threading
+import time
 import reflex as rx
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Hashable, Iterator, List, Dict, Optional, Tuple
 from sqlmodel import select
-from app.db.models import ParkingLot, Booking, User
+from app.db.models import Booking, User
+from app.services import location_gazetteer, lot_catalog
+from app.services.ai.intent_classifier import INTENT_KEYWORDS, default_classifier
+
+
+# Intents whose answers depend only on the catalog, not on who is asking
+CACHEABLE_INTENTS = {"book", "check_availability", "get_info"}
+RESPONSE_CACHE_TTL_SECONDS = 30.0
+
+
+class ChatResponseCache:
+    """
+    Short-TTL cache of generated responses keyed by (intent, normalized entities).
+    Entries are tagged with the lot catalog version, so any lot or availability
+    change drops them all.
+    """
+
+    def __init__(self, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Dict]] = {}
+        self._version: Optional[int] = None
+
+    def get(self, key: Hashable, version: int) -> Optional[Dict]:
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+                return None
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return copy.deepcopy(entry[1])
+            self._entries.pop(key, None)
+            return None
+
+    def put(self, key: Hashable, version: int, response_data: Dict):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(response_data))
+
+
+response_cache = ChatResponseCache()
 
 
 class ParkingChatbot:
     """AI-powered chatbot for parking assistance"""
 
-    # Intent detection keywords
-    INTENTS = {
-        "book": ["book", "reserve", "parking", "spot", "need", "want"],
-        "check_availability": ["available", "free", "spots", "spaces", "check", "vacancy"],
-        "get_info": ["info", "information", "details", "about", "price", "location", "tell me"],
-        "my_bookings": ["my booking", "my reservation", "show booking", "view booking"],
-        "cancel": ["cancel", "remove", "delete"],
-        "help": ["help", "what can you do", "how", "assist"],
-        "greeting": ["hi", "hello", "hey", "good morning", "good afternoon"]
-    }
+    # Weighted intent keywords (compiled into default_classifier)
+    INTENTS = INTENT_KEYWORDS
 
     @staticmethod
     def detect_intent(user_message: str) -> str:
-        """Simple intent detection"""
-        message_lower = user_message.lower()
-
-        # Check for each intent
-        for intent, keywords in ParkingChatbot.INTENTS.items():
-            if any(keyword in message_lower for keyword in keywords):
-                return intent
-
-        return "unknown"
+        """Detect the intent of a message with the compiled keyword classifier"""
+        return default_classifier.classify(user_message)
 
     @staticmethod
     def extract_location(user_message: str) -> Optional[str]:
         """Extract location from user message"""
+        # Prefer place names known to the gazetteer (typo tolerant)
+        match = location_gazetteer.resolve_lots(user_message)
+        if match.lot_ids:
+            return " ".join(match.terms)
+
         message_lower = user_message.lower()
         
         # Words to exclude from location (generic parking terms)
@@ -69,6 +109,41 @@ class ParkingChatbot:
 
         return None
 
+    @staticmethod
+    def match_lots(location: str, available_only: bool = False, limit: int = 3) -> List:
+        """Find catalog lots for a location, best gazetteer match first"""
+        match = location_gazetteer.resolve_lots(location)
+        if match.lot_ids:
+            lots = [lot for lot in map(lot_catalog.get_lot, match.lot_ids) if lot and lot.is_active]
+        else:
+            # Fall back to a plain substring scan for partial words the gazetteer cannot resolve
+            location = location.lower()
+            lots = [
+                lot for lot in lot_catalog.get_lots()
+                if location in lot.location.lower() or location in lot.name.lower()
+            ]
+        if available_only:
+            lots = [lot for lot in lots if lot.available_spots > 0]
+        return lots[:limit]
+
+    @staticmethod
+    def top_available_lots(limit: int = 5) -> List:
+        """Get the highest rated catalog lots that still have free spots"""
+        lots = [lot for lot in lot_catalog.get_lots() if lot.available_spots > 0]
+        return sorted(lots, key=lambda lot: lot.rating, reverse=True)[:limit]
+
+    @staticmethod
+    def response_cache_key(intent: str, location: Optional[str], user_id: Optional[int]) -> Optional[Tuple]:
+        """Cache key for a shareable response, or None when the answer is personal"""
+        if intent not in CACHEABLE_INTENTS:
+            return None
+        if intent == "check_availability":
+            return (intent, None)
+        # get_info without a place falls back to the user's own bookings
+        if intent == "get_info" and not location and user_id:
+            return None
+        return (intent, " ".join(location.lower().split()) if location else None)
+
     @staticmethod
     async def generate_response(
         user_message: str,
@@ -79,300 +154,316 @@ class ParkingChatbot:
         Generate chatbot response to user message
         Returns: {response, intent, suggestions, actions}
         """
+        response_data = {}
+        async for _ in ParkingChatbot.stream_response(user_message, user_id, conversation_id, response_data):
+            pass
+        return response_data
+
+    @staticmethod
+    async def stream_response(
+        user_message: str,
+        user_id: Optional[int] = None,
+        conversation_id: Optional[str] = None,
+        response_data: Optional[Dict] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the response text piece by piece as it is composed (a header, then each lot or booking),
+        so the first lines can be shown before the rest is built. Composition runs in a worker thread.
+        A passed response_data dict is filled with {response, intent, suggestions, actions} at the end.
+        """
+        if response_data is None:
+            response_data = {}
         intent = ParkingChatbot.detect_intent(user_message)
-        response_data = {
+        response_data.update({
             "response": "",
             "intent": intent,
             "suggestions": [],
             "actions": []
-        }
+        })
+
+        location = ParkingChatbot.extract_location(user_message) if intent in ("book", "get_info") else None
+        # Shared answers are served from the response cache until the catalog changes
+        cache_key = ParkingChatbot.response_cache_key(intent, location, user_id)
+        catalog_version = lot_catalog.get_version()
+        if cache_key:
+            cached = response_cache.get(cache_key, catalog_version)
+            if cached:
+                response_data.update(cached)
+                yield cached["response"]
+                return
 
+        loop = asyncio.get_running_loop()
+        pieces = ParkingChatbot._compose(intent, location, user_id, response_data)
+        parts = []
         try:
-            if intent == "greeting":
-                response_data["response"] = (
-                    "👋 **Hello! I'm your Smart Parking Assistant**\n\n"
-                    "I can help you with:\n"
-                    "• 🅿️ Finding and booking parking spots\n"
-                    "• 📊 Checking availability in real-time\n"
-                    "• ℹ️ Getting parking lot information (price, location, features)\n"
-                    "• 📋 Managing your bookings\n\n"
-                    "**How can I assist you today?**"
-                )
-                response_data["suggestions"] = [
-                    "Find parking near Sunway",
-                    "Check availability",
-                    "Show my bookings"
-                ]
-
-            elif intent == "book":
-                location = ParkingChatbot.extract_location(user_message)
-                
-                if location:
-                    # Search for parking lots matching the location
-                    with rx.session() as session:
-                        lots = session.exec(
-                            select(ParkingLot)
-                            .where(
-                                (ParkingLot.location.contains(location)) | 
-                                (ParkingLot.name.contains(location))
-                            )
-                            .where(ParkingLot.available_spots > 0)
-                            .limit(3)
-                        ).all()
-
-                        if lots:
-                            response_data["response"] = f"🅿️ **I found {len(lots)} available parking lot(s) matching '{location}':**\n\n"
-                            
-                            for i, lot in enumerate(lots, 1):
-                                occupancy = int((lot.total_spots - lot.available_spots) / lot.total_spots * 100) if lot.total_spots > 0 else 0
-                                status = "🟢 Low" if occupancy < 50 else "🟡 Medium" if occupancy < 80 else "🔴 High"
-                                
-                                response_data["response"] += (
-                                    f"**{i}. {lot.name}**\n"
-                                    f"📍 {lot.location}\n"
-                                    f"💰 RM {lot.price_per_hour}/hour\n"
-                                    f"🅿️ {lot.available_spots}/{lot.total_spots} spots available\n"
-                                    f"📊 Occupancy: {status}\n"
-                                    f"⭐ {lot.rating}/5.0\n\n"
-                                )
-                                
-                                response_data["actions"].append({
-                                    "type": "book",
-                                    "lot_id": lot.id,
-                                    "lot_name": lot.name
-                                })
-
-                            response_data["response"] += "**Ready to book?** Go to the [Listings](/listings) page to make a reservation!"
-                            response_data["suggestions"] = ["Tell me more about " + lots[0].name, "Check availability"]
-                        else:
-                            response_data["response"] = (
-                                f"😔 **Sorry, I couldn't find any available parking matching '{location}'.**\n\n"
-                                "Try:\n"
-                                "• Searching for a different area (e.g., 'near Sunway', 'at KLCC')\n"
-                                "• Checking our [all available lots](/listings)"
-                            )
-                            response_data["suggestions"] = ["Show all parking lots", "Check availability"]
+            while True:
+                piece = await loop.run_in_executor(None, next, pieces, None)
+                if piece is None:
+                    break
+                parts.append(piece)
+                yield piece
+        except Exception as e:
+            print(f"Error generating chatbot response: {e}")
+            error = (
+                "😓 **Oops! I encountered an error.**\n\n"
+                "Please try rephrasing your question or contact support if the issue persists."
+            )
+            if parts:
+                error = "\n\n" + error
+            response_data["response"] = "".join(parts) + error
+            yield error
+            return
+
+        response_data["response"] = "".join(parts)
+        if cache_key:
+            response_cache.put(cache_key, catalog_version, response_data)
+
+    @staticmethod
+    def _compose(intent: str, location: Optional[str], user_id: Optional[int], response_data: Dict) -> Iterator[str]:
+        """Yield the response text for an intent in pieces, adding suggestions and actions to response_data"""
+        if intent == "greeting":
+            yield (
+                "👋 **Hello! I'm your Smart Parking Assistant**\n\n"
+                "I can help you with:\n"
+                "• 🅿️ Finding and booking parking spots\n"
+                "• 📊 Checking availability in real-time\n"
+                "• ℹ️ Getting parking lot information (price, location, features)\n"
+                "• 📋 Managing your bookings\n\n"
+                "**How can I assist you today?**"
+            )
+            response_data["suggestions"] = [
+                "Find parking near Sunway",
+                "Check availability",
+                "Show my bookings"
+            ]
+
+        elif intent == "book":
+            if location:
+                # Search for parking lots matching the location
+                lots = ParkingChatbot.match_lots(location, available_only=True, limit=3)
+
+                if lots:
+                    yield f"🅿️ **I found {len(lots)} available parking lot(s) matching '{location}':**\n\n"
+
+                    for i, lot in enumerate(lots, 1):
+                        occupancy = int((lot.total_spots - lot.available_spots) / lot.total_spots * 100) if lot.total_spots > 0 else 0
+                        status = "🟢 Low" if occupancy < 50 else "🟡 Medium" if occupancy < 80 else "🔴 High"
+
+                        yield (
+                            f"**{i}. {lot.name}**\n"
+                            f"📍 {lot.location}\n"
+                            f"💰 RM {lot.price_per_hour}/hour\n"
+                            f"🅿️ {lot.available_spots}/{lot.total_spots} spots available\n"
+                            f"📊 Occupancy: {status}\n"
+                            f"⭐ {lot.rating}/5.0\n\n"
+                        )
+
+                        response_data["actions"].append({
+                            "type": "book",
+                            "lot_id": lot.id,
+                            "lot_name": lot.name
+                        })
+
+                    yield "**Ready to book?** Go to the [Listings](/listings) page to make a reservation!"
+                    response_data["suggestions"] = ["Tell me more about " + lots[0].name, "Check availability"]
                 else:
-                    # No specific location - show top available lots
-                    with rx.session() as session:
-                        lots = session.exec(
-                            select(ParkingLot)
-                            .where(ParkingLot.available_spots > 0)
-                            .order_by(ParkingLot.rating.desc())
-                            .limit(5)
-                        ).all()
-
-                        if lots:
-                            response_data["response"] = "🅿️ **Here are the top available parking lots:**\n\n"
-                            
-                            for i, lot in enumerate(lots, 1):
-                                response_data["response"] += (
-                                    f"**{i}. {lot.name}**\n"
-                                    f"📍 {lot.location}\n"
-                                    f"💰 RM {lot.price_per_hour}/hour | "
-                                    f"🅿️ {lot.available_spots}/{lot.total_spots} spots\n\n"
-                                )
-                            
-                            response_data["response"] += (
-                                "\n💡 **Tip:** For location-specific results, try:\n"
-                                "• 'Find parking near Sunway'\n"
-                                "• 'Book parking at KLCC'\n\n"
-                                "📌 Visit [Listings](/listings) to book your spot!"
-                            )
-                            response_data["suggestions"] = ["Tell me about " + lots[0].name]
-                        else:
-                            response_data["response"] = "😔 **Sorry, all parking lots are currently full.** Please check back later!"
+                    yield (
+                        f"😔 **Sorry, I couldn't find any available parking matching '{location}'.**\n\n"
+                        "Try:\n"
+                        "• Searching for a different area (e.g., 'near Sunway', 'at KLCC')\n"
+                        "• Checking our [all available lots](/listings)"
+                    )
+                    response_data["suggestions"] = ["Show all parking lots", "Check availability"]
+            else:
+                # No specific location - show top available lots
+                lots = ParkingChatbot.top_available_lots(limit=5)
 
+                if lots:
+                    yield "🅿️ **Here are the top available parking lots:**\n\n"
 
-            elif intent == "check_availability":
-                with rx.session() as session:
-                    lots = session.exec(
-                        select(ParkingLot)
-                        .where(ParkingLot.available_spots > 0)
-                        .order_by(ParkingLot.rating.desc())
-                        .limit(5)
-                    ).all()
+                    for i, lot in enumerate(lots, 1):
+                        yield (
+                            f"**{i}. {lot.name}**\n"
+                            f"📍 {lot.location}\n"
+                            f"💰 RM {lot.price_per_hour}/hour | "
+                            f"🅿️ {lot.available_spots}/{lot.total_spots} spots\n\n"
+                        )
 
-                    if lots:
-                        response_data["response"] = "🅿️ **Here are the top parking lots with availability:**\n\n"
-                        
-                        for lot in lots:
-                            availability_percent = (lot.available_spots / lot.total_spots * 100) if lot.total_spots > 0 else 0
-                            status_emoji = "🟢" if availability_percent > 50 else "🟡" if availability_percent > 20 else "🔴"
-                            
-                            response_data["response"] += (
-                                f"{status_emoji} **{lot.name}** - {lot.location}\n"
-                                f"   💰 RM {lot.price_per_hour}/hr | "
-                                f"🅿️ {lot.available_spots}/{lot.total_spots} spots | "
-                                f"⭐ {lot.rating}⭐\n\n"
-                            )
-                        
-                        response_data["response"] += "\n📌 Visit [Listings](/listings) to book your spot!"
-                    else:
-                        response_data["response"] = "😔 **Sorry, all parking lots are currently full.** Please check back later!"
-
-            elif intent == "get_info":
-                # Check if asking about a specific place
-                location = ParkingChatbot.extract_location(user_message)
-                
-                if location:
-                    # Search for the specific lot
-                    with rx.session() as session:
-                        lots = session.exec(
-                            select(ParkingLot)
-                            .where(
-                                (ParkingLot.name.contains(location)) | 
-                                (ParkingLot.location.contains(location))
-                            )
-                            .limit(3)
-                        ).all()
-
-                        if lots:
-                            response_data["response"] = f"ℹ️ **Here's the information about '{location}':**\n\n"
-                            for lot in lots:
-                                features = lot.features.split(",") if lot.features else []
-                                features_text = ", ".join(features[:3]) if features else "Standard features"
-                                
-                                response_data["response"] += (
-                                    f"🏢 **{lot.name}**\n"
-                                    f"📍 Location: {lot.location}\n"
-                                    f"💰 Price: RM {lot.price_per_hour}/hour\n"
-                                    f"🚗 Total Spots: {lot.total_spots}\n"
-                                    f"✅ Available: {lot.available_spots} spots\n"
-                                    f"⭐ Rating: {lot.rating}/5.0\n"
-                                    f"🎯 Features: {features_text}\n\n"
-                                )
-                                response_data["suggestions"].append(f"Book at {lot.name}")
-                            
-                            response_data["response"] += "**Want to book?** Go to [Listings](/listings)!"
-                        else:
-                            response_data["response"] = (
-                                f"😕 **Sorry, I couldn't find any information about '{location}'.**\n\n"
-                                "Try checking the name or browse all lots on the [Listings](/listings) page."
-                            )
-                
-                # Check for user bookings (if logged in)
-                elif user_id:
-                    with rx.session() as session:
-                        bookings = session.exec(
-                            select(Booking)
-                            .where(Booking.user_id == user_id)
-                            .order_by(Booking.created_at.desc())
-                            .limit(3)
-                        ).all()
-
-                        if bookings:
-                            response_data["response"] = "📋 **Your recent bookings:**\n\n"
-                            
-                            for booking in bookings:
-                                lot = session.get(ParkingLot, booking.lot_id)
-                                status_emoji = "✅" if booking.status == "Confirmed" else "⏳" if booking.status == "Pending" else "❌"
-                                
-                                response_data["response"] += (
-                                    f"{status_emoji} **{lot.name if lot else 'Unknown'}**\n"
-                                    f"   📅 {booking.start_date} at {booking.start_time}\n"
-                                    f"   ⏱️ {booking.duration_hours} hours\n"
-                                    f"   💰 RM {booking.total_price}\n"
-                                    f"   📊 Status: {booking.status}\n\n"
-                                )
-                            
-                            response_data["response"] += "\n📌 View all bookings on your [Bookings](/bookings) page!"
-                        else:
-                            response_data["response"] = (
-                                "📋 **You don't have any bookings yet.**\n\n"
-                                "Ready to book your first parking spot? Check out our [available lots](/listings)!"
-                            )
-                            response_data["suggestions"] = ["Find parking near me"]
+                    yield (
+                        "\n💡 **Tip:** For location-specific results, try:\n"
+                        "• 'Find parking near Sunway'\n"
+                        "• 'Book parking at KLCC'\n\n"
+                        "📌 Visit [Listings](/listings) to book your spot!"
+                    )
+                    response_data["suggestions"] = ["Tell me about " + lots[0].name]
                 else:
-                    response_data["response"] = (
-                        "ℹ️ **I can help you with:**\n\n"
-                        "• 🔍 Tell me about specific parking lots (e.g., 'Tell me about Sunway Pyramid')\n"
-                        "• 📋 View your bookings (please log in first)\n"
-                        "• 🅿️ Check availability across all locations\n\n"
-                        "**What would you like to know?**"
+                    yield "😔 **Sorry, all parking lots are currently full.** Please check back later!"
+
+
+        elif intent == "check_availability":
+            lots = ParkingChatbot.top_available_lots(limit=5)
+
+            if lots:
+                yield "🅿️ **Here are the top parking lots with availability:**\n\n"
+
+                for lot in lots:
+                    availability_percent = (lot.available_spots / lot.total_spots * 100) if lot.total_spots > 0 else 0
+                    status_emoji = "🟢" if availability_percent > 50 else "🟡" if availability_percent > 20 else "🔴"
+
+                    yield (
+                        f"{status_emoji} **{lot.name}** - {lot.location}\n"
+                        f"   💰 RM {lot.price_per_hour}/hr | "
+                        f"🅿️ {lot.available_spots}/{lot.total_spots} spots | "
+                        f"⭐ {lot.rating}⭐\n\n"
                     )
 
-            elif intent == "my_bookings":
-                if user_id:
-                    # Same as get_info for bookings
-                    with rx.session() as session:
-                        bookings = session.exec(
-                            select(Booking)
-                            .where(Booking.user_id == user_id)
-                            .order_by(Booking.created_at.desc())
-                        ).all()
-
-                        if bookings:
-                            active = [b for b in bookings if b.status == "Confirmed"]
-                            past = [b for b in bookings if b.status == "Completed"]
-                            
-                            response_data["response"] = f"📋 **Your Booking Summary:**\n\n"
-                            response_data["response"] += f"✅ Active Bookings: {len(active)}\n"
-                            response_data["response"] += f"📁 Past Bookings: {len(past)}\n\n"
-                            
-                            if active:
-                                response_data["response"] += "**Active Bookings:**\n"
-                                for booking in active[:3]:
-                                    lot = session.get(ParkingLot, booking.lot_id)
-                                    response_data["response"] += (
-                                        f"• {lot.name if lot else 'Unknown'} - "
-                                        f"{booking.start_date} at {booking.start_time}\n"
-                                    )
-                            
-                            response_data["response"] += "\n\n📌 View all details on your [Bookings](/bookings) page!"
-                        else:
-                            response_data["response"] = (
-                                "📋 **You don't have any bookings.**\n\n"
-                                "Let's find you a parking spot! [Browse available lots](/listings)."
-                            )
+                yield "\n📌 Visit [Listings](/listings) to book your spot!"
+            else:
+                yield "😔 **Sorry, all parking lots are currently full.** Please check back later!"
+
+        elif intent == "get_info":
+            # Check if asking about a specific place
+            if location:
+                # Search for the specific lot
+                lots = ParkingChatbot.match_lots(location, limit=3)
+
+                if lots:
+                    yield f"ℹ️ **Here's the information about '{location}':**\n\n"
+                    for lot in lots:
+                        features = list(lot.features)
+                        features_text = ", ".join(features[:3]) if features else "Standard features"
+
+                        yield (
+                            f"🏢 **{lot.name}**\n"
+                            f"📍 Location: {lot.location}\n"
+                            f"💰 Price: RM {lot.price_per_hour}/hour\n"
+                            f"🚗 Total Spots: {lot.total_spots}\n"
+                            f"✅ Available: {lot.available_spots} spots\n"
+                            f"⭐ Rating: {lot.rating}/5.0\n"
+                            f"🎯 Features: {features_text}\n\n"
+                        )
+                        response_data["suggestions"].append(f"Book at {lot.name}")
+
+                    yield "**Want to book?** Go to [Listings](/listings)!"
                 else:
-                    response_data["response"] = (
-                        "🔐 **Please log in to view your bookings.**\n\n"
-                        "Visit the [Login](/login) page to access your account."
+                    yield (
+                        f"😕 **Sorry, I couldn't find any information about '{location}'.**\n\n"
+                        "Try checking the name or browse all lots on the [Listings](/listings) page."
                     )
 
-            elif intent == "help":
-                response_data["response"] = (
-                    "🤖 **I'm your Smart Parking Assistant!**\n\n"
-                    "**Here's what I can do:**\n\n"
-                    "🅿️ **Finding Parking**\n"
-                    "   Say: 'Find parking near downtown' or 'I need parking at Central Mall'\n\n"
-                    "📋 **Check Availability**\n"
-                    "   Say: 'Show available spots' or 'What's available?'\n\n"
-                    "ℹ️ **Get Information**\n"
-                    "   Say: 'Tell me about Sunway Pyramid' or 'Show lot prices'\n\n"
-                    "📊 **View Your Bookings**\n"
-                    "   Say: 'Show my bookings' (requires login)\n\n"
-                    "**Just type your question naturally, and I'll help you!** 😊"
+            # Check for user bookings (if logged in)
+            elif user_id:
+                with rx.session() as session:
+                    bookings = session.exec(
+                        select(Booking)
+                        .where(Booking.user_id == user_id)
+                        .order_by(Booking.created_at.desc())
+                        .limit(3)
+                    ).all()
+
+                if bookings:
+                    yield "📋 **Your recent bookings:**\n\n"
+
+                    for booking in bookings:
+                        lot = lot_catalog.get_lot(booking.lot_id)
+                        status_emoji = "✅" if booking.status == "Confirmed" else "⏳" if booking.status == "Pending" else "❌"
+
+                        yield (
+                            f"{status_emoji} **{lot.name if lot else 'Unknown'}**\n"
+                            f"   📅 {booking.start_date} at {booking.start_time}\n"
+                            f"   ⏱️ {booking.duration_hours} hours\n"
+                            f"   💰 RM {booking.total_price}\n"
+                            f"   📊 Status: {booking.status}\n\n"
+                        )
+
+                    yield "\n📌 View all bookings on your [Bookings](/bookings) page!"
+                else:
+                    yield (
+                        "📋 **You don't have any bookings yet.**\n\n"
+                        "Ready to book your first parking spot? Check out our [available lots](/listings)!"
+                    )
+                    response_data["suggestions"] = ["Find parking near me"]
+            else:
+                yield (
+                    "ℹ️ **I can help you with:**\n\n"
+                    "• 🔍 Tell me about specific parking lots (e.g., 'Tell me about Sunway Pyramid')\n"
+                    "• 📋 View your bookings (please log in first)\n"
+                    "• 🅿️ Check availability across all locations\n\n"
+                    "**What would you like to know?**"
                 )
-                response_data["suggestions"] = [
-                    "Find parking near KLCC",
-                    "Check availability",
-                    "Show my bookings"
-                ]
 
+        elif intent == "my_bookings":
+            if user_id:
+                # Same as get_info for bookings
+                with rx.session() as session:
+                    bookings = session.exec(
+                        select(Booking)
+                        .where(Booking.user_id == user_id)
+                        .order_by(Booking.created_at.desc())
+                    ).all()
+
+                if bookings:
+                    active = [b for b in bookings if b.status == "Confirmed"]
+                    past = [b for b in bookings if b.status == "Completed"]
+
+                    yield f"📋 **Your Booking Summary:**\n\n"
+                    yield f"✅ Active Bookings: {len(active)}\n"
+                    yield f"📁 Past Bookings: {len(past)}\n\n"
+
+                    if active:
+                        yield "**Active Bookings:**\n"
+                        for booking in active[:3]:
+                            lot = lot_catalog.get_lot(booking.lot_id)
+                            yield (
+                                f"• {lot.name if lot else 'Unknown'} - "
+                                f"{booking.start_date} at {booking.start_time}\n"
+                            )
+
+                    yield "\n\n📌 View all details on your [Bookings](/bookings) page!"
+                else:
+                    yield (
+                        "📋 **You don't have any bookings.**\n\n"
+                        "Let's find you a parking spot! [Browse available lots](/listings)."
+                    )
             else:
-                response_data["response"] = (
-                    "🤔 **I'm not sure I understood that.**\n\n"
-                    "You can ask me to:\n"
-                    "• 🅿️ Find parking spots\n"
-                    "• 📊 Check availability\n"
-                    "• ℹ️ Get information about parking lots\n"
-                    "• 📋 View your bookings\n"
-                    "• ❓ Type 'help' for more options\n\n"
-                    "**Try asking me something!**"
+                yield (
+                    "🔐 **Please log in to view your bookings.**\n\n"
+                    "Visit the [Login](/login) page to access your account."
                 )
-                response_data["suggestions"] = [
-                    "Find parking",
-                    "Check availability",
-                    "Help"
-                ]
 
-        except Exception as e:
-            print(f"Error generating chatbot response: {e}")
-            response_data["response"] = (
-                "😓 **Oops! I encountered an error.**\n\n"
-                "Please try rephrasing your question or contact support if the issue persists."
+        elif intent == "help":
+            yield (
+                "🤖 **I'm your Smart Parking Assistant!**\n\n"
+                "**Here's what I can do:**\n\n"
+                "🅿️ **Finding Parking**\n"
+                "   Say: 'Find parking near downtown' or 'I need parking at Central Mall'\n\n"
+                "📋 **Check Availability**\n"
+                "   Say: 'Show available spots' or 'What's available?'\n\n"
+                "ℹ️ **Get Information**\n"
+                "   Say: 'Tell me about Sunway Pyramid' or 'Show lot prices'\n\n"
+                "📊 **View Your Bookings**\n"
+                "   Say: 'Show my bookings' (requires login)\n\n"
+                "**Just type your question naturally, and I'll help you!** 😊"
             )
+            response_data["suggestions"] = [
+                "Find parking near KLCC",
+                "Check availability",
+                "Show my bookings"
+            ]
 
-        return response_data
+        else:
+            yield (
+                "🤔 **I'm not sure I understood that.**\n\n"
+                "You can ask me to:\n"
+                "• 🅿️ Find parking spots\n"
+                "• 📊 Check availability\n"
+                "• ℹ️ Get information about parking lots\n"
+                "• 📋 View your bookings\n"
+                "• ❓ Type 'help' for more options\n\n"
+                "**Try asking me something!**"
+            )
+            response_data["suggestions"] = [
+                "Find parking",
+                "Check availability",
+                "Help"
+            ]
@@ -0,0 +1,106 @@
+"""
+Compiled Intent Classifier
+Single-pass, word-boundary keyword matcher with weighted intent scoring
+"""
+
+import string
+from typing import Dict, List, Tuple
+
+# Keyword weights per intent. Longer phrases are matched before the words they contain,
+# so "my booking" scores for my_bookings rather than book.
+INTENT_KEYWORDS: Dict[str, Dict[str, float]] = {
+    "my_bookings": {
+        "my booking": 3.0, "my bookings": 3.0, "my reservation": 3.0, "my reservations": 3.0,
+        "show booking": 3.0, "show bookings": 3.0, "view booking": 3.0, "view bookings": 3.0,
+        "booking history": 3.0, "upcoming bookings": 3.0,
+    },
+    "cancel": {
+        "cancel": 3.5, "cancellation": 3.5, "refund": 2.0, "remove": 1.5, "delete": 1.5,
+    },
+    "check_availability": {
+        "available": 2.0, "availability": 2.5, "free": 1.5, "spots": 1.0, "spaces": 1.0,
+        "check": 1.0, "vacancy": 2.0, "vacant": 2.0, "full": 1.0, "how many": 1.5,
+        "any space": 2.0, "any spots": 2.0,
+    },
+    "book": {
+        "book": 2.5, "reserve": 2.5, "reservation": 1.5, "find parking": 2.5, "find": 1.0,
+        "need": 1.0, "want": 1.0, "looking for": 1.0, "spot": 0.75, "parking": 0.5,
+    },
+    "get_info": {
+        "info": 2.0, "information": 2.0, "details": 2.0, "about": 1.0, "price": 2.0,
+        "prices": 2.0, "cost": 2.0, "rate": 1.5, "rates": 1.5, "location": 1.0,
+        "tell me": 1.5, "features": 2.0, "rating": 1.5, "how much": 2.0, "where is": 1.5,
+    },
+    "help": {
+        "help": 3.0, "what can you do": 3.0, "how do i": 2.0, "how to": 1.5, "assist": 2.0,
+        "support": 1.5,
+    },
+    "greeting": {
+        "hi": 1.0, "hello": 1.0, "hey": 1.0, "good morning": 1.0, "good afternoon": 1.0,
+        "good evening": 1.0,
+    },
+}
+
+
+# Everything that is not part of a word is a separator, as with a regex \b
+_SEPARATORS = str.maketrans({char: " " for char in string.punctuation + "\u2018\u2019\u201c\u201d\u2026\u2013\u2014\u00a1\u00bf"})
+
+
+class IntentClassifier:
+    """
+    Indexes every keyword phrase by its first word. classify() splits the message into
+    words once and makes a single pass: a word that starts no phrase costs one dict lookup,
+    and where phrases do start, the longest one that matches is taken and its words skipped.
+    Weights are summed per intent and the best scoring intent wins; ties go to the intent listed first.
+    """
+
+    def __init__(self, keywords: Dict[str, Dict[str, float]], default: str = "unknown"):
+        self.default = default
+        self.priority = {intent: rank for rank, intent in enumerate(keywords)}
+        # first word -> [(words after the first, intent, weight)], longest phrase first
+        self.starts: Dict[str, List[Tuple[List[str], str, float]]] = {}
+        seen = set()
+        for intent, phrases in keywords.items():
+            for phrase, weight in phrases.items():
+                words = phrase.lower().translate(_SEPARATORS).split()
+                if not words or tuple(words) in seen:
+                    continue
+                seen.add(tuple(words))
+                self.starts.setdefault(words[0], []).append((words[1:], intent, weight))
+        for candidates in self.starts.values():
+            candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+
+    def scores(self, message: str) -> Dict[str, float]:
+        """Summed keyword weights per intent for a message."""
+        totals: Dict[str, float] = {}
+        starts = self.starts
+        words = message.lower().translate(_SEPARATORS).split()
+        i, count = 0, len(words)
+        while i < count:
+            candidates = starts.get(words[i])
+            i += 1
+            if candidates is None:
+                continue
+            for rest, intent, weight in candidates:
+                if not rest or words[i:i + len(rest)] == rest:
+                    totals[intent] = totals.get(intent, 0.0) + weight
+                    i += len(rest)
+                    break
+        return totals
+
+    def classify(self, message: str) -> str:
+        """Best scoring intent for a message, or the default when nothing matches."""
+        totals = self.scores(message)
+        if not totals:
+            return self.default
+        if len(totals) == 1:
+            for intent in totals:
+                return intent
+        priority = self.priority
+        return max(totals, key=lambda intent: (totals[intent], -priority[intent]))
+
+    def classify_many(self, messages: List[str]) -> List[str]:
+        return [self.classify(message) for message in messages]
+
+
+default_classifier = IntentClassifier(INTENT_KEYWORDS)
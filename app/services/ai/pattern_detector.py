@@ -0,0 +1,225 @@
+"""
+Booking Pattern Detector
+Streaming per-user (weekday, hour, lot) histograms with exponential decay
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import reflex as rx
+from dotenv import load_dotenv
+from sqlmodel import select
+from app.db.models import Booking
+
+load_dotenv()
+
+# A booking's weight halves every this many days
+PATTERN_HALF_LIFE_DAYS = float(os.getenv("PATTERN_HALF_LIFE_DAYS", "30"))
+# Histograms are rebuilt from the database this often, picking up bookings made by other workers
+PATTERN_REBUILD_HOURS = float(os.getenv("PATTERN_REBUILD_HOURS", "6"))
+PATTERN_HISTORY_DAYS = 90
+# A (weekday, hour, lot) cell needs this many bookings before it counts as a pattern
+MIN_PATTERN_BOOKINGS = 2
+
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Forward decay: each booking is added with weight 2^(days since _EPOCH / half-life). Older cells
+# never need rescaling, and ratios between cells (confidence) are the same as with decayed weights.
+_EPOCH = date(2024, 1, 1)
+
+CellKey = Tuple[int, int, int]  # (weekday, hour, lot_id)
+
+
+class Pattern(NamedTuple):
+    weekday: int
+    hour: int
+    lot_id: int
+    duration: int
+    frequency: int
+    confidence: float  # share of the weekday's decayed booking weight in this cell
+
+    @property
+    def time(self) -> str:
+        return f"{self.hour:02d}:00"
+
+
+class _Cell:
+    __slots__ = ("weight", "count", "durations")
+
+    def __init__(self):
+        self.weight = 0.0
+        self.count = 0
+        self.durations: Dict[int, float] = defaultdict(float)
+
+
+class _UserHistogram:
+    """One user's cells plus running per-weekday totals and leaders, so lookups are O(1)."""
+
+    __slots__ = ("cells", "day_weight", "best")
+
+    def __init__(self):
+        self.cells: Dict[CellKey, _Cell] = {}
+        self.day_weight = [0.0] * 7
+        self.best: List[Optional[CellKey]] = [None] * 7
+
+    def add(self, key: CellKey, duration: int, weight: float):
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = _Cell()
+        cell.weight += weight
+        cell.count += 1
+        cell.durations[duration] += weight
+        weekday = key[0]
+        self.day_weight[weekday] += weight
+        # Weights only grow, so the leader can only be overtaken by the cell just updated
+        leader = self.best[weekday]
+        if leader is None or cell.weight > self.cells[leader].weight:
+            self.best[weekday] = key
+
+    def pattern(self, weekday: int) -> Optional[Pattern]:
+        key = self.best[weekday]
+        if key is None:
+            return None
+        cell = self.cells[key]
+        if cell.count < MIN_PATTERN_BOOKINGS:
+            return None
+        duration = max(cell.durations.items(), key=lambda item: item[1])[0]
+        return Pattern(weekday, key[1], key[2], duration, cell.count, cell.weight / self.day_weight[weekday])
+
+
+class PatternDetector:
+    """
+    Consumes booking events and keeps decayed histograms for every user in memory.
+    The first lookup (and one every PATTERN_REBUILD_HOURS) rebuilds them from the last
+    PATTERN_HISTORY_DAYS of bookings in a single query; in between, call observe() as bookings are made.
+    """
+
+    def __init__(self, half_life_days: float = PATTERN_HALF_LIFE_DAYS,
+                 rebuild_hours: float = PATTERN_REBUILD_HOURS):
+        self.half_life_days = half_life_days
+        self.rebuild_seconds = rebuild_hours * 3600
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._users: Dict[int, _UserHistogram] = {}
+        self._built_at: Optional[float] = None
+
+    def _weight(self, day: date) -> float:
+        return 2.0 ** ((day - _EPOCH).days / self.half_life_days)
+
+    @staticmethod
+    def _parse(start_date: str, start_time: str) -> Tuple[date, int]:
+        return date.fromisoformat(start_date), int(start_time.split(":")[0])
+
+    def observe(self, user_id: int, start_date: str, start_time: str, lot_id: int, duration_hours: int):
+        """Add one booking event. Malformed dates or times are ignored."""
+        try:
+            day, hour = self._parse(start_date, start_time)
+        except (ValueError, AttributeError):
+            return
+        with self._lock:
+            histogram = self._users.get(user_id)
+            if histogram is None:
+                histogram = self._users[user_id] = _UserHistogram()
+            histogram.add((day.weekday(), hour, lot_id), duration_hours, self._weight(day))
+
+    def observe_booking(self, booking: Booking):
+        self.observe(booking.user_id, booking.start_date, booking.start_time,
+                     booking.lot_id, booking.duration_hours)
+
+    def rebuild(self):
+        """Replace every histogram with one built from recent bookings."""
+        with self._rebuild_lock:
+            cutoff = datetime.utcnow() - timedelta(days=PATTERN_HISTORY_DAYS)
+            with rx.session() as session:
+                rows = session.exec(
+                    select(Booking.user_id, Booking.start_date, Booking.start_time,
+                           Booking.lot_id, Booking.duration_hours)
+                    .where(Booking.created_at >= cutoff)
+                ).all()
+
+            users: Dict[int, _UserHistogram] = {}
+            weights: Dict[str, float] = {}
+            for user_id, start_date, start_time, lot_id, duration_hours in rows:
+                try:
+                    day, hour = self._parse(start_date, start_time)
+                except (ValueError, AttributeError):
+                    continue
+                weight = weights.get(start_date)
+                if weight is None:
+                    weight = weights[start_date] = self._weight(day)
+                histogram = users.get(user_id)
+                if histogram is None:
+                    histogram = users[user_id] = _UserHistogram()
+                histogram.add((day.weekday(), hour, lot_id), duration_hours, weight)
+
+            with self._lock:
+                self._users = users
+                self._built_at = time.monotonic()
+            logging.info(f"PatternDetector: Rebuilt {len(users)} users from {len(rows)} bookings")
+
+    def _ensure_built(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.rebuild_seconds:
+            self.rebuild()
+
+    def pattern(self, user_id: int, weekday: int) -> Optional[Pattern]:
+        """The user's strongest (hour, lot) on a weekday (0 = Monday), if it qualifies as a pattern."""
+        self._ensure_built()
+        with self._lock:
+            histogram = self._users.get(user_id)
+            return histogram.pattern(weekday) if histogram else None
+
+    def confidence(self, user_id: int, weekday: int) -> float:
+        pattern = self.pattern(user_id, weekday)
+        return pattern.confidence if pattern else 0.0
+
+    def patterns_for(self, user_ids: Iterable[int], weekday: int) -> Dict[int, Pattern]:
+        """Patterns for many users on one weekday, in a single pass under one lock."""
+        self._ensure_built()
+        found = {}
+        with self._lock:
+            for user_id in user_ids:
+                histogram = self._users.get(user_id)
+                pattern = histogram.pattern(weekday) if histogram else None
+                if pattern:
+                    found[user_id] = pattern
+        return found
+
+    def summary(self, user_id: int) -> Dict:
+        """Weekly patterns plus lot and duration statistics, in detect_booking_patterns' format."""
+        self._ensure_built()
+        summary = {"weekly_patterns": {}, "recurring_locations": [], "typical_duration": None}
+        with self._lock:
+            histogram = self._users.get(user_id)
+            if histogram is None:
+                return summary
+            for weekday in range(7):
+                pattern = histogram.pattern(weekday)
+                if pattern:
+                    summary["weekly_patterns"][DAY_NAMES[weekday]] = {
+                        "time": pattern.time,
+                        "duration": pattern.duration,
+                        "lot_id": pattern.lot_id,
+                        "frequency": pattern.frequency,
+                        "confidence": round(pattern.confidence, 3),
+                    }
+            lot_weight: Dict[int, float] = defaultdict(float)
+            duration_sum = 0.0
+            for (_, _, lot_id), cell in histogram.cells.items():
+                lot_weight[lot_id] += cell.weight
+                duration_sum += sum(duration * weight for duration, weight in cell.durations.items())
+            total = sum(histogram.day_weight)
+        if total:
+            summary["typical_duration"] = int(duration_sum / total)
+            # Lots holding 30%+ of the user's (decayed) bookings
+            summary["recurring_locations"] = [
+                lot_id for lot_id, weight in lot_weight.items() if weight / total >= 0.3
+            ]
+        return summary
+
+
+default_detector = PatternDetector()
@@ -9,11 +9,12 @@ from typing import List, Dict, Optional
 import json
 from sqlmodel import select
 from app.db.models import (
-    User, ParkingLot, Booking
+    User, Booking
 )
 from app.db.ai_models import (
     UserPreference, RecommendationScore
 )
+from app.services import lot_catalog
 
 
 class RecommendationEngine:
@@ -50,7 +51,7 @@ class RecommendationEngine:
                 amenities_counts = {}
 
                 for booking in bookings:
-                    lot = session.get(ParkingLot, booking.lot_id)
+                    lot = lot_catalog.get_lot(booking.lot_id)
                     if lot:
                         # Track locations
                         location_counts[lot.location] = location_counts.get(lot.location, 0) + 1
@@ -62,7 +63,7 @@ class RecommendationEngine:
                         durations.append(booking.duration_hours)
                         
                         # Track amenities
-                        for amenity in lot.features.split(","):
+                        for amenity in lot.features:
                             amenity = amenity.strip()
                             amenities_counts[amenity] = amenities_counts.get(amenity, 0) + 1
 
@@ -141,7 +142,7 @@ class RecommendationEngine:
     @staticmethod
     def calculate_recommendation_score(
         user_prefs: UserPreference,
-        parking_lot: ParkingLot
+        parking_lot: lot_catalog.LotRecord
     ) -> tuple[float, List[str]]:
         """
         Calculate recommendation score for a parking lot based on user preferences
@@ -173,7 +174,7 @@ class RecommendationEngine:
             # Amenities match (weight: 1.5)
             if user_prefs.preferred_amenities:
                 preferred_amenities = json.loads(user_prefs.preferred_amenities)
-                lot_amenities = [a.strip() for a in parking_lot.features.split(",")]
+                lot_amenities = [a.strip() for a in parking_lot.features]
                 matching_amenities = set(preferred_amenities) & set(lot_amenities)
                 
                 if matching_amenities:
@@ -230,9 +231,9 @@ class RecommendationEngine:
 
                 # If still no preferences, return top-rated lots
                 if not user_prefs:
-                    lots = session.exec(
-                        select(ParkingLot).order_by(ParkingLot.rating.desc()).limit(limit)
-                    ).all()
+                    lots = sorted(
+                        lot_catalog.get_lots(), key=lambda lot: lot.rating, reverse=True
+                    )[:limit]
                     return [
                         {
                             "lot": lot.to_dict(),
@@ -243,11 +244,9 @@ class RecommendationEngine:
                     ]
 
                 # Get all parking lots (optionally filter by location)
-                query = select(ParkingLot)
+                lots = lot_catalog.get_lots()
                 if location:
-                    query = query.where(ParkingLot.location.contains(location))
-                
-                lots = session.exec(query).all()
+                    lots = [lot for lot in lots if location.lower() in lot.location.lower()]
 
                 # Calculate scores for each lot
                 scored_lots = []
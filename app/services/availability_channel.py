@@ -0,0 +1,220 @@
+"""
+Availability Pub/Sub Channel
+Broadcasts per-lot availability deltas to every connected listings page
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Backend configuration: 'memory' (single process), 'redis' (shared) or 'local' (Redis stand-in)
+AVAILABILITY_BACKEND = os.getenv("AVAILABILITY_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CHANNEL_NAME = os.getenv("AVAILABILITY_CHANNEL", "parkmycar:availability")
+
+
+class InProcessBackend:
+    """Delivers messages straight back to this process (single web worker); publish() already did, so they are dropped."""
+
+    def __init__(self):
+        self._handler: Optional[Callable[[Dict], None]] = None
+
+    def start(self, handler: Callable[[Dict], None]):
+        self._handler = handler
+
+    def publish(self, message: Dict):
+        if self._handler:
+            self._handler(message)
+
+
+class RedisBackend:
+    """
+    Fans messages out through a Redis-compatible client so every worker process sees them.
+    Any client exposing publish() and pubsub() works (redis-py, fakeredis, LocalRedis).
+    """
+
+    def __init__(self, client, channel: str = CHANNEL_NAME):
+        self.client = client
+        self.channel = channel
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, handler: Callable[[Dict], None]):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        def listen():
+            for item in pubsub.listen():
+                if item.get("type") != "message":
+                    continue
+                try:
+                    data = item["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    handler(json.loads(data))
+                except Exception as e:
+                    logging.error(f"AvailabilityChannel: Bad message on {self.channel}: {e}")
+
+        self._thread = threading.Thread(target=listen, name="availability-channel", daemon=True)
+        self._thread.start()
+
+    def publish(self, message: Dict):
+        self.client.publish(self.channel, json.dumps(message))
+
+
+class LocalRedis:
+    """
+    Minimal in-memory stand-in for the parts of the Redis client RedisBackend uses.
+    Lets the shared-backend code path run in development without a Redis server.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: List[Tuple[str, "queue.Queue"]] = []
+
+    def publish(self, channel: str, data: str) -> int:
+        with self._lock:
+            targets = [q for name, q in self._subscriptions if name == channel]
+        for q in targets:
+            q.put({"type": "message", "channel": channel, "data": data})
+        return len(targets)
+
+    def pubsub(self, ignore_subscribe_messages: bool = True):
+        return _LocalPubSub(self)
+
+
+class _LocalPubSub:
+    def __init__(self, server: LocalRedis):
+        self._server = server
+        self._queue = queue.Queue()
+
+    def subscribe(self, channel: str):
+        with self._server._lock:
+            self._server._subscriptions.append((channel, self._queue))
+
+    def listen(self):
+        while True:
+            yield self._queue.get()
+
+
+_lock = threading.Lock()
+_backend = None
+_handlers: List[Callable[[Dict], None]] = []
+_subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+# (pid, id) of this process; regenerated after a fork so workers never share an id
+_origin: Optional[Tuple[int, str]] = None
+
+
+def _origin_id() -> str:
+    global _origin
+    pid = os.getpid()
+    if _origin is None or _origin[0] != pid:
+        _origin = (pid, uuid.uuid4().hex)
+    return _origin[1]
+
+
+def _create_backend():
+    if AVAILABILITY_BACKEND == "redis":
+        try:
+            import redis
+
+            return RedisBackend(redis.Redis.from_url(REDIS_URL))
+        except Exception as e:
+            logging.error(f"AvailabilityChannel: Redis unavailable ({e}), falling back to in-process backend")
+    elif AVAILABILITY_BACKEND == "local":
+        return RedisBackend(LocalRedis())
+    return InProcessBackend()
+
+
+def get_backend():
+    """Get the active backend, creating and starting it on first use."""
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                backend = _create_backend()
+                backend.start(_receive)
+                _backend = backend
+                logging.info(f"AvailabilityChannel: Using {type(backend).__name__}")
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the backend (e.g. with RedisBackend(LocalRedis()) in tests)."""
+    global _backend
+    with _lock:
+        backend.start(_receive)
+        _backend = backend
+
+
+def publish(message: Dict):
+    """
+    Broadcast a message to every process subscribed to the channel.
+    This process handles it synchronously before returning; the copy the backend
+    echoes back is skipped, so handlers run exactly once per process.
+    """
+    message = {**message, "origin": _origin_id()}
+    _dispatch(message)
+    try:
+        get_backend().publish(message)
+    except Exception as e:
+        logging.error(f"AvailabilityChannel: Publish failed: {e}")
+
+
+def add_handler(handler: Callable[[Dict], None]):
+    """Register a process-local callback run for every message before subscribers see it."""
+    _handlers.append(handler)
+
+
+def _receive(message: Dict):
+    """Backend callback: dispatch messages from other processes, skip our own echoes."""
+    if message.get("origin") == _origin_id():
+        return
+    _dispatch(message)
+
+
+def _dispatch(message: Dict):
+    for handler in _handlers:
+        try:
+            handler(message)
+        except Exception as e:
+            logging.exception(f"AvailabilityChannel: Handler error: {e}")
+
+    if message.get("type") != "availability":
+        return
+    delta = {"lot_id": message["lot_id"], "available_spots": message["available_spots"]}
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, q in subscribers:
+        try:
+            loop.call_soon_threadsafe(q.put_nowait, delta)
+        except RuntimeError:
+            # Subscriber's event loop is closed
+            unsubscribe(q)
+
+
+def subscribe() -> asyncio.Queue:
+    """
+    Subscribe to availability deltas from inside a running event loop.
+    Each delta is a dict: {"lot_id": int, "available_spots": int}
+    """
+    get_backend()
+    q = asyncio.Queue()
+    with _lock:
+        _subscribers.append((asyncio.get_running_loop(), q))
+    return q
+
+
+def unsubscribe(q: asyncio.Queue):
+    """Stop delivering deltas to a queue returned by subscribe()."""
+    with _lock:
+        _subscribers[:] = [(loop, sq) for loop, sq in _subscribers if sq is not q]
@@ -1,13 +1,38 @@
 """Cancellation service with BRD-aligned logic"""
 import reflex as rx
 import logging
+import threading
+import time
 from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
 from sqlmodel import select
 from app.db.models import CancellationPolicy, Booking as DBBooking
+from app.services import availability_channel
 
 
-def get_active_cancellation_policy():
-    """Get the active cancellation policy from database"""
+# Safety net for policy rows edited outside update_cancellation_policy()
+POLICY_CACHE_TTL_SECONDS = 300
+
+
+class PolicyRules(NamedTuple):
+    """Immutable snapshot of the active CancellationPolicy, shared by every caller in the process."""
+
+    full_refund_hours: int = 24
+    partial_refund_hours: int = 0
+    partial_refund_percentage: int = 50
+    non_cancellable_hours: int = 0
+    allow_cancellation_after_start: bool = False
+
+
+DEFAULT_POLICY = PolicyRules()
+
+_policy_lock = threading.Lock()
+_policy: Optional[PolicyRules] = None
+_policy_loaded_at = 0.0
+_policy_version = 0
+
+
+def _load_policy() -> PolicyRules:
     try:
         with rx.session() as session:
             policy = session.exec(
@@ -17,29 +42,89 @@ def get_active_cancellation_policy():
             if not policy:
                 # Fallback to default if none exists
                 logging.warning("No active cancellation policy found, using defaults")
-                return CancellationPolicy(
-                    full_refund_hours=24,
-                    partial_refund_hours=0,
-                    partial_refund_percentage=50,
-                    non_cancellable_hours=0,
-                    allow_cancellation_after_start=False
-                )
-            return policy
+                return DEFAULT_POLICY
+            return PolicyRules(
+                full_refund_hours=policy.full_refund_hours,
+                partial_refund_hours=policy.partial_refund_hours,
+                partial_refund_percentage=policy.partial_refund_percentage,
+                non_cancellable_hours=policy.non_cancellable_hours,
+                allow_cancellation_after_start=policy.allow_cancellation_after_start,
+            )
     except Exception as e:
         logging.exception(f"Error fetching cancellation policy: {e}")
         # Return default policy on error
-        return CancellationPolicy(
-            full_refund_hours=24,
-            partial_refund_hours=0,
-            partial_refund_percentage=50,
-            non_cancellable_hours=0,
-            allow_cancellation_after_start=False
-        )
+        return DEFAULT_POLICY
 
 
-def validate_cancellation_eligibility(booking: DBBooking) -> dict:
+def get_active_cancellation_policy() -> PolicyRules:
+    """Get the active cancellation policy, loaded once per process and per policy version"""
+    global _policy, _policy_loaded_at
+    with _policy_lock:
+        if _policy is not None and time.monotonic() - _policy_loaded_at < POLICY_CACHE_TTL_SECONDS:
+            return _policy
+        version = _policy_version
+    policy = _load_policy()
+    with _policy_lock:
+        # Only keep it if no invalidation arrived while we were reading
+        if version == _policy_version:
+            _policy = policy
+            _policy_loaded_at = time.monotonic()
+    return policy
+
+
+def get_policy_version() -> int:
+    """Counter bumped every time the cached policy is invalidated."""
+    return _policy_version
+
+
+def invalidate_cancellation_policy():
+    """Drop the cached policy in every process (call after editing CancellationPolicy rows)."""
+    # Applied here before publish() returns, and once in every other process
+    availability_channel.publish({"type": "cancellation_policy"})
+
+
+def _on_message(message: dict):
+    global _policy, _policy_version
+    if message.get("type") != "cancellation_policy":
+        return
+    with _policy_lock:
+        _policy = None
+        _policy_version += 1
+    logging.info("CancellationPolicy: Cache invalidated")
+
+
+availability_channel.add_handler(_on_message)
+
+
+def update_cancellation_policy(**changes) -> PolicyRules:
+    """Admin edit: update the active policy (creating it if missing) and invalidate every cache."""
+    unknown = set(changes) - set(PolicyRules._fields)
+    if unknown:
+        raise ValueError(f"Unknown cancellation policy fields: {', '.join(sorted(unknown))}")
+    for field, value in changes.items():
+        expected = PolicyRules.__annotations__[field]
+        # bool is an int subclass; keep hour and percentage fields strictly numeric
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ValueError(f"Cancellation policy field {field} must be {expected.__name__}")
+    with rx.session() as session:
+        policy = session.exec(
+            select(CancellationPolicy).where(CancellationPolicy.is_active == True)
+        ).first()
+        if not policy:
+            policy = CancellationPolicy(is_active=True)
+        for field, value in changes.items():
+            setattr(policy, field, value)
+        policy.updated_at = datetime.utcnow()
+        session.add(policy)
+        session.commit()
+    invalidate_cancellation_policy()
+    return get_active_cancellation_policy()
+
+
+def evaluate_cancellation(policy: PolicyRules, booking_start: datetime, total_price: float,
+                          is_refundable: bool = True, now: Optional[datetime] = None) -> dict:
     """
-    Validate if booking can be cancelled based on BRD rules
+    Apply a policy to one booking's start time and price (no DB access)
     
     Returns:
         dict with keys:
@@ -49,21 +134,7 @@ def validate_cancellation_eligibility(booking: DBBooking) -> dict:
             - message: str
             - reason: str
     """
-    policy = get_active_cancellation_policy()
-    
-    try:
-        booking_start = datetime.strptime(
-            f"{booking.start_date} {booking.start_time}", 
-            "%Y-%m-%d %H:%M"
-        )
-    except:
-        # Fallback for different time formats
-        booking_start = datetime.strptime(
-            f"{booking.start_date} {booking.start_time}", 
-            "%Y-%m-%d %H:%M"
-        )
-    
-    now = datetime.now()
+    now = now or datetime.now()
     hours_until_start = (booking_start - now).total_seconds() / 3600
     
     # Check 1: Already started?
@@ -87,7 +158,7 @@ def validate_cancellation_eligibility(booking: DBBooking) -> dict:
         }
     
     # Check 3: Non-refundable booking
-    if not booking.is_refundable:
+    if not is_refundable:
         return {
             "can_cancel": True,
             "refund_amount": 0.0,
@@ -100,13 +171,13 @@ def validate_cancellation_eligibility(booking: DBBooking) -> dict:
     if hours_until_start >= policy.full_refund_hours:
         return {
             "can_cancel": True,
-            "refund_amount": booking.total_price,
+            "refund_amount": total_price,
             "refund_percentage": 100,
             "message": f"Full refund available (more than {policy.full_refund_hours}h before booking)",
             "reason": "FULL_REFUND"
         }
     elif hours_until_start >= policy.partial_refund_hours:
-        refund = booking.total_price * (policy.partial_refund_percentage / 100)
+        refund = total_price * (policy.partial_refund_percentage / 100)
         return {
             "can_cancel": True,
             "refund_amount": refund,
@@ -124,6 +195,64 @@ def validate_cancellation_eligibility(booking: DBBooking) -> dict:
         }
 
 
+def parse_booking_start(start_date: str, start_time: str) -> datetime:
+    return datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
+
+
+def validate_cancellation_eligibility(booking: DBBooking) -> dict:
+    """
+    Validate if booking can be cancelled based on BRD rules
+    
+    Returns:
+        dict with keys:
+            - can_cancel: bool
+            - refund_amount: float
+            - refund_percentage: int
+            - message: str
+            - reason: str
+    """
+    booking_start = parse_booking_start(booking.start_date, booking.start_time)
+    return evaluate_cancellation(
+        get_active_cancellation_policy(),
+        booking_start,
+        booking.total_price,
+        booking.is_refundable,
+    )
+
+
+def evaluate_cancellations(bookings: Iterable, now: Optional[datetime] = None) -> Dict[int, dict]:
+    """
+    Eligibility for many bookings against one policy snapshot and one clock reading.
+    Accepts Booking rows or projected rows with id, start_date, start_time, total_price and is_refundable.
+    Bookings whose start cannot be parsed are reported with reason INVALID_START.
+    """
+    policy = get_active_cancellation_policy()
+    now = now or datetime.now()
+    starts: Dict[Tuple[str, str], Optional[datetime]] = {}
+    results = {}
+    for booking in bookings:
+        key = (booking.start_date, booking.start_time)
+        if key not in starts:
+            try:
+                starts[key] = parse_booking_start(*key)
+            except (ValueError, TypeError):
+                starts[key] = None
+        booking_start = starts[key]
+        if booking_start is None:
+            results[booking.id] = {
+                "can_cancel": False,
+                "refund_amount": 0.0,
+                "refund_percentage": 0,
+                "message": "Booking start time is invalid",
+                "reason": "INVALID_START"
+            }
+            continue
+        results[booking.id] = evaluate_cancellation(
+            policy, booking_start, booking.total_price, booking.is_refundable, now
+        )
+    return results
+
+
 def send_cancellation_email_to_user(user_email: str, user_name: str, booking_details: dict, refund_amount: float):
     """
     Send cancellation confirmation email to user
@@ -0,0 +1,179 @@
+"""
+Chatbot Conversation Storage
+Append-only message log with a batched background writer
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import reflex as rx
+from dotenv import load_dotenv
+from sqlmodel import select
+from app.db.ai_models import ChatbotConversation, ChatbotMessage
+
+load_dotenv()
+
+# Flush the buffer once it holds this many messages, or when its oldest message is this old
+FLUSH_EVERY = int(os.getenv("CHAT_FLUSH_EVERY", "20"))
+FLUSH_SECONDS = float(os.getenv("CHAT_FLUSH_SECONDS", "5"))
+# A message is dropped after this many failed writes, and the oldest messages are dropped
+# once this many are waiting, so a database outage cannot grow the buffer without bound
+FLUSH_MAX_ATTEMPTS = int(os.getenv("CHAT_FLUSH_MAX_ATTEMPTS", "5"))
+BUFFER_MAX = int(os.getenv("CHAT_BUFFER_MAX", "1000"))
+
+
+class ChatHistoryWriter:
+    """
+    Buffers chatbot messages in memory and writes them as one batch of inserts.
+    Conversation header rows are created on first flush and only have their
+    updated_at/intent touched afterwards; message rows are never rewritten.
+    """
+
+    def __init__(self, flush_every: int = FLUSH_EVERY, flush_seconds: float = FLUSH_SECONDS,
+                 max_attempts: int = FLUSH_MAX_ATTEMPTS, max_buffer: int = BUFFER_MAX):
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max_attempts
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (message, failed write attempts so far)
+        self._buffer: List[Tuple[ChatbotMessage, int]] = []
+        self._oldest = 0.0
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def append(self, conversation_id: str, role: str, content: str,
+               user_id: Optional[int] = None, intent: Optional[str] = None):
+        """Queue one message for writing."""
+        message = ChatbotMessage(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            role=role,
+            content=content,
+            intent=intent,
+        )
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append((message, 0))
+            self._trim()
+            full = len(self._buffer) >= self.flush_every
+            self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def _trim(self):
+        """Drop the oldest messages beyond max_buffer. Call with _lock held."""
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            logging.error(f"ChatHistory: Buffer full, dropping {overflow} oldest messages")
+            del self._buffer[:overflow]
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="chat-history-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            with self._lock:
+                due = self._buffer and (
+                    len(self._buffer) >= self.flush_every
+                    or time.monotonic() - self._oldest >= self.flush_seconds
+                )
+            if due:
+                self.flush()
+
+    def flush(self) -> int:
+        """Write every buffered message in one transaction. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                self._write([message for message, _ in batch])
+            except Exception as e:
+                logging.exception(f"ChatHistory: Failed to write {len(batch)} messages: {e}")
+                # Put the batch back so it is retried on the next flush, minus messages out of attempts
+                retry = [(message, attempts + 1) for message, attempts in batch if attempts + 1 < self.max_attempts]
+                if len(retry) < len(batch):
+                    logging.error(
+                        f"ChatHistory: Dropping {len(batch) - len(retry)} messages after "
+                        f"{self.max_attempts} failed writes"
+                    )
+                with self._lock:
+                    self._buffer = retry + self._buffer
+                    self._trim()
+                    self._oldest = time.monotonic()
+                return 0
+            logging.debug(f"ChatHistory: Wrote {len(batch)} messages")
+            return len(batch)
+
+    def _write(self, batch: List[ChatbotMessage]):
+        now = datetime.utcnow()
+        latest = {}
+        for message in batch:
+            latest[message.conversation_id] = message
+
+        with rx.session() as session:
+            existing = {
+                conversation.conversation_id: conversation
+                for conversation in session.exec(
+                    select(ChatbotConversation).where(
+                        ChatbotConversation.conversation_id.in_(list(latest))
+                    )
+                ).all()
+            }
+            for conversation_id, message in latest.items():
+                conversation = existing.get(conversation_id)
+                if conversation is None:
+                    conversation = ChatbotConversation(
+                        conversation_id=conversation_id,
+                        user_id=message.user_id,
+                        messages="[]",
+                    )
+                conversation.updated_at = now
+                if message.intent:
+                    conversation.intent = message.intent
+                if message.user_id and not conversation.user_id:
+                    conversation.user_id = message.user_id
+                session.add(conversation)
+            session.add_all(batch)
+            session.commit()
+
+
+writer = ChatHistoryWriter()
+atexit.register(writer.flush)
+
+
+def record_message(conversation_id: str, role: str, content: str,
+                   user_id: Optional[int] = None, intent: Optional[str] = None):
+    """Append a message to a conversation (written in the next batch)."""
+    writer.append(conversation_id, role, content, user_id=user_id, intent=intent)
+
+
+def load_recent_messages(conversation_id: str, limit: int, user_id: Optional[int] = None) -> List[dict]:
+    """
+    The last `limit` messages of a conversation, oldest first, as {role, content} dicts.
+    Only messages written by `user_id` (or anonymously, when None) are returned.
+    Blocks on a flush and a query; call it from a worker thread in async code.
+    """
+    writer.flush()
+    owner = ChatbotMessage.user_id == user_id if user_id else ChatbotMessage.user_id.is_(None)
+    with rx.session() as session:
+        rows = session.exec(
+            select(ChatbotMessage)
+            .where(ChatbotMessage.conversation_id == conversation_id, owner)
+            .order_by(ChatbotMessage.id.desc())
+            .limit(limit)
+        ).all()
+    return [{"role": row.role, "content": row.content} for row in reversed(rows)]
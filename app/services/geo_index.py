@@ -0,0 +1,112 @@
+"""
+Geospatial Lot Index
+In-memory grid index over lot coordinates for "nearest lots within X km" queries
+"""
+
+import heapq
+import math
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services import lot_catalog
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Uniform lat/lng grid. Each cell is cell_km tall; a radius query only visits
+    the cells overlapping the query's bounding box, then filters by exact distance.
+    """
+
+    def __init__(self, points: Iterable[Tuple[int, float, float]], cell_km: float = 1.0):
+        self.cell_deg = cell_km / KM_PER_DEGREE_LAT
+        self.cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = defaultdict(list)
+        self.size = 0
+        for point_id, lat, lng in points:
+            self.cells[self._cell(lat, lng)].append((point_id, lat, lng))
+            self.size += 1
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, int]]:
+        """All (distance_km, id) pairs within radius_km of the point, unordered."""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        # Longitude degrees shrink towards the poles; widen the box accordingly
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+
+        row_min, col_min = self._cell(lat - dlat, lng - dlng)
+        row_max, col_max = self._cell(lat + dlat, lng + dlng)
+
+        results = []
+        cells = self.cells
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                for point_id, plat, plng in cells.get((row, col), ()):
+                    distance = haversine_km(lat, lng, plat, plng)
+                    if distance <= radius_km:
+                        results.append((distance, point_id))
+        return results
+
+
+_lock = threading.Lock()
+_index: Optional[GridIndex] = None
+_generation = -1
+
+
+def get_index() -> GridIndex:
+    """Get the grid index for the current catalog, rebuilding it when lots are reloaded."""
+    global _index, _generation
+    lots = lot_catalog.get_lots()
+    generation = lot_catalog.get_generation()
+    if _index is None or generation != _generation:
+        with _lock:
+            if _index is None or generation != _generation:
+                _index = GridIndex(
+                    (lot.id, lot.latitude, lot.longitude)
+                    for lot in lots
+                    if lot.latitude is not None and lot.longitude is not None
+                )
+                _generation = generation
+    return _index
+
+
+def find_nearby_lots(
+    lat: float,
+    lng: float,
+    radius_km: float = 5.0,
+    limit: int = 10,
+    available_only: bool = False,
+) -> List[Tuple[lot_catalog.LotRecord, float]]:
+    """
+    Find the nearest lots within radius_km of a point.
+    Returns (lot, distance_km) pairs, nearest first.
+    """
+    candidates = get_index().within(lat, lng, radius_km)
+    if not available_only:
+        candidates = heapq.nsmallest(limit, candidates)
+    else:
+        candidates.sort()
+
+    results = []
+    for distance, lot_id in candidates:
+        lot = lot_catalog.get_lot(lot_id)
+        if not lot or not lot.is_active or (available_only and lot.available_spots <= 0):
+            continue
+        results.append((lot, distance))
+        if len(results) >= limit:
+            break
+    return results
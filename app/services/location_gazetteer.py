@@ -0,0 +1,159 @@
+"""
+Location Gazetteer
+In-memory trie over lot name and location words that resolves free text to lot ids,
+tolerating typos via bounded edit-distance search
+"""
+
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.services import lot_catalog
+
+# Words that never identify a place: chat filler and generic parking terms
+STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "you", "is", "are", "am", "be", "it", "to",
+    "of", "for", "and", "or", "on", "at", "in", "near", "around", "about", "by", "from",
+    "with", "any", "some", "there", "here", "this", "that", "what", "where", "which", "how",
+    "can", "could", "please", "want", "need", "looking", "look", "find", "search", "show",
+    "check", "tell", "book", "reserve", "available", "availability", "free", "info",
+    "parking", "park", "car", "lot", "lots", "spot", "spots", "space", "spaces", "place",
+    "today", "tomorrow", "now", "tonight",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def max_edits(word: str) -> int:
+    """Typo budget for a query word; short words and numbers must match exactly."""
+    if len(word) < 5 or word.isdigit():
+        return 0
+    return 1 if len(word) < 9 else 2
+
+
+class _TrieNode:
+    __slots__ = ("children", "word")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.word: Optional[str] = None
+
+
+class GazetteerMatch(NamedTuple):
+    lot_ids: List[int]
+    terms: List[str]
+
+
+class Gazetteer:
+    """
+    Character trie over the vocabulary of lot names and locations, plus an inverted
+    index from each word to its lots. Query words are corrected against the trie
+    (Levenshtein search pruned per branch) and scored by inverse document frequency.
+    """
+
+    def __init__(self, lots: Iterable[Tuple[int, str]]):
+        self.root = _TrieNode()
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        lot_count = 0
+        for lot_id, text in lots:
+            lot_count += 1
+            for word in tokenize(text):
+                if word not in STOPWORDS:
+                    self.postings[word].add(lot_id)
+        for word in self.postings:
+            self._insert(word)
+        self.idf = {
+            word: math.log(1 + lot_count / len(ids)) for word, ids in self.postings.items()
+        }
+
+    def _insert(self, word: str):
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+        node.word = word
+
+    def correct(self, word: str) -> Optional[Tuple[str, int]]:
+        """Closest vocabulary word within the typo budget, as (word, edits)."""
+        if word in self.postings:
+            return word, 0
+        budget = max_edits(word)
+        if budget == 0:
+            return None
+
+        best: Optional[Tuple[str, int]] = None
+        first_row = list(range(len(word) + 1))
+        # Depth-first walk carrying one Levenshtein DP row per trie node
+        stack = [(child, char, first_row) for char, child in self.root.children.items()]
+        while stack:
+            node, char, previous = stack.pop()
+            row = [previous[0] + 1]
+            for column in range(1, len(word) + 1):
+                row.append(min(
+                    row[column - 1] + 1,
+                    previous[column] + 1,
+                    previous[column - 1] + (word[column - 1] != char),
+                ))
+            if node.word is not None and row[-1] <= budget:
+                if best is None or (row[-1], node.word) < (best[1], best[0]):
+                    best = (node.word, row[-1])
+            if min(row) <= budget:
+                stack.extend((child, next_char, row) for next_char, child in node.children.items())
+        return best
+
+    def resolve(self, text: str, min_ratio: float = 0.5) -> GazetteerMatch:
+        """
+        Lots mentioned in the text, best match first. Lots scoring below min_ratio
+        of the best score are dropped so one strong mention is not diluted by weak ones.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        terms: List[str] = []
+        for token in tokenize(text):
+            if token in STOPWORDS:
+                continue
+            corrected = self.correct(token)
+            if corrected is None:
+                continue
+            word, edits = corrected
+            weight = self.idf[word] * (1 - edits / (len(word) + 1))
+            for lot_id in self.postings[word]:
+                scores[lot_id] += weight
+            if word not in terms:
+                terms.append(word)
+
+        if not scores:
+            return GazetteerMatch([], [])
+        cutoff = max(scores.values()) * min_ratio
+        ranked = sorted(
+            (lot_id for lot_id, score in scores.items() if score >= cutoff),
+            key=lambda lot_id: (-scores[lot_id], lot_id),
+        )
+        return GazetteerMatch(ranked, terms)
+
+
+_lock = threading.Lock()
+_gazetteer: Optional[Gazetteer] = None
+_generation = -1
+
+
+def get_gazetteer() -> Gazetteer:
+    """Get the gazetteer for the current catalog, rebuilding it when lots are reloaded."""
+    global _gazetteer, _generation
+    lots = lot_catalog.get_lots()
+    generation = lot_catalog.get_generation()
+    if _gazetteer is None or generation != _generation:
+        with _lock:
+            if _gazetteer is None or generation != _generation:
+                _gazetteer = Gazetteer((lot.id, f"{lot.name} {lot.location}") for lot in lots)
+                _generation = generation
+    return _gazetteer
+
+
+def resolve_lots(text: str) -> GazetteerMatch:
+    """Resolve place mentions in free text to catalog lot ids."""
+    return get_gazetteer().resolve(text)
@@ -0,0 +1,156 @@
+"""
+Process-wide Parking Lot Catalog
+Shared in-memory snapshot of parking lots, kept fresh via the availability channel
+"""
+
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import reflex as rx
+from sqlmodel import select
+from app.db.models import ParkingLot
+from app.services import availability_channel
+
+
+class LotRecord(NamedTuple):
+    """Compact, immutable view of a ParkingLot row."""
+
+    id: int
+    name: str
+    location: str
+    price_per_hour: float
+    total_spots: int
+    available_spots: int
+    image_url: str
+    features: Tuple[str, ...]
+    rating: float
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    is_active: bool = True
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "location": self.location,
+            "price_per_hour": self.price_per_hour,
+            "total_spots": self.total_spots,
+            "available_spots": self.available_spots,
+            "image_url": self.image_url,
+            "features": list(self.features),
+            "rating": self.rating,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "is_active": self.is_active,
+        }
+
+
+_lock = threading.RLock()
+_lots: Optional[Dict[int, LotRecord]] = None
+_version = 0
+_generation = 0
+
+
+def _to_record(lot: ParkingLot) -> LotRecord:
+    return LotRecord(
+        id=lot.id,
+        name=lot.name,
+        location=lot.location,
+        price_per_hour=lot.price_per_hour,
+        total_spots=lot.total_spots,
+        available_spots=lot.available_spots,
+        image_url=lot.image_url,
+        features=tuple(lot.features.split(",")) if lot.features else (),
+        rating=lot.rating,
+        latitude=lot.latitude,
+        longitude=lot.longitude,
+        is_active=lot.is_active,
+    )
+
+
+def _snapshot() -> Dict[int, LotRecord]:
+    """Return the current snapshot, loading it from the database if needed."""
+    global _lots, _generation
+    lots = _lots
+    if lots is not None:
+        return lots
+    with _lock:
+        if _lots is None:
+            with rx.session() as session:
+                db_lots = session.exec(select(ParkingLot).order_by(ParkingLot.id)).all()
+                _lots = {lot.id: _to_record(lot) for lot in db_lots}
+            _generation += 1
+            logging.info(f"LotCatalog: Loaded {len(_lots)} parking lots")
+        return _lots
+
+
+def get_lots(include_inactive: bool = False) -> List[LotRecord]:
+    """Get the open parking lots (or every lot, closed ones included), ordered by id."""
+    lots = _snapshot().values()
+    if include_inactive:
+        return list(lots)
+    return [lot for lot in lots if lot.is_active]
+
+
+def get_lot(lot_id: int) -> Optional[LotRecord]:
+    """Get a single parking lot by id, closed or not; booking paths must check is_active."""
+    return _snapshot().get(int(lot_id))
+
+
+def find_lot(name: str, location: str) -> Optional[LotRecord]:
+    """Find a parking lot by its exact name and location."""
+    for lot in _snapshot().values():
+        if lot.name == name and lot.location == location:
+            return lot
+    return None
+
+
+def get_version() -> int:
+    """Monotonic counter bumped on every catalog change."""
+    return _version
+
+
+def get_generation() -> int:
+    """Counter bumped each time the snapshot is reloaded, but not on availability changes."""
+    return _generation
+
+
+def invalidate():
+    """Drop the snapshot in every process so the next read reloads it (call after admin edits)."""
+    # publish() applies it here before returning, so this process never serves the stale snapshot
+    availability_channel.publish({"type": "invalidate"})
+
+
+def set_available_spots(lot_id: int, available_spots: int):
+    """
+    Broadcast a new availability count for a lot to every process.
+    Call this after the DB transaction that changed the count has committed.
+    """
+    availability_channel.publish({
+        "type": "availability",
+        "lot_id": int(lot_id),
+        "available_spots": available_spots,
+    })
+
+
+def _on_message(message: dict):
+    """Apply a channel message to this process's snapshot."""
+    global _lots, _version
+    with _lock:
+        if message.get("type") == "invalidate":
+            _lots = None
+            logging.info("LotCatalog: Invalidated")
+        elif message.get("type") == "availability":
+            lot_id = message["lot_id"]
+            if _lots is not None and lot_id in _lots:
+                lots = dict(_lots)
+                lots[lot_id] = lots[lot_id]._replace(available_spots=message["available_spots"])
+                _lots = lots
+        else:
+            # Other services share the channel; their messages don't touch the catalog
+            return
+        _version += 1
+
+
+availability_channel.add_handler(_on_message)
@@ -0,0 +1,345 @@
+"""
+Lot Closure Cancellations
+Closes a lot to new bookings, bulk-cancels its upcoming bookings, refunds them through the gateway client and emails users from a worker pool
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlmodel import case, select, update
+from app.db.database import job_session
+from app.db.models import AuditLog, Booking, ParkingLot, Payment, User
+from app.services import cancellation_service, lot_catalog, refund_gateway
+
+load_dotenv()
+
+# Bookings cancelled per transaction
+CLOSURE_BATCH_SIZE = int(os.getenv("LOT_CLOSURE_BATCH_SIZE", "500"))
+# Threads sending cancellation emails
+CLOSURE_WORKERS = int(os.getenv("LOT_CLOSURE_WORKERS", "8"))
+
+LIVE_STATUSES = ("Confirmed", "Pending")
+
+# One closure runs at a time; its emails share the worker pool
+_job_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lot-closure")
+_workers = ThreadPoolExecutor(max_workers=CLOSURE_WORKERS, thread_name_prefix="lot-closure-worker")
+# Refunds of every closure run on one loop, created and driven by the single job thread, so
+# the gateway client's per-loop connections are reused across closures
+_refund_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class ClosureJob:
+    """Progress of one lot closure, updated by the job and its workers."""
+
+    def __init__(self, lot_id: int, reason: str, full_refund: bool):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.lot_id = lot_id
+        self.reason = reason
+        self.full_refund = full_refund
+        self.status = "queued"  # queued, running, completed, failed
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.counts = {
+            "total": 0,
+            "cancelled": 0,
+            "skipped": 0,
+            "refunds_queued": 0,
+            "refunds_succeeded": 0,
+            "refunds_failed": 0,
+            "emails_sent": 0,
+            "emails_failed": 0,
+        }
+
+    def add(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counts[key] += amount
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        finished = counts["refunds_succeeded"] + counts["refunds_failed"]
+        return {
+            "job_id": self.job_id,
+            "lot_id": self.lot_id,
+            "status": self.status,
+            "reason": self.reason,
+            "full_refund": self.full_refund,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "progress": {
+                **counts,
+                "refunds_pending": counts["refunds_queued"] - finished,
+            },
+        }
+
+
+class ClosureInProgress(Exception):
+    """The lot already has a closure job queued or running."""
+
+    def __init__(self, job: ClosureJob):
+        super().__init__(f"Lot {job.lot_id} already has closure job {job.job_id} {job.status}")
+        self.job = job
+
+
+_jobs: Dict[str, ClosureJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def start_lot_closure(lot_id: int, reason: str = "Parking lot closed", full_refund: bool = True) -> ClosureJob:
+    """
+    Queue a closure job and return it immediately; poll get_job() for progress.
+    Callers must have checked that the requester is an admin. Raises ClosureInProgress
+    if the lot already has a queued or running job.
+    """
+    job = ClosureJob(lot_id, reason, full_refund)
+    with _jobs_lock:
+        for existing in _jobs.values():
+            if existing.lot_id == lot_id and existing.status in ("queued", "running"):
+                raise ClosureInProgress(existing)
+        _jobs[job.job_id] = job
+    _job_runner.submit(run_lot_closure, job)
+    logging.info(f"LotClosure: Queued job {job.job_id} for lot {lot_id}")
+    return job
+
+
+def get_job(job_id: str) -> Optional[ClosureJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def _refund_amount(job: ClosureJob, row, eligibility: dict) -> float:
+    """Only paid bookings are refunded; a closure refunds in full unless asked to follow the policy."""
+    if not row.transaction_id or not (row.payment_status or "").startswith("Paid"):
+        return 0.0
+    if job.full_refund:
+        return row.total_price
+    return eligibility["refund_amount"]
+
+
+def _cancel_batch(session, job: ClosureJob, rows, eligibility: Dict[int, dict], now: datetime) -> List:
+    """Cancel one batch set-wise. Returns the rows that were still live and got cancelled."""
+    ids = [row.id for row in rows]
+    # Re-read inside the transaction: users may have cancelled since the job started
+    live = set(session.exec(
+        select(Booking.id).where(Booking.id.in_(ids), Booking.status.in_(LIVE_STATUSES))
+    ).all())
+    cancelled = [row for row in rows if row.id in live]
+    job.add("skipped", len(rows) - len(cancelled))
+    if not cancelled:
+        return []
+
+    refunds = {row.id: _refund_amount(job, row, eligibility[row.id]) for row in cancelled}
+    refunded_ids = [booking_id for booking_id, amount in refunds.items() if amount > 0]
+    # Keys are stored with the cancellation, so a rerun after a crash cannot refund twice
+    keys = {booking_id: refund_gateway.new_idempotency_key(booking_id) for booking_id in refunded_ids}
+    session.exec(
+        update(Booking)
+        .where(Booking.id.in_(list(live)), Booking.status.in_(LIVE_STATUSES))
+        .values(
+            status="Cancelled",
+            cancellation_reason=job.reason,
+            cancellation_at=now,
+            refund_amount=case(refunds, value=Booking.id, else_=0.0),
+            refund_status=case((Booking.id.in_(refunded_ids), "Pending"), else_=Booking.refund_status),
+            refund_idempotency_key=case(keys, value=Booking.id, else_=Booking.refund_idempotency_key)
+            if keys else Booking.refund_idempotency_key,
+            payment_status=case(
+                (Booking.id.in_(refunded_ids), "Pending Refund"), else_="Cancelled (No Refund)"
+            ),
+        )
+    )
+    session.add_all([
+        AuditLog(
+            action="Booking Cancelled",
+            timestamp=now,
+            details=f"Booking {row.id} cancelled by lot closure ({job.reason}). "
+                    f"Refund: RM {refunds[row.id]:.2f} ({eligibility[row.id]['reason']} under policy)",
+            user_id=row.user_id,
+        )
+        for row in cancelled
+    ])
+    session.commit()
+    job.add("cancelled", len(cancelled))
+    return [(row, refunds[row.id], keys.get(row.id)) for row in cancelled]
+
+
+async def _refund_all(job: ClosureJob, items: list) -> Dict[int, Optional[str]]:
+    """Refund (row, amount, key) items through the gateway client at its concurrency limit."""
+    client = refund_gateway.get_client()
+
+    results = await asyncio.gather(
+        *(client.refund(row.transaction_id, amount, job.reason, key) for row, amount, key in items),
+        return_exceptions=True,
+    )
+    refund_ids = {}
+    for (row, _, _), result in zip(items, results):
+        # Failed refunds stay Pending for the admin refunds page, which retries with the same key
+        if isinstance(result, BaseException):
+            logging.error(f"LotClosure: Refund for booking {row.id} raised: {result!r}")
+            refund_ids[row.id] = None
+            job.add("refunds_failed")
+        else:
+            refund_ids[row.id] = result.refund_id
+            job.add("refunds_succeeded" if result.success else "refunds_failed")
+    return refund_ids
+
+
+def _get_refund_loop() -> asyncio.AbstractEventLoop:
+    """The refund loop, created on first use; only the job thread calls this."""
+    global _refund_loop
+    if _refund_loop is None:
+        _refund_loop = asyncio.new_event_loop()
+    return _refund_loop
+
+
+def _notify(job: ClosureJob, row, refund_amount: float, refund_id: Optional[str], user, lot_name: str):
+    """Worker task: email the user about the cancellation and their refund."""
+    if not user or not user.email:
+        return
+    try:
+        from app.services.email_service import send_cancellation_confirmation_email
+
+        if refund_id:
+            refund_message = f"A refund of RM {refund_amount:.2f} has been issued (ref {refund_id})."
+        elif refund_amount > 0:
+            refund_message = f"A refund of RM {refund_amount:.2f} will be processed within 5-7 business days."
+        else:
+            refund_message = "No payment was taken for this booking."
+        sent = send_cancellation_confirmation_email(user.email, {
+            "user_name": user.name or "Customer",
+            "lot_name": lot_name,
+            "start_date": row.start_date,
+            "start_time": row.start_time,
+            "slot_id": row.slot_id or "N/A",
+            "vehicle_number": row.vehicle_number or "N/A",
+            "total_price": row.total_price,
+            "refund_message": f"{job.reason}. {refund_message}",
+        })
+        job.add("emails_sent" if sent else "emails_failed")
+    except Exception as e:
+        job.add("emails_failed")
+        logging.error(f"LotClosure: Email to {user.email} failed: {e}")
+
+
+def _record_refunds(job: ClosureJob, succeeded: list):
+    """Mark successful (row, amount, refund_id) gateway refunds as approved, with payment and audit rows, in bulk."""
+    now = datetime.now()
+    with job_session("lot_closure_refunds") as session:
+        for i in range(0, len(succeeded), CLOSURE_BATCH_SIZE):
+            chunk = succeeded[i:i + CLOSURE_BATCH_SIZE]
+            # Only rows this UPDATE moved out of Pending get payment and audit rows; an admin
+            # may have approved the same refund concurrently
+            approved = set(session.execute(
+                update(Booking)
+                .where(Booking.id.in_([row.id for row, _, _ in chunk]), Booking.refund_status == "Pending")
+                .values(refund_status="Approved", refund_approved_at=now, payment_status="Refunded")
+                .returning(Booking.id)
+            ).scalars().all())
+            chunk = [item for item in chunk if item[0].id in approved]
+            if not chunk:
+                session.commit()
+                continue
+            session.add_all([
+                Payment(
+                    transaction_id=refund_id,
+                    booking_id=row.id,
+                    amount=amount,
+                    status="Refunded",
+                    timestamp=now,
+                    method="Lot Closure Refund",
+                )
+                for row, amount, refund_id in chunk
+            ])
+            session.add_all([
+                AuditLog(
+                    action="Refund Approved",
+                    timestamp=now,
+                    details=f"Lot closure refund of RM {amount:.2f} for booking {row.id} ({refund_id})",
+                    user_id=row.user_id,
+                )
+                for row, amount, refund_id in chunk
+            ])
+            session.commit()
+
+
+def run_lot_closure(job: ClosureJob):
+    """Cancel every live booking at the lot from today on, refund them, then notify via the worker pool."""
+    job.status = "running"
+    try:
+        today = datetime.now().strftime("%Y-%m-%d")
+        with job_session("lot_closure") as session:
+            lot = session.get(ParkingLot, job.lot_id)
+            if not lot:
+                raise ValueError(f"Parking lot {job.lot_id} not found")
+            lot_name = lot.name
+            # Close the lot before reading its bookings: booking paths refuse inactive lots,
+            # so nothing can be booked after the select below. Cancellations free no spots.
+            session.exec(
+                update(ParkingLot).where(ParkingLot.id == job.lot_id).values(is_active=False, available_spots=0)
+            )
+            session.commit()
+            lot_catalog.invalidate()
+
+            rows = session.exec(
+                select(
+                    Booking.id,
+                    Booking.user_id,
+                    Booking.start_date,
+                    Booking.start_time,
+                    Booking.total_price,
+                    Booking.is_refundable,
+                    Booking.transaction_id,
+                    Booking.payment_status,
+                    Booking.slot_id,
+                    Booking.vehicle_number,
+                ).where(
+                    Booking.lot_id == job.lot_id,
+                    Booking.status.in_(LIVE_STATUSES),
+                    Booking.start_date >= today,
+                )
+            ).all()
+            job.add("total", len(rows))
+            eligibility = cancellation_service.evaluate_cancellations(rows)
+
+            user_ids = list({row.user_id for row in rows})
+            users = {}
+            for i in range(0, len(user_ids), CLOSURE_BATCH_SIZE):
+                for user in session.exec(
+                    select(User.id, User.email, User.name).where(User.id.in_(user_ids[i:i + CLOSURE_BATCH_SIZE]))
+                ).all():
+                    users[user.id] = user
+
+            cancelled = []
+            now = datetime.now()
+            for i in range(0, len(rows), CLOSURE_BATCH_SIZE):
+                cancelled.extend(_cancel_batch(session, job, rows[i:i + CLOSURE_BATCH_SIZE], eligibility, now))
+
+        to_refund = [(row, amount, key) for row, amount, key in cancelled if amount > 0]
+        job.add("refunds_queued", len(to_refund))
+        refund_ids = _get_refund_loop().run_until_complete(_refund_all(job, to_refund)) if to_refund else {}
+        _record_refunds(job, [
+            (row, amount, refund_ids[row.id]) for row, amount, _ in to_refund if refund_ids.get(row.id)
+        ])
+
+        wait([
+            _workers.submit(_notify, job, row, amount, refund_ids.get(row.id), users.get(row.user_id), lot_name)
+            for row, amount, _ in cancelled
+        ])
+        job.status = "completed"
+    except Exception as e:
+        logging.exception(f"LotClosure: Job {job.job_id} failed: {e}")
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.now()
+        logging.info(f"LotClosure: Job {job.job_id} {job.status}: {job.to_dict()['progress']}")
@@ -1,9 +1,12 @@
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlmodel import Session, create_engine, select
+from sqlmodel import select
 from datetime import datetime, timedelta
+from app.db.database import job_session
 from app.db.models import Booking, User, ParkingLot
 from app.services.email_service import send_booking_reminder_email
+from app.services.otp_service import cleanup_expired_otps
+from app.services.rule_engine import RULE_ENGINE_HOUR, run_nightly_rules
 import os
 
 # Scheduler instance
@@ -11,13 +14,8 @@ scheduler = BackgroundScheduler()
 
 def check_upcoming_bookings():
     """Check for bookings starting in the next ~1 hour and send reminders."""
-    # Use generic generic URL or env var if available
-    DATABASE_URL = "sqlite:///reflex.db"
-    
     try:
-        engine = create_engine(DATABASE_URL)
-        
-        with Session(engine) as session:
+        with job_session("booking_reminders") as session:
             now = datetime.now()
             
             # We look for bookings starting today or tomorrow (to catch midnight crossovers)
@@ -89,6 +87,8 @@ def start_scheduler():
     """Start the background scheduler."""
     if not scheduler.running:
         scheduler.add_job(check_upcoming_bookings, 'interval', minutes=5)
+        scheduler.add_job(cleanup_expired_otps, 'interval', minutes=10)
+        scheduler.add_job(run_nightly_rules, 'cron', hour=RULE_ENGINE_HOUR, minute=0)
         try:
             scheduler.start()
             logging.info("📅 Notification Scheduler started.")
@@ -1,11 +1,24 @@
 """OTP Service for generating and managing OTP codes."""
+import os
 import random
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import Optional
-from sqlmodel import select
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+from sqlmodel import delete, select
 import reflex as rx
-from app.db.models import OTPVerification, User
+from app.db.database import job_session
+from app.db.models import OTPVerification
+from app.services import session_service
+
+load_dotenv()
+
+# "db" (default, shared across processes) or "memory" (single process, TTL-bounded)
+OTP_BACKEND = os.getenv("OTP_BACKEND", "db")
+OTP_MEMORY_MAX_ENTRIES = int(os.getenv("OTP_MEMORY_MAX_ENTRIES", "10000"))
+OTP_TTL_MINUTES = 2
+MAX_ATTEMPTS = 3
 
 
 def generate_otp() -> str:
@@ -13,58 +26,27 @@ def generate_otp() -> str:
     return str(random.randint(100000, 999999))
 
 
-def create_otp_record(email: str, purpose: str = "password_reset") -> Optional[str]:
-    """
-    Create an OTP record for the given email.
-    Returns the generated OTP code or None if user doesn't exist (for password reset).
-    """
-    try:
+class DatabaseOTPStore:
+    """OTPs stored in the otpverification table (shared by every worker process)."""
+
+    def issue(self, email: str, purpose: str, otp_code: str, expires_at: datetime):
         with rx.session() as session:
-            # For password reset, verify user exists
-            if purpose == "password_reset":
-                user = session.exec(select(User).where(User.email == email)).first()
-                if not user:
-                    logging.warning(f"OTP request for non-existent email: {email}")
-                    return None
-
-            # Clean up old OTPs for this email
-            old_otps = session.exec(
-                select(OTPVerification).where(
+            # Replace any earlier OTPs for this email/purpose in one statement
+            session.execute(
+                delete(OTPVerification).where(
                     OTPVerification.email == email,
                     OTPVerification.purpose == purpose,
                 )
-            ).all()
-            for old_otp in old_otps:
-                session.delete(old_otp)
-
-            # Generate new OTP
-            otp_code = generate_otp()
-            expires_at = datetime.utcnow() + timedelta(minutes=2)  # 2 minutes expiration
-
-            new_otp = OTPVerification(
+            )
+            session.add(OTPVerification(
                 email=email,
                 otp_code=otp_code,
                 purpose=purpose,
                 expires_at=expires_at,
-            )
-
-            session.add(new_otp)
+            ))
             session.commit()
 
-            logging.info(f"OTP generated for {email}: {otp_code} (expires at {expires_at})")
-            return otp_code
-
-    except Exception as e:
-        logging.exception(f"Error creating OTP record: {e}")
-        return None
-
-
-def verify_otp_code(email: str, code: str, purpose: str = "password_reset") -> tuple[bool, str]:
-    """
-    Verify the OTP code for the given email.
-    Returns (success: bool, message: str)
-    """
-    try:
+    def verify(self, email: str, code: str, purpose: str) -> tuple[bool, str]:
         with rx.session() as session:
             otp_record = session.exec(
                 select(OTPVerification).where(
@@ -82,7 +64,7 @@ def verify_otp_code(email: str, code: str, purpose: str = "password_reset") -> t
                 return False, "OTP has expired. Please request a new one."
 
             # Check attempt count
-            if otp_record.attempts >= 3:
+            if otp_record.attempts >= MAX_ATTEMPTS:
                 return False, "Maximum verification attempts exceeded. Please request a new OTP."
 
             # Increment attempts
@@ -91,36 +73,128 @@ def verify_otp_code(email: str, code: str, purpose: str = "password_reset") -> t
             # Verify code
             if otp_record.otp_code != code:
                 session.commit()
-                remaining = 3 - otp_record.attempts
+                remaining = MAX_ATTEMPTS - otp_record.attempts
                 return False, f"Invalid OTP. {remaining} attempt(s) remaining."
 
             # Mark as used
             otp_record.is_used = True
             session.commit()
+            return True, "OTP verified successfully"
+
+    def cleanup(self) -> int:
+        with job_session("otp_cleanup") as session:
+            result = session.execute(
+                delete(OTPVerification).where(OTPVerification.expires_at < datetime.utcnow())
+            )
+            session.commit()
+            return result.rowcount or 0
 
-            logging.info(f"OTP verified successfully for {email}")
+
+class MemoryOTPStore:
+    """
+    In-process OTP store with TTL expiry and a hard size bound.
+    Only suitable for a single worker process; OTPs are lost on restart.
+    """
+
+    def __init__(self, max_entries: int = OTP_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (email, purpose) -> [otp_code, expires_at, attempts, is_used]
+        self._entries: Dict[Tuple[str, str], list] = {}
+
+    def issue(self, email: str, purpose: str, otp_code: str, expires_at: datetime):
+        key = (email, purpose)
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                self._sweep()
+            while len(self._entries) >= self.max_entries:
+                # Evict the oldest issued OTP
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = [otp_code, expires_at, 0, False]
+
+    def verify(self, email: str, code: str, purpose: str) -> tuple[bool, str]:
+        with self._lock:
+            entry = self._entries.get((email, purpose))
+            if not entry or entry[3]:
+                return False, "No valid OTP found. Please request a new one."
+            if datetime.utcnow() > entry[1]:
+                return False, "OTP has expired. Please request a new one."
+            if entry[2] >= MAX_ATTEMPTS:
+                return False, "Maximum verification attempts exceeded. Please request a new OTP."
+            entry[2] += 1
+            if entry[0] != code:
+                return False, f"Invalid OTP. {MAX_ATTEMPTS - entry[2]} attempt(s) remaining."
+            entry[3] = True
             return True, "OTP verified successfully"
 
+    def _sweep(self) -> int:
+        now = datetime.utcnow()
+        expired = [key for key, entry in self._entries.items() if entry[1] < now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    def cleanup(self) -> int:
+        with self._lock:
+            return self._sweep()
+
+
+_store = MemoryOTPStore() if OTP_BACKEND == "memory" else DatabaseOTPStore()
+
+
+def get_store():
+    """The configured OTP store (OTP_BACKEND=db or memory)."""
+    return _store
+
+
+def create_otp_record(email: str, purpose: str = "password_reset") -> Optional[str]:
+    """
+    Create an OTP record for the given email.
+    Returns the generated OTP code or None if user doesn't exist (for password reset).
+    """
+    try:
+        # For password reset, verify user exists
+        if purpose == "password_reset" and not session_service.get_user_id(email):
+            logging.warning(f"OTP request for non-existent email: {email}")
+            return None
+
+        # Generate new OTP, replacing any earlier one for this email
+        otp_code = generate_otp()
+        expires_at = datetime.utcnow() + timedelta(minutes=OTP_TTL_MINUTES)
+        _store.issue(email, purpose, otp_code, expires_at)
+
+        logging.info(f"OTP generated for {email}: {otp_code} (expires at {expires_at})")
+        return otp_code
+
+    except Exception as e:
+        logging.exception(f"Error creating OTP record: {e}")
+        return None
+
+
+def verify_otp_code(email: str, code: str, purpose: str = "password_reset") -> tuple[bool, str]:
+    """
+    Verify the OTP code for the given email.
+    Returns (success: bool, message: str)
+    """
+    try:
+        success, message = _store.verify(email, code, purpose)
+        if success:
+            logging.info(f"OTP verified successfully for {email}")
+        return success, message
+
     except Exception as e:
         logging.exception(f"Error verifying OTP: {e}")
         return False, "An error occurred during verification."
 
 
 def cleanup_expired_otps():
-    """Remove expired OTP records from the database."""
+    """Remove expired OTPs with a single bulk delete (scheduled by start_scheduler)."""
     try:
-        with rx.session() as session:
-            expired_otps = session.exec(
-                select(OTPVerification).where(
-                    OTPVerification.expires_at < datetime.utcnow()
-                )
-            ).all()
-
-            for otp in expired_otps:
-                session.delete(otp)
-
-            session.commit()
-            logging.info(f"Cleaned up {len(expired_otps)} expired OTP records")
+        removed = _store.cleanup()
+        logging.info(f"Cleaned up {removed} expired OTP records")
+        return removed
 
     except Exception as e:
         logging.exception(f"Error cleaning up expired OTPs: {e}")
+        return 0
@@ -0,0 +1,92 @@
+"""Password hashing service: bcrypt with a tunable cost, run in a dedicated thread pool."""
+import asyncio
+import hmac
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt cost factor; each +1 doubles the time per hash
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads reserved for hashing; bcrypt releases the GIL, so these run in parallel
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+# bcrypt only looks at the first 72 bytes; truncate explicitly so every bcrypt version agrees
+BCRYPT_MAX_BYTES = 72
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def is_bcrypt_hash(stored: str) -> bool:
+    return bool(stored) and stored.startswith(BCRYPT_PREFIXES)
+
+
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """Hash a password on the calling thread (for scripts; use hash_password in handlers)."""
+    import bcrypt
+
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def verify_password_sync(password: str, stored: str) -> bool:
+    """
+    Check a password against a stored value on the calling thread.
+    Rows written before hashing was introduced hold the plain password and are compared in constant time.
+    """
+    if not stored:
+        return False
+    if is_bcrypt_hash(stored):
+        import bcrypt
+
+        try:
+            return bcrypt.checkpw(_encode(password), stored.encode("utf-8"))
+        except ValueError:
+            logging.warning("PasswordService: Malformed bcrypt hash")
+            return False
+    return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+
+
+def needs_rehash(stored: str) -> bool:
+    """True for plaintext rows and for hashes below the configured cost."""
+    if not is_bcrypt_hash(stored):
+        return True
+    try:
+        return int(stored.split("$")[2]) < BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the hashing thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password_sync, password)
+
+
+async def verify_password(password: str, stored: str) -> bool:
+    """Verify a password in the hashing thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password_sync, password, stored)
+
+
+async def verify_and_upgrade(session, user, password: str) -> bool:
+    """
+    Verify a user's password and, on success, migrate a plaintext or weaker hash
+    to the current bcrypt cost. The new hash is committed through the given session.
+    """
+    stored = user.password_hash
+    if not await verify_password(password, stored):
+        return False
+    if needs_rehash(stored):
+        user.password_hash = await hash_password(password)
+        session.add(user)
+        session.commit()
+        logging.info(f"PasswordService: Rehashed password for user {user.id}")
+    return True
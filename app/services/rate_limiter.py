@@ -0,0 +1,198 @@
+"""
+Token-Bucket Rate Limiter
+Per-key throttling for OTP issuance, logins and the booking API, with rejection metrics
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# memory (per process) or redis (shared by every worker, requires the redis package)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    retry_after: float = 0.0
+    key: Optional[str] = None
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process. Full, idle buckets are swept once the table grows."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, last_refill_monotonic, refill_per_second, capacity)
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+
+    def take(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take `cost` tokens if available. Returns (allowed, tokens left)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._sweep(now)
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, refill_per_second, capacity)
+            return allowed, tokens
+
+    def _sweep(self, now: float):
+        full = [
+            key for key, (tokens, last, rate, capacity) in self._buckets.items()
+            if tokens + (now - last) * rate >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+        # Still full of active keys: drop the oldest half rather than grow without bound
+        if len(self._buckets) >= self.max_keys:
+            for key in list(self._buckets)[: self.max_keys // 2]:
+                del self._buckets[key]
+
+
+class RedisBucketStore:
+    """Token buckets in Redis, updated atomically by a Lua script so all workers share limits."""
+
+    SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 't'))
+local last = tonumber(redis.call('HGET', KEYS[1], 'ts'))
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+end
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, client, prefix: str = "parkmycar:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    def take(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, tokens = self._script(
+            keys=[self.prefix + key],
+            args=[capacity, refill_per_second, time.time(), cost],
+        )
+        return bool(int(allowed)), float(tokens)
+
+
+_store_lock = threading.Lock()
+_store = None
+
+
+def _create_store():
+    if RATE_LIMIT_BACKEND == "redis":
+        try:
+            import redis
+
+            return RedisBucketStore(redis.Redis.from_url(REDIS_URL))
+        except Exception as e:
+            logging.error(f"RateLimiter: Redis unavailable ({e}), falling back to in-memory buckets")
+    return MemoryBucketStore()
+
+
+def get_store():
+    """Get the bucket store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+                logging.info(f"RateLimiter: Using {type(_store).__name__}")
+    return _store
+
+
+def set_store(store):
+    """Replace the bucket store (e.g. with a shared backend, or a fresh one in tests)."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+
+def _record(limiter: str, outcome: str):
+    with _metrics_lock:
+        _metrics[limiter][outcome] += 1
+
+
+def get_metrics() -> Dict[str, Dict[str, int]]:
+    """Allowed/rejected counts per limiter, with rejections broken down by key type."""
+    with _metrics_lock:
+        return {name: dict(counts) for name, counts in _metrics.items()}
+
+
+class RateLimiter:
+    """
+    A named set of token-bucket rules, one per key type (e.g. email and ip).
+    Each rule allows `capacity` requests in a burst, refilled evenly over `per_seconds`.
+    """
+
+    def __init__(self, name: str, **rules: Tuple[int, float]):
+        self.name = name
+        self.rules = {
+            key_type: (float(capacity), capacity / per_seconds)
+            for key_type, (capacity, per_seconds) in rules.items()
+        }
+
+    def hit(self, **keys: Optional[str]) -> RateLimitResult:
+        """
+        Count one request against every given key, e.g. hit(email=..., ip=...).
+        Missing keys are skipped; the first exhausted bucket rejects the request.
+        """
+        store = get_store()
+        for key_type, value in keys.items():
+            if not value or key_type not in self.rules:
+                continue
+            capacity, rate = self.rules[key_type]
+            bucket_key = f"{self.name}:{key_type}:{str(value).lower()}"
+            try:
+                allowed, tokens = store.take(bucket_key, capacity, rate)
+            except Exception as e:
+                # Never lock users out because the limiter's storage is down
+                logging.error(f"RateLimiter: {self.name} store error: {e}")
+                continue
+            if not allowed:
+                _record(self.name, "rejected")
+                _record(self.name, f"rejected_{key_type}")
+                logging.warning(f"RateLimiter: {self.name} rejected {key_type}={value}")
+                return RateLimitResult(False, math.ceil((1.0 - tokens) / rate), key_type)
+        _record(self.name, "allowed")
+        return RateLimitResult(True)
+
+
+# OTP emails: 3 per email per 10 minutes, 10 per client IP per 10 minutes
+otp_limiter = RateLimiter("otp", email=(3, 600), ip=(10, 600))
+# Password logins: 5 per email per minute, 20 per client IP per minute
+login_limiter = RateLimiter("login", email=(5, 60), ip=(20, 60))
+# POST /api/bookings: 10 per email per minute, 30 per client IP per minute
+booking_api_limiter = RateLimiter("booking_api", email=(10, 60), ip=(30, 60))
@@ -0,0 +1,281 @@
+"""
+Refund Gateway Client
+Async RinggitPay refund client with bounded concurrency, idempotency keys, jittered retries and a circuit breaker
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+import weakref
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# fake (in-process stand-in, the default until the gateway is integrated) or http
+REFUND_GATEWAY_BACKEND = os.getenv("REFUND_GATEWAY_BACKEND", "fake")
+REFUND_GATEWAY_URL = os.getenv("REFUND_GATEWAY_URL", "")
+REFUND_GATEWAY_API_KEY = os.getenv("REFUND_GATEWAY_API_KEY", "")
+# Refund requests in flight at once, per process
+REFUND_GATEWAY_CONCURRENCY = int(os.getenv("REFUND_GATEWAY_CONCURRENCY", "8"))
+REFUND_GATEWAY_MAX_RETRIES = int(os.getenv("REFUND_GATEWAY_MAX_RETRIES", "3"))
+REFUND_GATEWAY_TIMEOUT_SECONDS = float(os.getenv("REFUND_GATEWAY_TIMEOUT_SECONDS", "10"))
+# Consecutive failures that open the circuit, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+RETRY_BASE_SECONDS = 0.2
+RETRY_MAX_SECONDS = 5.0
+
+
+class RefundResult(NamedTuple):
+    success: bool
+    refund_id: Optional[str]
+    status: str  # Completed, Declined, Failed
+    message: str
+    idempotency_key: str
+
+
+class RefundGatewayError(Exception):
+    """Transient gateway failure (timeout, 5xx, rate limited); safe to retry with the same key."""
+
+
+class RefundDeclined(Exception):
+    """The gateway refused the refund; retrying will not help."""
+
+
+def new_idempotency_key(booking_id: int) -> str:
+    return f"refund-{booking_id}-{uuid.uuid4().hex[:12]}"
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `reset_seconds` lets one trial call through."""
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back the half-open trial slot when a call ends without a verdict (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logging.warning(f"RefundGateway: Circuit opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+
+
+class FakeRefundGateway:
+    """
+    In-process stand-in for the gateway, for development and tests.
+    Replays the stored result for a repeated idempotency key, so a key is refunded at most once,
+    and can simulate latency, transient failures and a gateway-side concurrency limit.
+    """
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.02, max_concurrency: Optional[int] = None,
+                 seed: Optional[int] = None, fail_first: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_concurrency = max_concurrency
+        # The first `fail_first` requests fail transiently, for deterministic retry tests
+        self.fail_first = fail_first
+        self._random = random.Random(seed)
+        self._results: Dict[str, Tuple[str, float]] = {}  # idempotency key -> (refund_id, amount)
+        self._in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+
+    @property
+    def refunds_issued(self) -> int:
+        return len(self._results)
+
+    async def refund(self, transaction_id: str, amount: float, reason: str, idempotency_key: str) -> str:
+        self.requests += 1
+        if self.max_concurrency is not None and self._in_flight >= self.max_concurrency:
+            raise RefundGatewayError("429 Too Many Requests")
+        self._in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if amount <= 0:
+                raise RefundDeclined("Refund amount must be positive")
+            if idempotency_key in self._results:
+                return self._results[idempotency_key][0]
+            if self.requests <= self.fail_first or self._random.random() < self.failure_rate:
+                raise RefundGatewayError("502 Bad Gateway")
+            refund_id = f"RFD_{uuid.uuid4().hex[:8].upper()}"
+            self._results[idempotency_key] = (refund_id, amount)
+            logging.info(f"[FAKE GATEWAY] Refunded RM {amount:.2f} for {transaction_id} ({refund_id})")
+            return refund_id
+        finally:
+            self._in_flight -= 1
+
+
+class HttpRefundGateway:
+    """RinggitPay refund endpoint over HTTP; the idempotency key travels in the Idempotency-Key header."""
+
+    def __init__(self, base_url: str, api_key: str, timeout: float = REFUND_GATEWAY_TIMEOUT_SECONDS):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        # An AsyncClient's connection pool belongs to one event loop: Reflex handlers and each
+        # lot closure run on different loops, so keep one client per loop
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        return client
+
+    async def refund(self, transaction_id: str, amount: float, reason: str, idempotency_key: str) -> str:
+        import httpx
+
+        try:
+            response = await self._client().post(
+                "/refunds",
+                json={"transaction_id": transaction_id, "amount": round(amount, 2), "reason": reason},
+                headers={"Idempotency-Key": idempotency_key},
+            )
+        except httpx.HTTPError as e:
+            raise RefundGatewayError(str(e)) from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RefundGatewayError(f"{response.status_code} {response.text[:200]}")
+        if response.status_code >= 400:
+            raise RefundDeclined(f"{response.status_code} {response.text[:200]}")
+        try:
+            return response.json()["refund_id"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise RefundGatewayError(f"Malformed gateway response: {response.text[:200]}") from e
+
+
+class RefundGatewayClient:
+    """Wraps a gateway transport with a concurrency limit, retries with full jitter and a circuit breaker."""
+
+    def __init__(self, transport, concurrency: int = REFUND_GATEWAY_CONCURRENCY,
+                 max_retries: int = REFUND_GATEWAY_MAX_RETRIES, breaker: Optional[CircuitBreaker] = None):
+        self.transport = transport
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        # One semaphore per event loop: handlers and background jobs run on different loops
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def refund(self, transaction_id: str, amount: float, reason: str, idempotency_key: str) -> RefundResult:
+        """
+        Refund `amount` against a transaction. Every attempt reuses `idempotency_key`, so retries
+        (or a later call with the key stored on the booking) never refund twice.
+        """
+        async with self._semaphore():
+            for attempt in range(self.max_retries + 1):
+                if not self.breaker.allow():
+                    return RefundResult(False, None, "Failed", "Refund gateway unavailable (circuit open)", idempotency_key)
+                try:
+                    refund_id = await self.transport.refund(transaction_id, amount, reason, idempotency_key)
+                except RefundDeclined as e:
+                    # A decline is an answer, not an outage
+                    self.breaker.record_success()
+                    logging.warning(f"RefundGateway: Declined {idempotency_key}: {e}")
+                    return RefundResult(False, None, "Declined", str(e), idempotency_key)
+                except Exception as e:
+                    # Anything but a decline counts against the breaker; the key makes a retry safe
+                    self.breaker.record_failure()
+                    if isinstance(e, RefundGatewayError):
+                        logging.warning(f"RefundGateway: Attempt {attempt + 1} for {idempotency_key} failed: {e}")
+                    else:
+                        logging.exception(f"RefundGateway: Attempt {attempt + 1} for {idempotency_key} raised: {e}")
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)))
+                    continue
+                except BaseException:
+                    # Cancelled mid-call: no verdict, but a half-open trial must not stay claimed
+                    self.breaker.release_trial()
+                    raise
+                self.breaker.record_success()
+                return RefundResult(True, refund_id, "Completed", "Refund processed successfully", idempotency_key)
+        return RefundResult(False, None, "Failed", "Payment gateway error - please try again", idempotency_key)
+
+    async def refund_many(self, requests: Iterable[Tuple[str, float, str, str]]) -> List[RefundResult]:
+        """Run (transaction_id, amount, reason, idempotency_key) refunds concurrently, up to the limit."""
+        return list(await asyncio.gather(*(self.refund(*request) for request in requests)))
+
+
+_client_lock = threading.Lock()
+_client: Optional[RefundGatewayClient] = None
+
+
+def _create_transport():
+    if REFUND_GATEWAY_BACKEND == "http":
+        if REFUND_GATEWAY_URL:
+            return HttpRefundGateway(REFUND_GATEWAY_URL, REFUND_GATEWAY_API_KEY)
+        logging.error("RefundGateway: REFUND_GATEWAY_URL is not set, using the fake gateway")
+    return FakeRefundGateway()
+
+
+def get_client() -> RefundGatewayClient:
+    """The process-wide refund client, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RefundGatewayClient(_create_transport())
+                logging.info(f"RefundGateway: Using {type(_client.transport).__name__}")
+    return _client
+
+
+def set_client(client: RefundGatewayClient):
+    """Replace the refund client (e.g. one wrapping a FakeRefundGateway in tests)."""
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,243 @@
+"""
+Auto-Booking Rule Engine
+Runs every active BookingRule for a target date in bulk against one occupancy snapshot per lot
+"""
+
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from sqlmodel import select, update
+from app.db.database import job_session
+from app.db.models import Booking, BookingRule, User
+from app.services import lot_catalog, slot_allocator
+
+load_dotenv()
+
+# Rules read and bookings committed per transaction
+RULE_BATCH_SIZE = int(os.getenv("RULE_ENGINE_BATCH_SIZE", "2000"))
+# Threads sending confirmation emails once a batch has committed
+RULE_EMAIL_WORKERS = int(os.getenv("RULE_ENGINE_EMAIL_WORKERS", "4"))
+# Hour (server time) of the nightly run that books tomorrow's rules
+RULE_ENGINE_HOUR = int(os.getenv("RULE_ENGINE_HOUR", "1"))
+
+AUTO_PAYMENT_STATUS = "Paid (Auto)"
+
+# BookingRule.days_mask bit order: Mon = 1, Tue = 2, ... Sun = 64
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+_email_executor = ThreadPoolExecutor(max_workers=RULE_EMAIL_WORKERS, thread_name_prefix="rule-email")
+
+
+class RuleRunResult(NamedTuple):
+    target_date: str
+    created: int
+    substituted: int
+    already_booked: int
+    full: List[str]
+    invalid: int
+
+
+def days_to_mask(days: Iterable[str]) -> int:
+    """["Mon", "Wed"] -> 0b0000101. Unknown day names are ignored."""
+    mask = 0
+    for day in days:
+        day = day.strip()
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
+def masks_for_weekday(weekday: int) -> List[int]:
+    """Every 7-bit mask containing `weekday` (0 = Mon), so the lookup stays an indexed IN."""
+    bit = 1 << weekday
+    return [mask for mask in range(1 << len(WEEKDAYS)) if mask & bit]
+
+
+def resolve_rule_lot(location: str) -> Optional[lot_catalog.LotRecord]:
+    """Lot for a rule's "Name - Location" string, or None if it does not match one."""
+    try:
+        lot_name, lot_loc = location.split(" - ", 1)
+    except ValueError:
+        return None
+    return lot_catalog.find_lot(lot_name, lot_loc)
+
+
+def _resolve_lot(rule: BookingRule, lots: Dict[str, Optional[lot_catalog.LotRecord]]):
+    """The rule's lot by id; rules saved before lot_id existed fall back to their location string."""
+    if rule.lot_id:
+        return lot_catalog.get_lot(rule.lot_id)
+    if rule.location not in lots:
+        lots[rule.location] = resolve_rule_lot(rule.location)
+    return lots[rule.location]
+
+
+def _parse_duration(duration: str) -> Optional[int]:
+    try:
+        return int(duration.split(" ")[0])
+    except (ValueError, IndexError):
+        return None
+
+
+def _send_confirmation(email: str, details: dict):
+    try:
+        from app.services.email_service import send_booking_confirmation_email
+
+        send_booking_confirmation_email(email, details)
+    except Exception as e:
+        logging.error(f"RuleEngine: Failed to send confirmation to {email}: {e}")
+
+
+def run_rules(target_date: Optional[date] = None, user_id: Optional[int] = None,
+              batch_size: int = RULE_BATCH_SIZE) -> RuleRunResult:
+    """
+    Create bookings for every active rule that applies to `target_date` (default tomorrow),
+    optionally for a single user. Rules are read in id order, `batch_size` at a time; each batch
+    is committed in one transaction and its confirmation emails are queued after the commit.
+    """
+    target_day = target_date or (datetime.now() + timedelta(days=1)).date()
+    target = target_day.strftime("%Y-%m-%d")
+    due_masks = masks_for_weekday(target_day.weekday())
+    next_run = (target_day + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    lots: Dict[str, Optional[lot_catalog.LotRecord]] = {}
+    occupancy: Dict[int, slot_allocator.Occupancy] = {}
+    booked: Set[Tuple[int, int, str]] = set()  # (lot_id, user_id, start_time)
+    created = substituted = already_booked = invalid = 0
+    full: List[str] = []
+    last_id = 0
+
+    with job_session("rule_engine") as session:
+        while True:
+            query = (
+                select(BookingRule)
+                .where(BookingRule.status == "Active")
+                .where(BookingRule.days_mask.in_(due_masks))
+                .where(BookingRule.id > last_id)
+                .order_by(BookingRule.id)
+                .limit(batch_size)
+            )
+            if user_id is not None:
+                query = query.where(BookingRule.user_id == user_id)
+            rules = session.exec(query).all()
+            if not rules:
+                break
+            last_id = rules[-1].id
+
+            new_lots = {
+                lot.id for lot in (_resolve_lot(rule, lots) for rule in rules)
+                if lot and lot.is_active and lot.id not in occupancy
+            }
+            if new_lots:
+                occupancy.update(slot_allocator.load_occupancy(session, target, new_lots, booked))
+                for lot_id in new_lots:
+                    occupancy.setdefault(lot_id, {})
+
+            user_ids = {rule.user_id for rule in rules}
+            users = {
+                row.id: row for row in session.exec(
+                    select(User.id, User.email, User.name, User.phone).where(User.id.in_(list(user_ids)))
+                ).all()
+            } if user_ids else {}
+
+            # Collect this batch's demands per lot, then solve each lot in one pass
+            demands: Dict[int, List[slot_allocator.SlotDemand]] = defaultdict(list)
+            batch_rules: Dict[int, Tuple[BookingRule, lot_catalog.LotRecord, int]] = {}
+            for rule in rules:
+                lot = _resolve_lot(rule, lots)
+                duration = _parse_duration(rule.duration)
+                try:
+                    start = slot_allocator.to_minutes(rule.time)
+                except (ValueError, AttributeError):
+                    start = None
+                if not lot or not lot.is_active or not duration or start is None or rule.user_id not in users:
+                    invalid += 1
+                    continue
+                if (lot.id, rule.user_id, rule.time) in booked:
+                    already_booked += 1
+                    continue
+                booked.add((lot.id, rule.user_id, rule.time))
+                demands[lot.id].append(slot_allocator.SlotDemand(rule.id, start, start + duration * 60, rule.slot_id))
+                batch_rules[rule.id] = (rule, lot, duration)
+
+            bookings: List[Booking] = []
+            booked_rule_ids: List[int] = []
+            emails: List[Tuple[str, dict]] = []
+
+            for lot_id, lot_demands in demands.items():
+                lot_occupancy = occupancy[lot_id]
+                total_spots = batch_rules[lot_demands[0].key][1].total_spots
+                allocation = slot_allocator.allocate(lot_demands, total_spots, lot_occupancy)
+                for demand in lot_demands:
+                    rule, lot, duration = batch_rules[demand.key]
+                    slot_id = allocation.assigned.get(demand.key)
+                    if slot_id is None:
+                        booked.discard((lot.id, rule.user_id, rule.time))
+                        full.append(rule.location)
+                        continue
+                    slot_allocator.add_interval(lot_occupancy, slot_id, demand.start, demand.end)
+                    if rule.slot_id and slot_id != rule.slot_id:
+                        substituted += 1
+
+                    user = users[rule.user_id]
+                    total_price = lot.price_per_hour * duration
+                    vehicle_number = rule.vehicle_number or "AUTO-CAR"
+                    bookings.append(Booking(
+                        lot_id=lot.id,
+                        user_id=rule.user_id,
+                        start_date=target,
+                        start_time=rule.time,
+                        duration_hours=duration,
+                        total_price=total_price,
+                        status="Confirmed",
+                        payment_status=AUTO_PAYMENT_STATUS,
+                        created_at=datetime.now(),
+                        slot_id=slot_id,
+                        vehicle_number=vehicle_number,
+                        phone_number=rule.phone_number or user.phone or "N/A",
+                    ))
+                    booked_rule_ids.append(rule.id)
+                    emails.append((user.email, {
+                        "user_name": user.name or "User",
+                        "lot_name": lot.name,
+                        "start_date": target,
+                        "start_time": rule.time,
+                        "duration": duration,
+                        "slot_id": slot_id,
+                        "vehicle_number": vehicle_number,
+                        "total_price": total_price,
+                        "payment_status": AUTO_PAYMENT_STATUS,
+                    }))
+
+            if bookings:
+                session.add_all(bookings)
+                session.exec(
+                    update(BookingRule)
+                    .where(BookingRule.id.in_(booked_rule_ids))
+                    .values(next_run=next_run)
+                )
+                session.commit()
+                created += len(bookings)
+                for email, details in emails:
+                    _email_executor.submit(_send_confirmation, email, details)
+            # Drop the batch's rule objects before reading the next one
+            session.expunge_all()
+
+    result = RuleRunResult(target, created, substituted, already_booked, full, invalid)
+    logging.info(
+        f"RuleEngine: {target} created={created} substituted={substituted} "
+        f"already_booked={already_booked} full={len(full)} invalid={invalid}"
+    )
+    return result
+
+
+def run_nightly_rules():
+    """Scheduler job: book tomorrow's slots for every user's active rules."""
+    try:
+        run_rules()
+    except Exception as e:
+        logging.exception(f"RuleEngine: Nightly run failed: {e}")
@@ -0,0 +1,121 @@
+"""Signed session tokens and a per-process user profile cache."""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import reflex as rx
+from dotenv import load_dotenv
+from sqlmodel import select
+from app.db.models import User
+
+load_dotenv()
+
+SESSION_SECRET = os.getenv("SESSION_SECRET", "")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_HOURS", "168")) * 3600
+USER_CACHE_TTL_SECONDS = 300
+
+if not SESSION_SECRET:
+    # `reflex run --env prod` sets REFLEX_ENV_MODE; a forgeable secret must never reach production
+    if os.getenv("REFLEX_ENV_MODE", "dev") == "prod":
+        raise RuntimeError("SESSION_SECRET must be set in production")
+    logging.warning(
+        "SESSION_SECRET is not set; using a random per-process secret, so sessions will not "
+        "survive a restart or be shared between workers"
+    )
+    SESSION_SECRET = secrets.token_hex(32)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(SESSION_SECRET.encode(), payload.encode("ascii"), hashlib.sha256).digest()
+    return _b64encode(digest)
+
+
+def profile_from_user(user: User) -> Dict:
+    """Profile snapshot carried in the session token and the user cache."""
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "phone": user.phone or "",
+        "member_since": user.member_since.strftime("%b %Y") if user.member_since else "",
+        "avatar_url": user.avatar_url,
+    }
+
+
+def issue_token(profile: Dict) -> str:
+    """Create a signed session token carrying the user id and a profile snapshot."""
+    _cache_put(profile)
+    claims = {"profile": profile, "exp": int(time.time()) + SESSION_TTL_SECONDS}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token: str) -> Optional[Dict]:
+    """Return the profile snapshot of a valid, unexpired token, or None. No DB access."""
+    if not token or "." not in token:
+        return None
+    payload, signature = token.rsplit(".", 1)
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    return claims.get("profile")
+
+
+# Per-process user cache: email -> (expires_at, profile)
+_cache_lock = threading.Lock()
+_user_cache: Dict[str, Tuple[float, Dict]] = {}
+
+
+def _cache_put(profile: Dict):
+    with _cache_lock:
+        _user_cache[profile["email"]] = (time.monotonic() + USER_CACHE_TTL_SECONDS, profile)
+
+
+def get_user_profile(email: str) -> Optional[Dict]:
+    """Profile for an email, served from the per-process cache when fresh."""
+    if not email:
+        return None
+    with _cache_lock:
+        entry = _user_cache.get(email)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    with rx.session() as session:
+        user = session.exec(select(User).where(User.email == email)).first()
+        if not user:
+            return None
+        profile = profile_from_user(user)
+    _cache_put(profile)
+    return profile
+
+
+def get_user_id(email: str) -> Optional[int]:
+    """User id for an email, served from the per-process cache when fresh."""
+    profile = get_user_profile(email)
+    return profile["id"] if profile else None
+
+
+def invalidate_user(email: str):
+    """Drop a cached profile after the user row changes."""
+    with _cache_lock:
+        _user_cache.pop(email, None)
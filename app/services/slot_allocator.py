@@ -0,0 +1,193 @@
+"""
+Slot Allocation Solver
+Assigns slots to a window of booking demands in one pass by interval coloring, honoring preferred slots
+"""
+
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlmodel import select
+from app.db.models import Booking
+
+# Slots are laid out in zones of this many (A1-A10, B1-B10, ...), as in the booking UI
+SLOTS_PER_ZONE = 10
+
+# slot -> sorted, non-overlapping (start_minute, end_minute) intervals already taken
+Occupancy = Dict[str, List[Tuple[int, int]]]
+
+
+class SlotDemand(NamedTuple):
+    key: Hashable
+    start: int  # minutes from midnight
+    end: int
+    preferred: Optional[str] = None
+
+
+class Allocation(NamedTuple):
+    assigned: Dict[Hashable, str]
+    honored: int  # demands that got their preferred slot
+    unmet: List[Hashable]
+
+
+def _zone_name(zone: int) -> str:
+    name = ""
+    zone += 1
+    while zone:
+        zone, rem = divmod(zone - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+
+def slot_name(index: int) -> str:
+    """0 -> A1, 9 -> A10, 10 -> B1, ..., 260 -> AA1."""
+    zone, position = divmod(index, SLOTS_PER_ZONE)
+    return f"{_zone_name(zone)}{position + 1}"
+
+
+def lot_slots(total_spots: int) -> List[str]:
+    return [slot_name(i) for i in range(total_spots)]
+
+
+def to_minutes(start_time: str) -> int:
+    hours, minutes = start_time.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _overlaps(intervals: List[Tuple[int, int]], start: int, end: int) -> bool:
+    i = bisect_left(intervals, (start, start))
+    if i > 0 and intervals[i - 1][1] > start:
+        return True
+    return i < len(intervals) and intervals[i][0] < end
+
+
+def add_interval(occupancy: Occupancy, slot: str, start: int, end: int):
+    """Record a taken interval so later allocations in the same window see it."""
+    intervals = occupancy.setdefault(slot, [])
+    intervals.insert(bisect_left(intervals, (start, end)), (start, end))
+
+
+def allocate(demands: Iterable[SlotDemand], total_spots: int,
+             occupancy: Optional[Occupancy] = None) -> Allocation:
+    """
+    Assign a slot to each demand without overlapping another demand or an existing booking.
+
+    Demands are swept in start order; a slot returns to the free pool when its last demand ends,
+    so the number of slots in use never exceeds the peak overlap (optimal interval coloring).
+    Demands that start together are assigned in two passes, preferred slots first, and a
+    demand without a usable preference takes a free slot nobody else in the window asked for
+    where one exists. Existing bookings in `occupancy` are respected but not moved.
+    """
+    occupancy = occupancy or {}
+    slots = lot_slots(total_spots)
+    index = {slot: i for i, slot in enumerate(slots)}
+
+    pending = sorted(demands, key=lambda d: (d.start, d.end))
+    wanted: Dict[str, int] = defaultdict(int)
+    for demand in pending:
+        if demand.preferred in index:
+            wanted[demand.preferred] += 1
+
+    free = list(range(total_spots))  # min-heap of slot indexes
+    in_free: Set[int] = set(free)
+    busy: List[Tuple[int, int]] = []  # (end, slot index)
+    assigned: Dict[Hashable, str] = {}
+    unmet: List[Hashable] = []
+    honored = 0
+
+    def usable(i: int, demand: SlotDemand) -> bool:
+        intervals = occupancy.get(slots[i])
+        return not intervals or not _overlaps(intervals, demand.start, demand.end)
+
+    def take(i: int, demand: SlotDemand):
+        in_free.discard(i)
+        heapq.heappush(busy, (demand.end, i))
+        assigned[demand.key] = slots[i]
+
+    def take_any(demand: SlotDemand) -> bool:
+        skipped: List[int] = []
+        seen: Set[int] = set()
+        fallback = None
+        found = None
+        while free:
+            i = heapq.heappop(free)
+            if i not in in_free or i in seen:
+                continue  # stale or duplicate entry left by a preferred-slot take
+            skipped.append(i)
+            seen.add(i)
+            if not usable(i, demand):
+                continue
+            if wanted[slots[i]] == 0:
+                found = i
+                break
+            if fallback is None:
+                fallback = i
+        choice = found if found is not None else fallback
+        for i in skipped:
+            if i != choice:
+                heapq.heappush(free, i)
+        if choice is None:
+            return False
+        take(choice, demand)
+        return True
+
+    position = 0
+    while position < len(pending):
+        start = pending[position].start
+        window = []
+        while position < len(pending) and pending[position].start == start:
+            window.append(pending[position])
+            position += 1
+
+        while busy and busy[0][0] <= start:
+            _, i = heapq.heappop(busy)
+            in_free.add(i)
+            heapq.heappush(free, i)
+
+        rest = []
+        for demand in window:
+            if demand.preferred in index:
+                wanted[demand.preferred] -= 1
+                i = index[demand.preferred]
+                if i in in_free and usable(i, demand):
+                    take(i, demand)
+                    honored += 1
+                    continue
+            rest.append(demand)
+
+        for demand in rest:
+            if not take_any(demand):
+                unmet.append(demand.key)
+
+    return Allocation(assigned, honored, unmet)
+
+
+def load_occupancy(session, target_date: str, lot_ids: Iterable[int],
+                   booked: Optional[Set[Tuple[int, int, str]]] = None) -> Dict[int, Occupancy]:
+    """
+    Slot intervals taken by live bookings on `target_date`, per lot, in one query.
+    If `booked` is given it also collects (lot_id, user_id, start_time) of those bookings.
+    """
+    occupancy: Dict[int, Occupancy] = defaultdict(dict)
+    lot_ids = list(lot_ids)
+    if not lot_ids:
+        return occupancy
+    rows = session.exec(
+        select(Booking.lot_id, Booking.user_id, Booking.slot_id, Booking.start_time, Booking.duration_hours).where(
+            Booking.start_date == target_date,
+            Booking.status != "Cancelled",
+            Booking.lot_id.in_(lot_ids),
+        )
+    ).all()
+    for lot_id, user_id, slot_id, start_time, duration_hours in rows:
+        if booked is not None:
+            booked.add((lot_id, user_id, start_time))
+        if not slot_id:
+            continue
+        try:
+            start = to_minutes(start_time)
+        except ValueError:
+            continue
+        add_interval(occupancy[lot_id], slot_id, start, start + duration_hours * 60)
+    return occupancy
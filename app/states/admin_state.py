@@ -3,6 +3,8 @@ import reflex as rx
 import logging
 from sqlmodel import select
 from app.db.models import User as DBUser, Booking as DBBooking, ParkingLot as DBParkingLot
+from app.services import password_service
+from app.services.rate_limiter import login_limiter
 from datetime import datetime
 
 
@@ -29,6 +31,11 @@ class AdminState(rx.State):
         if not email or not password:
             self.login_error = "Please enter both email and password"
             return
+
+        limit = login_limiter.hit(email=email, ip=self.router.session.client_ip)
+        if not limit.allowed:
+            self.login_error = f"Too many login attempts. Please try again in {int(limit.retry_after)} seconds."
+            return
         
         try:
             with rx.session() as session:
@@ -46,9 +53,8 @@ class AdminState(rx.State):
                     self.login_error = "Access denied. Admin privileges required."
                     return
                 
-                # Verify password (use proper password hashing in production)
-                import bcrypt
-                if bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
+                # Verify password in the hashing thread pool
+                if await password_service.verify_and_upgrade(session, user, password):
                     self.admin_email = email
                     self.admin_name = user.name
                     self.is_admin_logged_in = True
@@ -6,11 +6,16 @@ import logging
 from sqlmodel import select
 from app.states.user_state import UserState
 from app.db.models import User as DBUser
+from app.services import password_service
+from app.services.rate_limiter import login_limiter, otp_limiter
+from app.services.session_service import issue_token, profile_from_user, verify_token
 
 
 class AuthState(rx.State):
     is_authenticated: bool = False
     session_email: str = rx.Cookie("", name="session_email")
+    # Signed token with the user id and profile snapshot; verified without DB access
+    session_token: str = rx.Cookie("", name="session_token")
     email: str = ""
     password: str = ""
     confirm_password: str = ""
@@ -61,14 +66,20 @@ class AuthState(rx.State):
             self.error_message = "Please enter both email and password."
             self.is_loading = False
             return
+        limit = login_limiter.hit(email=self.email, ip=self.router.session.client_ip)
+        if not limit.allowed:
+            self.error_message = f"Too many login attempts. Please try again in {int(limit.retry_after)} seconds."
+            self.is_loading = False
+            return
         try:
             with rx.session() as session:
                 user = session.exec(
                     select(DBUser).where(DBUser.email == self.email)
                 ).first()
-                if user and user.password_hash == self.password:
+                if user and await password_service.verify_and_upgrade(session, user, self.password):
                     self.is_authenticated = True
                     self.session_email = self.email
+                    self.session_token = issue_token(profile_from_user(user))
                     self.is_loading = False
                     from app.states.booking_state import BookingState
 
@@ -109,7 +120,7 @@ class AuthState(rx.State):
                 new_user = DBUser(
                     name=self.full_name,
                     email=self.email,
-                    password_hash=self.password,
+                    password_hash=await password_service.hash_password(self.password),
                     phone=self.phone or "",
                     avatar_url=f"https://api.dicebear.com/9.x/notionists/svg?seed={self.email}",
                 )
@@ -130,6 +141,7 @@ class AuthState(rx.State):
                 
                 self.is_authenticated = True
                 self.session_email = self.email
+                self.session_token = issue_token(profile_from_user(new_user))
                 self.is_loading = False
                 from app.states.booking_state import BookingState
 
@@ -143,48 +155,42 @@ class AuthState(rx.State):
             self.is_loading = False
 
     @rx.event
-    def logout(self):
+    async def logout(self):
+        from app.pages.chatbot_page import SimpleChatState
+
+        # The next person on this browser must not see this user's chatbot conversation
+        chat_state = await self.get_state(SimpleChatState)
+        chat_state.reset_conversation()
         self.is_authenticated = False
         self.session_email = ""
+        self.session_token = ""
         self.email = ""
         self.password = ""
         return rx.redirect("/")
 
     @rx.event
     async def check_login(self):
+        """
+        Restore the session from the signed session token without querying the DB.
+        The profile comes from the token snapshot; bookings reload only when stale.
+        """
         from app.states.booking_state import BookingState
 
-        logging.info(
-            f"Checking login. Auth: {self.is_authenticated}, SessionCookie: {self.session_email}"
-        )
-        if self.is_authenticated:
-            if not self.email and self.session_email:
-                self.email = self.session_email
-            yield UserState.load_profile
-            yield BookingState.load_bookings
+        profile = verify_token(self.session_token)
+        if profile is None:
+            logging.warning("Check login failed or no session. Redirecting to login.")
+            self.is_authenticated = False
+            yield rx.redirect("/login")
             return
-        if self.session_email:
-            try:
-                with rx.session() as session:
-                    user = session.exec(
-                        select(DBUser).where(DBUser.email == self.session_email)
-                    ).first()
-                    if user:
-                        logging.info(f"Restoring session for {self.session_email}")
-                        self.is_authenticated = True
-                        self.email = self.session_email
-                        yield UserState.load_profile
-                        yield BookingState.load_bookings
-                        return
-                    else:
-                        logging.warning(
-                            f"Session email {self.session_email} not found in DB"
-                        )
-            except Exception as e:
-                logging.exception(f"Error checking login: {e}")
-        logging.warning("Check login failed or no session. Redirecting to login.")
-        yield rx.redirect("/login")
-        return
+
+        logging.debug(f"Restoring session for {profile['email']}")
+        self.is_authenticated = True
+        self.email = profile["email"]
+        if self.session_email != profile["email"]:
+            self.session_email = profile["email"]
+        user_state = await self.get_state(UserState)
+        user_state.apply_profile(profile)
+        yield BookingState.load_bookings_if_stale
 
     @rx.event
     def set_otp_code(self, value: str):
@@ -217,6 +223,13 @@ class AuthState(rx.State):
             self.is_loading = False
             return
 
+        limit = otp_limiter.hit(email=self.email, ip=self.router.session.client_ip)
+        if not limit.allowed:
+            minutes = max(1, round(limit.retry_after / 60))
+            self.error_message = f"Too many OTP requests. Please try again in {minutes} minute(s)."
+            self.is_loading = False
+            return
+
         # Generate and store OTP
         otp_code = create_otp_record(self.email, "password_reset")
 
@@ -299,7 +312,7 @@ class AuthState(rx.State):
                 ).first()
 
                 if user:
-                    user.password_hash = self.new_password
+                    user.password_hash = await password_service.hash_password(self.new_password)
                     session.commit()
                     self.success_message = "Password reset successful! Redirecting to login..."
                     logging.info(f"Password reset successful for {self.email}")
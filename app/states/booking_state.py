@@ -4,11 +4,12 @@ from typing import Optional
 import random
 import logging
 import asyncio
+import time
 import uuid
 import qrcode
 import io
 import base64
-from sqlmodel import select
+from sqlmodel import case, func, select
 from app.states.schema import Booking, ParkingLot, Payment, AuditLog
 from app.db.models import (
     Booking as DBBooking,
@@ -18,12 +19,100 @@ from app.db.models import (
     User as DBUser,
 )
 from app.states.user_state import UserState
+from app.services import cancellation_service, lot_catalog, session_service
+from app.services.ai.pattern_detector import default_detector
 
+# Bookings loaded within this many seconds are reused on page navigation
+BOOKINGS_STALE_SECONDS = 60
+# Past/cancelled bookings fetched per page
+BOOKING_HISTORY_PAGE_SIZE = 20
+
+
+def _booking_rows_query(user_id: int, *conditions):
+    """Booking columns joined with the lot columns the booking cards show, newest first."""
+    return (
+        select(
+            DBBooking.id,
+            DBBooking.lot_id,
+            DBParkingLot.name.label("lot_name"),
+            DBParkingLot.location.label("lot_location"),
+            DBParkingLot.image_url.label("lot_image"),
+            DBBooking.start_date,
+            DBBooking.start_time,
+            DBBooking.duration_hours,
+            DBBooking.total_price,
+            DBBooking.status,
+            DBBooking.created_at,
+            DBBooking.payment_status,
+            DBBooking.transaction_id,
+            DBBooking.refund_amount,
+            DBBooking.refund_status,
+            DBBooking.refund_approved_at,
+            DBBooking.cancellation_reason,
+            DBBooking.cancellation_at,
+            DBBooking.slot_id,
+            DBBooking.vehicle_number,
+            DBBooking.phone_number,
+            DBBooking.is_refundable,
+        )
+        .join(DBParkingLot, DBParkingLot.id == DBBooking.lot_id, isouter=True)
+        .where(DBBooking.user_id == user_id, *conditions)
+        .order_by(DBBooking.created_at.desc())
+    )
+
+
+def _row_to_booking(row) -> Booking:
+    return Booking(
+        id=f"BK-{row.id}",
+        lot_id=str(row.lot_id),
+        lot_name=row.lot_name or "Unknown",
+        lot_location=row.lot_location or "Unknown",
+        lot_image=row.lot_image or "/placeholder.svg",
+        start_date=row.start_date,
+        start_time=row.start_time,
+        duration_hours=row.duration_hours,
+        total_price=row.total_price,
+        status=row.status,
+        created_at=row.created_at.isoformat(),
+        payment_status=row.payment_status,
+        transaction_id=row.transaction_id or "",
+        refund_amount=row.refund_amount,
+        refund_status=row.refund_status or "",
+        refund_approved_at=row.refund_approved_at.isoformat() if row.refund_approved_at else "",
+        cancellation_reason=row.cancellation_reason or "",
+        cancellation_at=row.cancellation_at.isoformat() if row.cancellation_at else "",
+        slot_id=row.slot_id or "",
+        vehicle_number=row.vehicle_number or "",
+        phone_number=row.phone_number or "",
+        is_refundable=row.is_refundable,
+    )
+
+
+def _booking_end(booking: Booking) -> datetime:
+    """End time of a booking; unparseable dates count as still active."""
+    try:
+        start = datetime.strptime(f"{booking.start_date} {booking.start_time}", "%Y-%m-%d %H:%M")
+        return start + timedelta(hours=booking.duration_hours)
+    except Exception as e:
+        logging.error(f"Error parsing booking date for active check: {e}")
+        return datetime.max
 
 
 class BookingState(rx.State):
-    session_email: str = rx.Cookie("", name="session_email")
+    # Signed session token; bookings are loaded for the user it names, never for the plain email cookie
+    session_token: str = rx.Cookie("", name="session_token")
     bookings: list[Booking] = []
+    # Derived lists and aggregates, computed once per load instead of on every render
+    active_bookings: list[Booking] = []
+    past_bookings: list[Booking] = []
+    cancelled_bookings: list[Booking] = []
+    booking_count: int = 0
+    total_spent: float = 0.0
+    has_more_history: bool = False
+    # When and for whom bookings were last loaded (backend only)
+    _bookings_loaded_at: float = 0.0
+    _bookings_user_id: int = 0
+    _history_offset: int = 0
     payments: list[Payment] = []
     audit_logs: list[AuditLog] = []
     is_modal_open: bool = False
@@ -39,6 +128,7 @@ class BookingState(rx.State):
     refund_amount_display: float = 0.0
     refund_percentage: int = 0
     cancellation_message: str = ""
+    can_cancel: bool = True
     # New slot booking variables
     booking_step: int = 1
     selected_slot: str = ""
@@ -238,57 +328,6 @@ class BookingState(rx.State):
             return 0.0
         return self.selected_lot.price_per_hour * self.duration_hours
 
-    @rx.var
-    def active_bookings(self) -> list[Booking]:
-        now = datetime.now()
-        active = []
-        for b in self.bookings:
-            if b.status == "Confirmed":
-                try:
-                    # Calculate end time
-                    start = datetime.strptime(f"{b.start_date} {b.start_time}", "%Y-%m-%d %H:%M")
-                    end = start + timedelta(hours=b.duration_hours)
-                    # Only include if end time is in the future
-                    if end > now:
-                        active.append(b)
-                except Exception as e:
-                    logging.error(f"Error parsing booking date for active check: {e}")
-                    # If error, keep in active to be safe
-                    active.append(b)
-        return active
-
-    @rx.var
-    def past_bookings(self) -> list[Booking]:
-        now = datetime.now()
-        past = []
-        for b in self.bookings:
-            if b.status == "Completed":
-                past.append(b)
-            elif b.status == "Confirmed":
-                try:
-                    # Check if expired
-                    start = datetime.strptime(f"{b.start_date} {b.start_time}", "%Y-%m-%d %H:%M")
-                    end = start + timedelta(hours=b.duration_hours)
-                    if end <= now:
-                        past.append(b)
-                except Exception:
-                    pass
-        return past
-
-    @rx.var
-    def cancelled_bookings(self) -> list[Booking]:
-        return [b for b in self.bookings if b.status == "Cancelled"]
-
-    @rx.var
-    def total_spent(self) -> float:
-        return sum(
-            [
-                b.total_price
-                for b in self.bookings
-                if b.status in ["Completed", "Confirmed"]
-            ]
-        )
-
     @rx.var
     def zone_a_slots(self) -> list[str]:
         """Generate Zone A slots (A1-A10)"""
@@ -368,66 +407,104 @@ class BookingState(rx.State):
 
     @rx.event
     async def load_bookings(self):
-        """Fetch user's bookings from the database."""
-        user_email = self.session_email
+        """
+        Fetch the user's bookings: every confirmed booking plus the first page of history,
+        each with one joined, column-projected query. Aggregates are computed in SQL.
+        """
+        profile = session_service.verify_token(self.session_token)
+        if profile is None:
+            logging.warning("BookingState: No valid session token. Skipping load.")
+            return
+        user_id = profile["id"]
         logging.info(
-            f"BookingState.load_bookings: Checking bookings for user: '{user_email}'"
+            f"BookingState.load_bookings: Checking bookings for user: '{profile['email']}'"
         )
-        if not user_email:
-            logging.warning("BookingState: No session email found. Skipping load.")
-            return
         try:
             with rx.session() as session:
-                user = session.exec(
-                    select(DBUser).where(DBUser.email == user_email)
-                ).first()
-                if not user:
-                    logging.warning(
-                        f"BookingState: User email '{user_email}' found in state/cookie but NOT in DB."
-                    )
-                    return
-                stmt = (
-                    select(DBBooking)
-                    .where(DBBooking.user_id == user.id)
-                    .order_by(DBBooking.created_at.desc())
-                )
-                db_bookings = session.exec(stmt).all()
-                logging.info(
-                    f"BookingState: Found {len(db_bookings)} bookings for user ID {user.id}"
-                )
-                self.bookings = []
-                for b in db_bookings:
-                    lot = b.parking_lot
-                    booking_obj = Booking(
-                        id=f"BK-{b.id}",
-                        lot_id=str(b.lot_id),
-                        lot_name=lot.name if lot else "Unknown",
-                        lot_location=lot.location if lot else "Unknown",
-                        lot_image=lot.image_url if lot else "/placeholder.svg",
-                        start_date=b.start_date,
-                        start_time=b.start_time,
-                        duration_hours=b.duration_hours,
-                        total_price=b.total_price,
-                        status=b.status,
-                        created_at=b.created_at.isoformat(),
-                        payment_status=b.payment_status,
-                        transaction_id=b.transaction_id or "",
-                        refund_amount=b.refund_amount,
-                        refund_status=b.refund_status or "",
-                        refund_approved_at=b.refund_approved_at.isoformat() if b.refund_approved_at else "",
-                        cancellation_reason=b.cancellation_reason or "",
-                        cancellation_at=b.cancellation_at.isoformat()
-                        if b.cancellation_at
-                        else "",
-                        slot_id=b.slot_id or "",
-                        vehicle_number=b.vehicle_number or "",
-                        phone_number=b.phone_number or "",
-                    )
-                    self.bookings.append(booking_obj)
+                booking_count, total_spent = session.exec(
+                    select(
+                        func.count(DBBooking.id),
+                        func.coalesce(
+                            func.sum(
+                                case(
+                                    (DBBooking.status.in_(["Completed", "Confirmed"]), DBBooking.total_price),
+                                    else_=0.0,
+                                )
+                            ),
+                            0.0,
+                        ),
+                    ).where(DBBooking.user_id == user_id)
+                ).one()
+                confirmed = session.exec(
+                    _booking_rows_query(user_id, DBBooking.status == "Confirmed")
+                ).all()
+                history = session.exec(
+                    _booking_rows_query(user_id, DBBooking.status != "Confirmed")
+                    .limit(BOOKING_HISTORY_PAGE_SIZE + 1)
+                ).all()
+
+            self.booking_count = booking_count
+            self.total_spent = float(total_spent)
+            self.has_more_history = len(history) > BOOKING_HISTORY_PAGE_SIZE
+            history = history[:BOOKING_HISTORY_PAGE_SIZE]
+            self._history_offset = len(history)
+
+            # Confirmed bookings whose end time has passed are shown as past bookings
+            now = datetime.now()
+            active, expired = [], []
+            for row in confirmed:
+                booking = _row_to_booking(row)
+                (active if _booking_end(booking) > now else expired).append(booking)
+            past = [_row_to_booking(row) for row in history]
+
+            self.active_bookings = active
+            self.past_bookings = expired + [b for b in past if b.status == "Completed"]
+            self.cancelled_bookings = [b for b in past if b.status == "Cancelled"]
+            self.bookings = active + expired + past
+            logging.info(
+                f"BookingState: Loaded {len(self.bookings)} of {booking_count} bookings for user ID {user_id}"
+            )
+            self._bookings_loaded_at = time.time()
+            self._bookings_user_id = user_id
         except Exception as e:
             logging.exception(f"Error loading bookings: {e}")
             yield rx.toast.error("Failed to load bookings.")
 
+    @rx.event
+    def load_more_bookings(self):
+        """Append the next page of past and cancelled bookings."""
+        if not self._bookings_user_id or not self.has_more_history:
+            return
+        try:
+            with rx.session() as session:
+                history = session.exec(
+                    _booking_rows_query(self._bookings_user_id, DBBooking.status != "Confirmed")
+                    .offset(self._history_offset)
+                    .limit(BOOKING_HISTORY_PAGE_SIZE + 1)
+                ).all()
+        except Exception as e:
+            logging.exception(f"Error loading more bookings: {e}")
+            return rx.toast.error("Failed to load more bookings.")
+
+        self.has_more_history = len(history) > BOOKING_HISTORY_PAGE_SIZE
+        page = [_row_to_booking(row) for row in history[:BOOKING_HISTORY_PAGE_SIZE]]
+        self._history_offset += len(page)
+        self.past_bookings = self.past_bookings + [b for b in page if b.status == "Completed"]
+        self.cancelled_bookings = self.cancelled_bookings + [b for b in page if b.status == "Cancelled"]
+        self.bookings = self.bookings + page
+
+    @rx.event
+    def load_bookings_if_stale(self):
+        """Reload bookings unless this user's list was loaded within BOOKINGS_STALE_SECONDS."""
+        profile = session_service.verify_token(self.session_token)
+        if (
+            profile is not None
+            and self._bookings_user_id == profile["id"]
+            and time.time() - self._bookings_loaded_at < BOOKINGS_STALE_SECONDS
+        ):
+            return
+        return BookingState.load_bookings
+
     @rx.event
     def open_modal(self, lot: ParkingLot):
         self.selected_lot = lot
@@ -813,6 +890,11 @@ class BookingState(rx.State):
                 lot = session.get(DBParkingLot, int(self.selected_lot.id))
                 if not lot:
                     raise ValueError("Parking lot not found")
+                if not lot.is_active:
+                    self.payment_error = "This parking lot has been closed."
+                    self.is_processing_payment = False
+                    yield rx.toast.error("Booking Failed: Lot is closed.")
+                    return
                 if lot.available_spots <= 0:
                     self.payment_error = "This parking lot is now full."
                     self.is_processing_payment = False
@@ -852,6 +934,7 @@ class BookingState(rx.State):
                 )
                 session.add(new_payment)
                 lot.available_spots -= 1
+                available_spots = lot.available_spots
                 session.add(lot)
                 new_audit = DBAuditLog(
                     action="Booking Created",
@@ -861,6 +944,8 @@ class BookingState(rx.State):
                 )
                 session.add(new_audit)
                 session.commit()
+                lot_catalog.set_available_spots(lot.id, available_spots)
+                default_detector.observe_booking(new_booking)
 
                 # Send Confirmation Email
                 try:
@@ -912,32 +997,19 @@ class BookingState(rx.State):
         self.booking_to_cancel = booking
         self.is_cancellation_modal_open = True
         try:
-            booking_start = datetime.strptime(
-                f"{booking.start_date} {booking.start_time}", "%Y-%m-%d %H:%M"
+            eligibility = cancellation_service.evaluate_cancellation(
+                cancellation_service.get_active_cancellation_policy(),
+                cancellation_service.parse_booking_start(booking.start_date, booking.start_time),
+                booking.total_price,
+                booking.is_refundable,
             )
-            now = datetime.now()
-            diff = booking_start - now
-            hours_diff = diff.total_seconds() / 3600
-            if hours_diff >= 24:
-                self.refund_percentage = 100
-                self.refund_amount_display = booking.total_price
-                self.cancellation_message = (
-                    "Full refund available (more than 24h before booking)."
-                )
-            elif hours_diff > 0:
-                self.refund_percentage = 50
-                self.refund_amount_display = booking.total_price * 0.5
-                self.cancellation_message = (
-                    "50% refund available (less than 24h before booking)."
-                )
-            else:
-                self.refund_percentage = 0
-                self.refund_amount_display = 0.0
-                self.cancellation_message = (
-                    "No refund available (booking has already started)."
-                )
+            self.can_cancel = eligibility["can_cancel"]
+            self.refund_percentage = eligibility["refund_percentage"]
+            self.refund_amount_display = eligibility["refund_amount"]
+            self.cancellation_message = eligibility["message"]
         except Exception as e:
             logging.exception(f"Error calculating refund: {e}")
+            self.can_cancel = False
             self.refund_percentage = 0
             self.refund_amount_display = 0.0
             self.cancellation_message = "Error calculating refund eligibility."
@@ -971,6 +1043,12 @@ class BookingState(rx.State):
                 if booking.status == "Cancelled":
                     yield rx.toast.error("Booking already cancelled.")
                     return
+                # Re-check against the stored booking; the modal's figures are display only
+                eligibility = cancellation_service.validate_cancellation_eligibility(booking)
+                if not eligibility["can_cancel"]:
+                    yield rx.toast.error(eligibility["message"])
+                    return
+                self.refund_amount_display = eligibility["refund_amount"]
                 booking.status = "Cancelled"
                 
                 # Set refund status to Pending instead of processing immediately
@@ -987,8 +1065,10 @@ class BookingState(rx.State):
                 
                 # Free up the parking spot
                 lot = session.get(DBParkingLot, booking.lot_id)
-                if lot:
+                # A closed lot keeps zero spots
+                if lot and lot.is_active:
                     lot.available_spots += 1
+                    available_spots = lot.available_spots
                     session.add(lot)
                 
                 # Audit log
@@ -1000,6 +1080,8 @@ class BookingState(rx.State):
                 )
                 session.add(audit)
                 session.commit()
+                if lot and lot.is_active:
+                    lot_catalog.set_available_spots(lot.id, available_spots)
                 
                 from app.states.parking_state import ParkingState
 
@@ -1,13 +1,26 @@
 import reflex as rx
 import asyncio
+import bisect
 import logging
+import time
 from sqlmodel import select
 from app.states.schema import ParkingLot
-from app.db.models import ParkingLot as DBParkingLot
 from app.db.models import User as DBUser
+from app.services import availability_channel, lot_catalog
 from app.services.ai.pricing_ai import DynamicPricingEngine
 from app.services.ai.recommendation_ai import RecommendationEngine
 
+# How long a listings page keeps receiving availability pushes before on_load must renew it
+WATCH_TTL_SECONDS = 1800
+
+# Sort keys for the precomputed listing views; "availability" is kept separately since it changes live
+SORT_KEYS = {
+    "price_low": lambda lot: lot.price_per_hour,
+    "price_high": lambda lot: -lot.price_per_hour,
+    "rating": lambda lot: -(lot.rating or 0),
+    "recommended": lambda lot: -lot.recommendation_score,
+}
+
 
 class ParkingState(rx.State):
     parking_lots: list[ParkingLot] = []
@@ -25,11 +38,52 @@ class ParkingState(rx.State):
     show_available_only: bool = False
     show_filters: bool = False  # Toggle for filter panel visibility
 
+    # Live availability by lot id; pushed deltas only touch this small dict
+    live_spots: dict[str, int] = {}
+
+    # Availability push (backend only)
+    _watch_until: float = 0.0
+
+    # Filter indexes over parking_lots, rebuilt by load_data (backend only)
+    _positions: dict[str, int] = {}
+    _search_text: list[str] = []
+    _location_text: list[str] = []
+    _sorted_views: dict[str, list[int]] = {}
+    _availability_keys: list[tuple[int, int]] = []
+    _last_query: str = ""
+    _last_matches: list[int] = []
+
     @rx.event
     def on_load(self):
         """Load data when the page loads."""
         self.is_loading = True
         yield ParkingState.load_data
+        if self._watch_until < time.time():
+            self._watch_until = time.time() + WATCH_TTL_SECONDS
+            yield ParkingState.watch_availability
+
+    @rx.event(background=True)
+    async def watch_availability(self):
+        """
+        Apply availability deltas pushed over the availability channel while the listings page is open.
+        The watcher expires after WATCH_TTL_SECONDS and is restarted by the next on_load.
+        """
+        async with self:
+            watch_until = self._watch_until
+        queue = availability_channel.subscribe()
+        try:
+            while True:
+                remaining = watch_until - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    delta = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                async with self:
+                    self.set_spots(str(delta["lot_id"]), delta["available_spots"])
+        finally:
+            availability_channel.unsubscribe(queue)
 
     @rx.event
     async def load_data(self):
@@ -40,10 +94,9 @@ class ParkingState(rx.State):
             await DynamicPricingEngine.update_all_parking_prices()
             
             with rx.session() as session:
-                # Fetch lots
-                stmt = select(DBParkingLot)
-                db_lots = session.exec(stmt).all()
-                logging.info(f"ParkingState: Found {len(db_lots)} lots in DB")
+                # Fetch lots from the shared catalog
+                db_lots = lot_catalog.get_lots()
+                logging.info(f"ParkingState: Found {len(db_lots)} lots in catalog")
                 
                 # Get current user if logged in
                 user_id = None
@@ -69,7 +122,7 @@ class ParkingState(rx.State):
                         total_spots=lot.total_spots,
                         available_spots=lot.available_spots,
                         image_url=lot.image_url,
-                        features=lot.features.split(",") if lot.features else [],
+                        features=list(lot.features),
                         rating=lot.rating,
                         # AI Fields
                         base_price=pricing['base_price'],
@@ -102,6 +155,8 @@ class ParkingState(rx.State):
                     self.recommended_lots = []
 
                 self.parking_lots = processed_lots
+                self.live_spots = {lot.id: lot.available_spots for lot in processed_lots}
+                self._build_indexes()
                 logging.info(f"ParkingState: Populated {len(self.parking_lots)} state objects")
                 self.filter_lots()
         except Exception as e:
@@ -117,76 +172,139 @@ class ParkingState(rx.State):
         Note: The actual DB update happens in BookingState during transaction.
         This method keeps the UI in sync.
         """
-        new_lots = []
-        for lot in self.parking_lots:
-            if lot.id == lot_id:
-                lot.available_spots += change
-                if lot.available_spots < 0:
-                    lot.available_spots = 0
-                if lot.available_spots > lot.total_spots:
-                    lot.available_spots = lot.total_spots
-            new_lots.append(lot)
-        self.parking_lots = new_lots
-        self.filter_lots()
+        lot_id = str(lot_id)
+        if lot_id in self.live_spots:
+            self.set_spots(lot_id, self.live_spots[lot_id] + change)
+
+    def set_spots(self, lot_id: str, available_spots: int):
+        """
+        Set the live available spots for one lot.
+        Only the live_spots entry and the availability sort view change; the lot lists
+        are re-filtered just when the new count can change which lots are shown or their order.
+        """
+        position = self._positions.get(lot_id)
+        if position is None:
+            return
+        lot = self.parking_lots[position]
+        spots = min(max(available_spots, 0), lot.total_spots)
+        previous = self.live_spots.get(lot_id, lot.available_spots)
+        if spots == previous:
+            return
+        self.live_spots[lot_id] = spots
+
+        # Move the lot within the availability view instead of re-sorting it
+        keys = self._availability_keys
+        old_key = (-previous, position)
+        index = bisect.bisect_left(keys, old_key)
+        if index < len(keys) and keys[index] == old_key:
+            del keys[index]
+        bisect.insort(keys, (-spots, position))
+
+        if self.sort_by == "availability" or (
+            self.show_available_only and (spots == 0) != (previous == 0)
+        ):
+            self.filter_lots()
+
+    def _build_indexes(self):
+        """Precompute lowercase search text and per-sort_by orderings for the loaded lots."""
+        lots = self.parking_lots
+        self._positions = {lot.id: position for position, lot in enumerate(lots)}
+        self._search_text = [f"{lot.name}\n{lot.location}".lower() for lot in lots]
+        self._location_text = [lot.location.lower() for lot in lots]
+        self._sorted_views = {
+            sort_by: sorted(range(len(lots)), key=lambda position: key(lots[position]))
+            for sort_by, key in SORT_KEYS.items()
+        }
+        self._availability_keys = sorted(
+            (-self.live_spots.get(lot.id, lot.available_spots), position)
+            for position, lot in enumerate(lots)
+        )
+        self._last_query = ""
+        self._last_matches = []
+
+    def _match_query(self, query: str) -> list[int]:
+        """
+        Positions of lots whose name or location contains the query.
+        While the user keeps typing, each new query only scans the previous query's matches.
+        """
+        if self._last_query and query.startswith(self._last_query):
+            candidates = self._last_matches
+        else:
+            candidates = range(len(self._search_text))
+        search_text = self._search_text
+        matches = [position for position in candidates if query in search_text[position]]
+        self._last_query = query
+        self._last_matches = matches
+        return matches
 
     @rx.event
     def filter_lots(self):
         """Filter parking lots based on all active filters."""
-        logging.info(f"ParkingState: Filtering lots. Query='{self.search_query}', Location='{self.location_filter}'")
+        logging.debug(f"ParkingState: Filtering lots. Query='{self.search_query}', Location='{self.location_filter}'")
+        lots = self.parking_lots
         query = self.search_query.lower()
-        filtered = self.parking_lots
-        
+
         # Search query filter
-        if query:
-            filtered = [
-                lot
-                for lot in filtered
-                if query in lot.name.lower() or query in lot.location.lower()
-            ]
-        
-        # Location filter
-        if self.location_filter != "All":
-            filtered = [
-                lot
-                for lot in filtered
-                if self.location_filter.lower() in lot.location.lower()
-            ]
-        
-        # Price range filter
-        if self.min_price > 0.0 or self.max_price < 100.0:
-            filtered = [
-                lot
-                for lot in filtered
-                if self.min_price <= lot.price_per_hour <= self.max_price
-            ]
-        
-        # Availability filter
-        if self.show_available_only:
-            filtered = [
-                lot
-                for lot in filtered
-                if lot.available_spots > 0
-            ]
-        
-        # Sorting
-        if self.sort_by == "price_low":
-            filtered = sorted(filtered, key=lambda x: x.price_per_hour)
-        elif self.sort_by == "price_high":
-            filtered = sorted(filtered, key=lambda x: x.price_per_hour, reverse=True)
-        elif self.sort_by == "rating":
-            filtered = sorted(filtered, key=lambda x: x.rating if x.rating else 0, reverse=True)
-        elif self.sort_by == "availability":
-            filtered = sorted(filtered, key=lambda x: x.available_spots, reverse=True)
-        elif self.sort_by == "recommended":
-            filtered = sorted(filtered, key=lambda x: x.recommendation_score, reverse=True)
-        
+        allowed = set(self._match_query(query)) if query else None
+
+        # Walk the precomputed view for the active sort instead of sorting
+        if self.sort_by == "availability":
+            order = [position for _, position in self._availability_keys]
+        else:
+            order = self._sorted_views.get(self.sort_by) or range(len(lots))
+
+        location = self.location_filter.lower() if self.location_filter != "All" else ""
+        location_text = self._location_text
+        check_price = self.min_price > 0.0 or self.max_price < 100.0
+        min_price, max_price = self.min_price, self.max_price
+        live_spots = self.live_spots
+
+        filtered = []
+        for position in order:
+            if allowed is not None and position not in allowed:
+                continue
+            if location and location not in location_text[position]:
+                continue
+            lot = lots[position]
+            if check_price and not (min_price <= lot.price_per_hour <= max_price):
+                continue
+            if self.show_available_only and live_spots.get(lot.id, lot.available_spots) <= 0:
+                continue
+            filtered.append(lot)
+
         self.filtered_lots = filtered
-        logging.info(f"ParkingState: Filtered down to {len(self.filtered_lots)} lots")
+        logging.debug(f"ParkingState: Filtered down to {len(self.filtered_lots)} lots")
 
     @rx.event
     def set_search_query(self, query: str):
         self.search_query = query
         self.filter_lots()
+
+    @rx.event
+    def set_location_filter(self, location: str):
+        self.location_filter = location
+        self.filter_lots()
+
+    @rx.event
+    def set_min_price(self, value: str):
+        try:
+            self.min_price = float(value) if value not in ("", None) else 0.0
+        except ValueError:
+            return
+        self.filter_lots()
+
+    @rx.event
+    def set_max_price(self, value: str):
+        try:
+            self.max_price = float(value) if value not in ("", None) else 100.0
+        except ValueError:
+            return
+        self.filter_lots()
+
+    @rx.event
+    def set_sort_by(self, sort_by: str):
+        self.sort_by = sort_by
+        self.filter_lots()
     
     @rx.event
     def toggle_available_only(self):
@@ -208,17 +326,3 @@ class ParkingState(rx.State):
         self.sort_by = "default"
         self.show_available_only = False
         self.filter_lots()
-    def toggle_filters(self):
-        """Toggle filter panel visibility."""
-        self.show_filters = not self.show_filters
-    
-    @rx.event
-    def reset_filters(self):
-        """Reset all filters to default values."""
-        self.search_query = ""
-        self.location_filter = "All"
-        self.min_price = 0.0
-        self.max_price = 100.0
-        self.sort_by = "default"
-        self.show_available_only = False
-        self.filter_lots()
\ No newline at end of file
@@ -65,4 +65,5 @@ class Booking(rx.Base):
     cancellation_at: str = ""
     slot_id: str = ""
     vehicle_number: str = ""
-    phone_number: str = ""
\ No newline at end of file
+    phone_number: str = ""
+    is_refundable: bool = True
\ No newline at end of file
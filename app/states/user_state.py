@@ -3,6 +3,7 @@ from sqlmodel import select
 import logging
 from app.states.schema import User
 from app.db.models import User as DBUser
+from app.services import session_service
 
 
 class UserState(rx.State):
@@ -14,9 +15,19 @@ class UserState(rx.State):
         avatar_url="https://api.dicebear.com/9.x/notionists/svg?seed=Guest",
     )
 
+    def apply_profile(self, profile: dict):
+        """Show a profile snapshot from the session token or user cache."""
+        self.user = User(
+            name=profile["name"],
+            email=profile["email"],
+            phone=profile["phone"],
+            member_since=profile["member_since"],
+            avatar_url=profile["avatar_url"],
+        )
+
     @rx.event
     async def load_profile(self):
-        """Fetch user profile from DB based on email in AuthState."""
+        """Fetch user profile (via the per-process user cache) based on email in AuthState."""
         from app.states.auth_state import AuthState
 
         auth_state = await self.get_state(AuthState)
@@ -28,23 +39,14 @@ class UserState(rx.State):
             logging.warning("Cannot load profile: missing email")
             return
         try:
-            with rx.session() as session:
-                db_user = session.exec(
-                    select(DBUser).where(DBUser.email == target_email)
-                ).first()
-                if db_user:
-                    logging.info(f"Profile loaded for {db_user.email}")
-                    self.user = User(
-                        name=db_user.name,
-                        email=db_user.email,
-                        phone=db_user.phone,
-                        member_since=db_user.member_since.strftime("%b %Y"),
-                        avatar_url=db_user.avatar_url,
-                    )
-                else:
-                    logging.warning(
-                        f"User {auth_state.email} authenticated but not found in DB."
-                    )
+            profile = session_service.get_user_profile(target_email)
+            if profile:
+                logging.info(f"Profile loaded for {profile['email']}")
+                self.apply_profile(profile)
+            else:
+                logging.warning(
+                    f"User {auth_state.email} authenticated but not found in DB."
+                )
         except Exception as e:
             logging.exception(f"Error loading profile: {e}")
             yield rx.toast.error("Failed to load profile.")
@@ -77,6 +79,12 @@ class UserState(rx.State):
                     db_user.phone = self.user.phone
                     session.add(db_user)
                     session.commit()
+                    session.refresh(db_user)
+                    # Refresh the cached profile and the snapshot in the session token
+                    session_service.invalidate_user(db_user.email)
+                    auth_state.session_token = session_service.issue_token(
+                        session_service.profile_from_user(db_user)
+                    )
                     yield rx.toast.success("Profile saved successfully!")
                 else:
                     yield rx.toast.error("User record not found.")
@@ -0,0 +1,107 @@
+"""Accuracy and throughput benchmark for the chatbot intent classifier"""
+import time
+
+from app.services.ai.intent_classifier import INTENT_KEYWORDS, default_classifier
+
+# Labeled corpus: (message, expected intent)
+LABELED_CORPUS = [
+    ("Hi", "greeting"),
+    ("hello there", "greeting"),
+    ("Hey!", "greeting"),
+    ("Good morning", "greeting"),
+    ("good afternoon assistant", "greeting"),
+    ("I want to book a parking spot near KLCC", "book"),
+    ("Book parking at Mid Valley", "book"),
+    ("Find parking near Sunway", "book"),
+    ("reserve a spot in Bangsar tomorrow", "book"),
+    ("I need parking in Bukit Bintang", "book"),
+    ("Looking for a place to park near Pavilion", "book"),
+    ("Is there parking available at KLCC?", "check_availability"),
+    ("Check availability", "check_availability"),
+    ("any spots free in Bangsar", "check_availability"),
+    ("How many spaces are left at Mid Valley", "check_availability"),
+    ("is Sunway full right now", "check_availability"),
+    ("vacancy at Pavilion?", "check_availability"),
+    ("parking availability near KLCC", "check_availability"),
+    ("What is the price at KLCC?", "get_info"),
+    ("Tell me about Mid Valley parking", "get_info"),
+    ("details for Bangsar lot", "get_info"),
+    ("How much does Sunway parking cost", "get_info"),
+    ("what features does Pavilion have", "get_info"),
+    ("parking rates in Bukit Bintang", "get_info"),
+    ("Show my bookings", "my_bookings"),
+    ("view booking", "my_bookings"),
+    ("what are my reservations", "my_bookings"),
+    ("show me my booking history", "my_bookings"),
+    ("Cancel my booking", "cancel"),
+    ("I want to cancel the reservation", "cancel"),
+    ("how do I get a refund", "cancel"),
+    ("help", "help"),
+    ("What can you do?", "help"),
+    ("how do I use this", "help"),
+    ("I need some assistance, can you assist", "help"),
+    ("thanks", "unknown"),
+    ("asdfgh", "unknown"),
+    ("this is great", "unknown"),
+    ("which is the hippest café", "unknown"),
+    ("ok", "unknown"),
+]
+
+
+def legacy_detect_intent(message: str) -> str:
+    """The previous detector: ordered substring scan over unweighted keywords."""
+    legacy_intents = {
+        "book": ["book", "reserve", "parking", "spot", "need", "want"],
+        "check_availability": ["available", "free", "spots", "spaces", "check", "vacancy"],
+        "get_info": ["info", "information", "details", "about", "price", "location", "tell me"],
+        "my_bookings": ["my booking", "my reservation", "show booking", "view booking"],
+        "cancel": ["cancel", "remove", "delete"],
+        "help": ["help", "what can you do", "how", "assist"],
+        "greeting": ["hi", "hello", "hey", "good morning", "good afternoon"],
+    }
+    message_lower = message.lower()
+    for intent, keywords in legacy_intents.items():
+        if any(keyword in message_lower for keyword in keywords):
+            return intent
+    return "unknown"
+
+
+def evaluate(name, classify, iterations=400, rounds=5):
+    correct = 0
+    misses = []
+    for message, expected in LABELED_CORPUS:
+        predicted = classify(message)
+        if predicted == expected:
+            correct += 1
+        else:
+            misses.append((message, expected, predicted))
+
+    # Best of several rounds, so a noisy machine does not decide the comparison
+    messages = [message for message, _ in LABELED_CORPUS] * iterations
+    elapsed = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for message in messages:
+            classify(message)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    accuracy = correct / len(LABELED_CORPUS) * 100
+    print(f"\n{name}")
+    print(f"  Accuracy:   {correct}/{len(LABELED_CORPUS)} ({accuracy:.1f}%)")
+    print(f"  Throughput: {len(messages) / elapsed:,.0f} messages/sec")
+    for message, expected, predicted in misses:
+        print(f"  ❌ '{message}': expected {expected}, got {predicted}")
+    return accuracy
+
+
+def main():
+    keyword_count = sum(len(phrases) for phrases in INTENT_KEYWORDS.values())
+    print(f"Intent classifier benchmark: {len(LABELED_CORPUS)} labeled messages, {keyword_count} keywords")
+    legacy = evaluate("Legacy substring scan", legacy_detect_intent)
+    compiled = evaluate("Compiled classifier", default_classifier.classify)
+    if compiled < legacy:
+        print("\n⚠️ Compiled classifier is less accurate than the legacy scan")
+
+
+if __name__ == "__main__":
+    main()
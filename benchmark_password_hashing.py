@@ -0,0 +1,65 @@
+"""Logins/sec benchmark for the password service at different bcrypt costs"""
+import asyncio
+import time
+
+from app.services import password_service
+
+PASSWORD = "correct horse battery staple"
+LOGINS_PER_RUN = 32
+
+
+async def run_logins(stored: str, count: int) -> float:
+    """Verify `count` logins concurrently through the hashing pool; returns logins/sec."""
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(password_service.verify_password(PASSWORD, stored) for _ in range(count))
+    )
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return count / elapsed
+
+
+async def measure_loop_latency(stored: str, count: int) -> float:
+    """Worst event-loop stall (ms) seen while logins run, showing hashing stays off the loop."""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        while not done:
+            tick = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst = max(worst, (time.perf_counter() - tick - 0.005) * 1000)
+
+    task = asyncio.create_task(ticker())
+    await run_logins(stored, count)
+    done = True
+    await task
+    return worst
+
+
+async def main():
+    print(f"Password hashing benchmark ({password_service.PASSWORD_HASH_WORKERS} worker threads, "
+          f"target cost {password_service.BCRYPT_ROUNDS})\n")
+    for rounds in (10, 11, 12, 13):
+        stored = password_service.hash_password_sync(PASSWORD, rounds=rounds)
+        start = time.perf_counter()
+        password_service.verify_password_sync(PASSWORD, stored)
+        single_ms = (time.perf_counter() - start) * 1000
+
+        rate = await run_logins(stored, LOGINS_PER_RUN)
+        stall = await measure_loop_latency(stored, LOGINS_PER_RUN)
+        marker = "  <- target" if rounds == password_service.BCRYPT_ROUNDS else ""
+        print(f"cost {rounds}: {single_ms:7.1f} ms/verify | {rate:7.1f} logins/sec | "
+              f"max loop stall {stall:5.1f} ms{marker}")
+
+    start = time.perf_counter()
+    for _ in range(LOGINS_PER_RUN):
+        password_service.verify_password_sync(PASSWORD, PASSWORD)
+    elapsed = time.perf_counter() - start
+    print(f"\nLegacy plaintext rows: {LOGINS_PER_RUN / elapsed:,.0f} checks/sec "
+          "(rehashed to the target cost on first successful login)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,9 +2,10 @@
 Script to create an admin user account
 Run this once to create your first admin account
 """
-import bcrypt
-from sqlmodel import Session, select, create_engine
+from sqlmodel import select
+from app.db.database import get_session
 from app.db.models import User
+from app.services.password_service import hash_password_sync
 from datetime import datetime
 
 def create_admin_user():
@@ -18,17 +19,10 @@ def create_admin_user():
     admin_phone = "+60123456789"
     
     # Hash the password
-    password_hash = bcrypt.hashpw(
-        admin_password.encode('utf-8'),
-        bcrypt.gensalt()
-    ).decode('utf-8')
-    
-    # Database connection
-    DATABASE_URL = "sqlite:///reflex.db"
-    engine = create_engine(DATABASE_URL)
+    password_hash = hash_password_sync(admin_password)
     
     try:
-        with Session(engine) as session:
+        with get_session() as session:
             # Check if admin already exists
             existing_admin = session.exec(
                 select(User).where(User.email == admin_email)
@@ -11,7 +11,7 @@ from app.db.models import (
 )
 from app.db.ai_models import (
     UserPreference, PricingHistory, AutoBookingSetting,
-    ChatbotConversation, RecommendationScore
+    ChatbotConversation, ChatbotMessage, RecommendationScore
 )
 
 
@@ -32,6 +32,7 @@ def migrate_ai_features():
         print("  - Pricing History (for dynamic pricing)")
         print("  - Auto-Booking Settings (for auto-booking agent)")
         print("  - Chatbot Conversations (for AI chatbot)")
+        print("  - Chatbot Messages (append-only chat history)")
         print("  - Recommendation Scores (for personalized suggestions)")
         
         return True
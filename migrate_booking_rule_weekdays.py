@@ -0,0 +1,81 @@
+"""
+Migration script to add days_mask and lot_id to the bookingrule table and backfill them.
+"""
+import sqlite3
+import os
+
+db_path = os.path.join(os.path.dirname(__file__), "app", "reflex.db")
+if not os.path.exists(db_path):
+    # Try alternate path if running from root
+    db_path = os.path.join(os.path.dirname(__file__), "reflex.db")
+
+# Bit order used by the rule engine: Mon = 1, Tue = 2, ... Sun = 64
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+INDEXES = {
+    "ix_bookingrule_due": "bookingrule (status, days_mask)",
+    "ix_bookingrule_lot_id": "bookingrule (lot_id)",
+}
+
+def days_to_mask(days):
+    mask = 0
+    for day in (days or "").split(","):
+        day = day.strip()
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+def migrate_booking_rule_weekdays():
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        # Check if columns exist
+        cursor.execute("PRAGMA table_info(bookingrule)")
+        columns = [info[1] for info in cursor.fetchall()]
+
+        if "days_mask" not in columns:
+            print("Adding days_mask column...")
+            cursor.execute("ALTER TABLE bookingrule ADD COLUMN days_mask INTEGER NOT NULL DEFAULT 0")
+        else:
+            print("days_mask column already exists.")
+
+        if "lot_id" not in columns:
+            print("Adding lot_id column...")
+            cursor.execute("ALTER TABLE bookingrule ADD COLUMN lot_id INTEGER REFERENCES parkinglot(id)")
+        else:
+            print("lot_id column already exists.")
+
+        cursor.execute("PRAGMA index_list(bookingrule)")
+        existing = {info[1] for info in cursor.fetchall()}
+        for name, target in INDEXES.items():
+            if name not in existing:
+                print(f"Creating index {name}...")
+                cursor.execute(f"CREATE INDEX {name} ON {target}")
+            else:
+                print(f"{name} already exists.")
+
+        # Backfill from the days string and the "Name - Location" string
+        cursor.execute("SELECT id, name, location FROM parkinglot")
+        lots = {f"{name} - {location}": lot_id for lot_id, name, location in cursor.fetchall()}
+
+        cursor.execute("SELECT id, days, location FROM bookingrule")
+        updates = [
+            (days_to_mask(days), lots.get(location), rule_id)
+            for rule_id, days, location in cursor.fetchall()
+        ]
+        cursor.executemany("UPDATE bookingrule SET days_mask = ?, lot_id = ? WHERE id = ?", updates)
+        unmatched = sum(1 for _, lot_id, _ in updates if lot_id is None)
+        print(f"Backfilled {len(updates)} rules ({unmatched} without a matching parking lot).")
+
+        conn.commit()
+        print("✅ Migration completed successfully.")
+
+    except sqlite3.Error as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_booking_rule_weekdays()
@@ -0,0 +1,59 @@
+"""
+Migration script to add latitude/longitude to parkinglot table
+and backfill coordinates for the seeded Kuala Lumpur lots.
+"""
+import sqlite3
+import os
+
+db_path = os.path.join(os.path.dirname(__file__), "app", "reflex.db")
+if not os.path.exists(db_path):
+    # Try alternate path if running from root
+    db_path = os.path.join(os.path.dirname(__file__), "reflex.db")
+
+# Known coordinates for the default seed lots
+SEED_COORDINATES = {
+    "KLCC Tower Parking": (3.1579, 101.7123),
+    "Bukit Bintang Central": (3.1466, 101.7108),
+    "Mid Valley South Key": (3.1177, 101.6775),
+    "Bangsar Village Open Lot": (3.1302, 101.6710),
+    "Sunway Pyramid Zone B": (3.0731, 101.6070),
+    "Pavilion Elite": (3.1490, 101.7133),
+}
+
+def migrate_lot_coordinates():
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        # Check if columns exist
+        cursor.execute("PRAGMA table_info(parkinglot)")
+        columns = [info[1] for info in cursor.fetchall()]
+        
+        for column in ("latitude", "longitude"):
+            if column not in columns:
+                print(f"Adding {column} column...")
+                cursor.execute(f"ALTER TABLE parkinglot ADD COLUMN {column} FLOAT")
+            else:
+                print(f"{column} column already exists.")
+        
+        # Backfill coordinates for lots that don't have them yet
+        updated = 0
+        for name, (lat, lng) in SEED_COORDINATES.items():
+            cursor.execute(
+                "UPDATE parkinglot SET latitude = ?, longitude = ? WHERE name = ? AND latitude IS NULL",
+                (lat, lng, name),
+            )
+            updated += cursor.rowcount
+        print(f"Backfilled coordinates for {updated} lot(s).")
+            
+        conn.commit()
+        print("✅ Migration completed successfully.")
+        
+    except sqlite3.Error as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_lot_coordinates()
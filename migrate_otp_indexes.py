@@ -0,0 +1,47 @@
+"""
+Migration script to add the OTP lookup and expiry indexes to the otpverification table.
+"""
+import sqlite3
+import os
+
+db_path = os.path.join(os.path.dirname(__file__), "app", "reflex.db")
+if not os.path.exists(db_path):
+    # Try alternate path if running from root
+    db_path = os.path.join(os.path.dirname(__file__), "reflex.db")
+
+INDEXES = {
+    "ix_otpverification_lookup": "otpverification (email, purpose, is_used, expires_at)",
+    "ix_otpverification_expires_at": "otpverification (expires_at)",
+}
+
+def migrate_otp_indexes():
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        # Check which indexes exist
+        cursor.execute("PRAGMA index_list(otpverification)")
+        existing = {info[1] for info in cursor.fetchall()}
+        
+        for name, target in INDEXES.items():
+            if name not in existing:
+                print(f"Creating index {name}...")
+                cursor.execute(f"CREATE INDEX {name} ON {target}")
+            else:
+                print(f"{name} already exists.")
+        
+        # Drop rows that can never be verified again
+        cursor.execute("DELETE FROM otpverification WHERE expires_at < datetime('now')")
+        print(f"Removed {cursor.rowcount} expired OTP records.")
+            
+        conn.commit()
+        print("✅ Migration completed successfully.")
+        
+    except sqlite3.Error as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_otp_indexes()
@@ -1,14 +1,12 @@
 import reflex as rx
-from sqlmodel import Session, create_engine, select
+from sqlmodel import select
+from app.db.database import get_session
 from app.db.models import Booking, User, ParkingLot
 from datetime import datetime, timedelta
 import random
 
 def seed_bookings():
-    DATABASE_URL = "sqlite:///reflex.db"
-    engine = create_engine(DATABASE_URL)
-    
-    with Session(engine) as session:
+    with get_session() as session:
         users = session.exec(select(User)).all()
         lots = session.exec(select(ParkingLot)).all()
         
@@ -20,7 +20,7 @@ def setup_test_rule():
             return
 
         # 2. Get a parking lot
-        cursor.execute("SELECT name, location FROM parkinglot LIMIT 1")
+        cursor.execute("SELECT name, location, id FROM parkinglot LIMIT 1")
         lot = cursor.fetchone()
         if not lot:
             print("❌ No parking lots found.")
@@ -31,6 +31,7 @@ def setup_test_rule():
         # 3. Determine Tomorrow's Day
         tomorrow = datetime.now() + timedelta(days=1)
         tomorrow_day = tomorrow.strftime("%a") # e.g., "Wed"
+        days_mask = 1 << tomorrow.weekday() # Mon = 1 ... Sun = 64
         
         print(f"Setting up rule for User: {user[1]}")
         print(f"Location: {lot_str}")
@@ -49,15 +50,15 @@ def setup_test_rule():
             print("Updating existing rule...")
             cursor.execute("""
                 UPDATE bookingrule 
-                SET days = ?, status = 'Active', time = '08:00', duration = '2 hours'
+                SET days = ?, days_mask = ?, lot_id = ?, status = 'Active', time = '08:00', duration = '2 hours'
                 WHERE id = ?
-            """, (tomorrow_day, existing_rule[0]))
+            """, (tomorrow_day, days_mask, lot[2], existing_rule[0]))
         else:
             print("Creating new rule...")
             cursor.execute("""
-                INSERT INTO bookingrule (location, days, time, duration, status, next_run, user_id, created_at)
-                VALUES (?, ?, '08:00', '2 hours', 'Active', 'Tomorrow', ?, ?)
-            """, (lot_str, tomorrow_day, user[0], datetime.now()))
+                INSERT INTO bookingrule (location, days, days_mask, lot_id, time, duration, status, next_run, user_id, created_at)
+                VALUES (?, ?, ?, ?, '08:00', '2 hours', 'Active', 'Tomorrow', ?, ?)
+            """, (lot_str, tomorrow_day, days_mask, lot[2], user[0], datetime.now()))
             
         conn.commit()
         print("✅ Auto-Booking Rule Set Up Successfully!")
@@ -0,0 +1,50 @@
+"""
+Regression checks for the chatbot intent classifier: every message in the labeled benchmark
+corpus must keep its intent. Run with `python test_intent_classifier.py` (or pytest).
+"""
+from app.services.ai.intent_classifier import INTENT_KEYWORDS, IntentClassifier, default_classifier
+from benchmark_intent_classifier import LABELED_CORPUS
+
+
+def test_labeled_corpus():
+    misses = [
+        (message, expected, default_classifier.classify(message))
+        for message, expected in LABELED_CORPUS
+        if default_classifier.classify(message) != expected
+    ]
+    assert not misses, f"Misclassified: {misses}"
+
+
+def test_longest_phrase_wins():
+    # "my booking" must not also count as "book"
+    assert default_classifier.scores("my booking") == {"my_bookings": 3.0}
+
+
+def test_punctuation_case_and_whitespace():
+    assert default_classifier.classify("SHOW   my\tbookings!!") == "my_bookings"
+    assert default_classifier.classify("Cancel... my booking?") == "cancel"
+    assert default_classifier.classify("hello, what's the price?") == "get_info"
+
+
+def test_whole_words_only():
+    # "hi" inside "this" or "hippest" is not a greeting
+    assert default_classifier.classify("this is the hippest place") == "unknown"
+    assert default_classifier.classify("") == "unknown"
+
+
+def test_ties_go_to_the_first_listed_intent():
+    classifier = IntentClassifier({"first": {"alpha": 1.0}, "second": {"beta": 1.0}})
+    assert classifier.classify("beta alpha") == "first"
+
+
+def test_every_keyword_classifies_to_its_intent_alone():
+    for intent, phrases in INTENT_KEYWORDS.items():
+        for phrase in phrases:
+            assert intent in default_classifier.scores(phrase), phrase
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
@@ -0,0 +1,169 @@
+"""
+Checks for the refund gateway client against the in-process fake gateway:
+idempotency, retries, the circuit breaker, the concurrency limit and reuse across event loops.
+Run with `python test_refund_gateway.py` (or pytest).
+"""
+import asyncio
+
+from app.services import refund_gateway
+from app.services.refund_gateway import CircuitBreaker, FakeRefundGateway, RefundGatewayClient
+
+# Keep retry backoff short
+refund_gateway.RETRY_BASE_SECONDS = 0.001
+refund_gateway.RETRY_MAX_SECONDS = 0.005
+
+
+def make_client(transport, **kwargs):
+    return RefundGatewayClient(transport, **kwargs)
+
+
+def test_repeated_key_refunds_once():
+    gateway = FakeRefundGateway(latency=0, failure_rate=0)
+    client = make_client(gateway)
+
+    async def run():
+        first = await client.refund("TXN1", 10.0, "test", "refund-1-a")
+        second = await client.refund("TXN1", 10.0, "test", "refund-1-a")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.success and second.success
+    assert first.refund_id == second.refund_id
+    assert gateway.refunds_issued == 1
+
+
+def test_transient_failures_are_retried_with_the_same_key():
+    gateway = FakeRefundGateway(latency=0, failure_rate=0, fail_first=2)
+    client = make_client(gateway, max_retries=3)
+    result = asyncio.run(client.refund("TXN2", 5.0, "test", "refund-2-a"))
+    assert result.success
+    assert gateway.requests == 3
+    assert gateway.refunds_issued == 1
+    assert client.breaker.state == "closed"
+
+
+def test_retries_give_up_after_max_retries():
+    gateway = FakeRefundGateway(latency=0, failure_rate=1.0)
+    client = make_client(gateway, max_retries=2, breaker=CircuitBreaker(threshold=100))
+    result = asyncio.run(client.refund("TXN3", 5.0, "test", "refund-3-a"))
+    assert not result.success and result.status == "Failed"
+    assert gateway.requests == 3
+    assert gateway.refunds_issued == 0
+
+
+def test_decline_is_not_retried():
+    gateway = FakeRefundGateway(latency=0, failure_rate=0)
+    client = make_client(gateway, max_retries=3)
+    result = asyncio.run(client.refund("TXN4", 0.0, "test", "refund-4-a"))
+    assert result.status == "Declined"
+    assert gateway.requests == 1
+
+
+def test_breaker_opens_and_short_circuits():
+    gateway = FakeRefundGateway(latency=0, failure_rate=1.0)
+    breaker = CircuitBreaker(threshold=3, reset_seconds=60)
+    client = make_client(gateway, max_retries=0, breaker=breaker)
+
+    async def run():
+        for i in range(3):
+            await client.refund("TXN5", 5.0, "test", f"refund-5-{i}")
+        return await client.refund("TXN5", 5.0, "test", "refund-5-x")
+
+    result = asyncio.run(run())
+    assert breaker.state == "open"
+    assert gateway.requests == 3  # the last call never reached the gateway
+    assert not result.success and "circuit open" in result.message
+
+
+def test_breaker_half_open_trial_closes_it():
+    gateway = FakeRefundGateway(latency=0, failure_rate=0, fail_first=1)
+    breaker = CircuitBreaker(threshold=1, reset_seconds=0)
+    client = make_client(gateway, max_retries=0, breaker=breaker)
+
+    async def run():
+        await client.refund("TXN6", 5.0, "test", "refund-6-a")
+        return await client.refund("TXN6", 5.0, "test", "refund-6-a")
+
+    result = asyncio.run(run())
+    assert result.success
+    assert breaker.state == "closed"
+
+
+def test_concurrency_limit_and_idempotent_bulk_refunds():
+    gateway = FakeRefundGateway(latency=0.005, failure_rate=0, max_concurrency=4)
+    client = make_client(gateway, concurrency=4)
+    requests = [("TXN7", 1.0, "test", f"refund-7-{i % 30}") for i in range(60)]
+    results = asyncio.run(client.refund_many(requests))
+    assert all(result.success for result in results)
+    assert gateway.peak_in_flight <= 4
+    assert gateway.refunds_issued == 30
+
+
+def test_client_is_reused_across_event_loops():
+    gateway = FakeRefundGateway(latency=0, failure_rate=0)
+    client = make_client(gateway)
+    first = asyncio.run(client.refund("TXN8", 1.0, "test", "refund-8-a"))
+    second = asyncio.run(client.refund("TXN8", 1.0, "test", "refund-8-b"))
+    assert first.success and second.success
+    assert gateway.refunds_issued == 2
+
+
+class BrokenTransport:
+    """Raises an unexpected error (not a RefundGatewayError) until told to recover."""
+
+    def __init__(self):
+        self.broken = True
+        self.requests = 0
+
+    async def refund(self, transaction_id, amount, reason, idempotency_key):
+        self.requests += 1
+        if self.broken:
+            raise KeyError("refund_id")
+        return "RFD_OK"
+
+
+def test_unexpected_error_during_half_open_trial_does_not_wedge_the_breaker():
+    transport = BrokenTransport()
+    breaker = CircuitBreaker(threshold=1, reset_seconds=0)
+    client = make_client(transport, max_retries=0, breaker=breaker)
+
+    async def run():
+        first = await client.refund("TXN9", 1.0, "test", "refund-9-a")   # opens the breaker
+        second = await client.refund("TXN9", 1.0, "test", "refund-9-a")  # half-open trial, fails again
+        transport.broken = False
+        third = await client.refund("TXN9", 1.0, "test", "refund-9-a")   # next trial goes through
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert not first.success and not second.success
+    assert third.success and breaker.state == "closed"
+    assert transport.requests == 3
+
+
+def test_cancelled_trial_releases_the_breaker():
+    class SlowTransport:
+        async def refund(self, transaction_id, amount, reason, idempotency_key):
+            await asyncio.sleep(10)
+
+    breaker = CircuitBreaker(threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    client = make_client(SlowTransport(), max_retries=0, breaker=breaker)
+
+    async def run():
+        task = asyncio.ensure_future(client.refund("TXN10", 1.0, "test", "refund-10-a"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert breaker.allow()
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")